@@ -0,0 +1 @@
+# Treat like package for imports
\ No newline at end of file
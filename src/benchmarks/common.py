@@ -0,0 +1,51 @@
+import json
+
+def percentile(samples:list[float], pct:float) -> float:
+    """
+    **Nearest-rank percentile of a list of samples.**
+
+    *Parameters*:
+    - `samples` (list[float]): The measured samples.
+    - `pct` (float): The percentile to grab, 0-100.
+
+    *Returns*:
+    - (float): The percentile value, 0 if there are no samples.
+    """
+    if not samples: return 0.0
+
+    ordered = sorted(samples)
+    rank = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+
+    return ordered[rank]
+
+def summarize(samples_sec:list[float]) -> dict:
+    """
+    **Summarize latency samples into milliseconds.**
+
+    *Parameters*:
+    - `samples_sec` (list[float]): Latency samples in seconds.
+
+    *Returns*:
+    - (dict): Count, mean, p50, p95, p99 and max in milliseconds.
+    """
+    ms = [s * 1000 for s in samples_sec]
+
+    return {
+        'count': len(ms),
+        'mean_ms': sum(ms) / len(ms) if ms else 0.0,
+        'p50_ms': percentile(ms, 50),
+        'p95_ms': percentile(ms, 95),
+        'p99_ms': percentile(ms, 99),
+        'max_ms': max(ms) if ms else 0.0
+    }
+
+def write_json(path:str, data:dict):
+    """
+    **Write benchmark results to a JSON file.**
+
+    *Parameters*:
+    - `path` (str): The output path.
+    - `data` (dict): The results to write.
+    """
+    with open(path, 'w') as file:
+        json.dump(data, file, indent=4)
@@ -0,0 +1,107 @@
+from PIL import Image, ImageDraw
+import argparse, random, time, sys
+from pathlib import Path
+import loggerric as lr
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from benchmarks.common import summarize, write_json
+from client.map_cache import MapPyramid
+from client.rendering import (RenderCache, compute_view, draw_grid,
+                              render_dynamic_layer, render_base_layer)
+
+BOUNDS = { 'min_x': -505, 'max_x': 607, 'min_y': 509, 'max_y': -607 }
+
+def random_trails(players:int, points:int) -> dict[str, list[tuple]]:
+    """
+    **Build random trails inside the world bounds.**
+
+    *Parameters*:
+    - `players` (int): Amount of players.
+    - `points` (int): Points per player.
+
+    *Returns*:
+    - (dict[str, list[tuple]]): Coordinates keyed by player color.
+    """
+    return {
+        f'#{random.randrange(0x1000000):06X}': [
+            (random.uniform(-600, 500), random.uniform(-500, 600))
+            for _ in range(points)
+        ]
+        for _ in range(players)
+    }
+
+def main():
+    """
+    **Main entrypoint.**
+    """
+    parser = argparse.ArgumentParser(
+        description='Compare compositing a full-size grid overlay every frame '
+                    + 'against a cached base layer with a cropped overlay.'
+    )
+    parser.add_argument('--map', default='TheIsleMap_Jan2026.png')
+    parser.add_argument('--frames', type=int, default=100)
+    parser.add_argument('--players', type=int, default=6)
+    parser.add_argument('--points', type=int, default=16)
+    parser.add_argument('--json', default=None, help='Write results to file.')
+    args = parser.parse_args()
+
+    base_map = MapPyramid(Image.open(ROOT / 'client' / 'maps' / args.map))
+
+    results = []
+    for width, height, zoom in [(1280, 720, 1.0), (1920, 1080, 1.0),
+                                (1920, 1080, 3.0)]:
+        view = compute_view(base_map.size, width, height, zoom, (0, 0))
+        cache = RenderCache()
+        map_only = base_map.region(view.map_size, (0, 0, *view.map_size))
+
+        before, after = [], []
+        for _ in range(args.frames):
+            trails = random_trails(args.players, args.points)
+            overlay, position = render_dynamic_layer(view, trails, {}, BOUNDS)
+
+            # Before: fresh full-size overlay with the grid, whole-frame blend
+            start = time.perf_counter()
+            canvas = Image.new('RGBA', view.target_size)
+            canvas.paste(map_only, view.offset)
+            full = Image.new('RGBA', view.target_size, (0, 0, 0, 0))
+            draw_grid(ImageDraw.Draw(full), view)
+            if overlay: full.paste(overlay, position)
+            Image.alpha_composite(canvas, full)
+            before.append(time.perf_counter() - start)
+
+            # After: cached base with the grid, blend only the trail overlay
+            start = time.perf_counter()
+            frame = cache.base_layer(base_map, view).copy()
+            if overlay: frame.alpha_composite(overlay, dest=position)
+            after.append(time.perf_counter() - start)
+
+        # The first cached frame pays for the base layer once
+        start = time.perf_counter()
+        render_base_layer(base_map, view)
+        base_cost = time.perf_counter() - start
+
+        results.append({
+            'size': f'{width}x{height}', 'zoom': zoom,
+            'before': summarize(before), 'after': summarize(after),
+            'base_layer_ms': base_cost * 1000
+        })
+
+    lr.Log.table(
+        ['Size', 'Zoom', 'Before p50 ms', 'After p50 ms', 'Before p95 ms',
+         'After p95 ms', 'Base layer ms'],
+        [
+            (r['size'], f'{r["zoom"]:.1f}', f'{r["before"]["p50_ms"]:.2f}',
+             f'{r["after"]["p50_ms"]:.2f}', f'{r["before"]["p95_ms"]:.2f}',
+             f'{r["after"]["p95_ms"]:.2f}', f'{r["base_layer_ms"]:.2f}')
+            for r in results
+        ],
+        table_name='Grid Layer Composite Cost'
+    )
+
+    if args.json:
+        write_json(args.json, { 'grid_layer': results })
+
+if __name__ == '__main__': main()
@@ -0,0 +1,132 @@
+from concurrent.futures import ThreadPoolExecutor
+import argparse, tracemalloc, time, sys
+from pathlib import Path
+import loggerric as lr
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from benchmarks.je_fixtures import FixtureServer, SCENARIOS
+from benchmarks.common import summarize, write_json
+from shared.je_fetching import Observer
+
+def drive_observer(observer:Observer, fetches:int) -> dict:
+    """
+    **Run the full fetch, parse and delta path of one observer repeatedly.**
+
+    *Parameters*:
+    - `observer` (Observer): The observer pointed at the fixture server.
+    - `fetches` (int): How many times to fetch.
+
+    *Returns*:
+    - (dict): Latencies in seconds and result counters.
+    """
+    latencies = []
+    results = { 'parsed': 0, 'empty': 0, 'errors': 0 }
+
+    for _ in range(fetches):
+        start = time.perf_counter()
+        try:
+            data = observer.fetch()
+        except Exception:
+            results['errors'] += 1
+            continue
+        finally:
+            latencies.append(time.perf_counter() - start)
+
+        results['parsed' if data else 'empty'] += 1
+
+    return { 'latencies': latencies } | results
+
+def run_scenario(server:FixtureServer, scenario:str, observers:int,
+                 fetches:int) -> dict:
+    """
+    **Drive N observers concurrently against one fixture scenario.**
+
+    *Parameters*:
+    - `server` (FixtureServer): The running fixture server.
+    - `scenario` (str): The scenario to fetch from.
+    - `observers` (int): Amount of concurrent observers.
+    - `fetches` (int): Fetches per observer.
+
+    *Returns*:
+    - (dict): Throughput, latency summary, counters and peak memory.
+    """
+    clients = [
+        Observer(je_cookie='fixture', user_agent='je-benchmark',
+                 base_url=server.url(scenario))
+        for _ in range(observers)
+    ]
+
+    tracemalloc.start()
+    start = time.perf_counter()
+
+    with ThreadPoolExecutor(max_workers=observers) as pool:
+        runs = list(pool.map(lambda o: drive_observer(o, fetches), clients))
+
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    latencies = [lat for run in runs for lat in run['latencies']]
+
+    return {
+        'scenario': scenario,
+        'observers': observers,
+        'fetches': observers * fetches,
+        'throughput_per_sec': len(latencies) / elapsed if elapsed else 0.0,
+        'latency': summarize(latencies),
+        'parsed': sum(run['parsed'] for run in runs),
+        'empty': sum(run['empty'] for run in runs),
+        'errors': sum(run['errors'] for run in runs),
+        'peak_memory_kib': peak / 1024
+    }
+
+def main():
+    """
+    **Main entrypoint.**
+    """
+    parser = argparse.ArgumentParser(
+        description='Benchmark the JE fetch, parse and delta pipeline against '
+                    + 'an offline fixture server.'
+    )
+    parser.add_argument('--observers', type=int, default=8)
+    parser.add_argument('--fetches', type=int, default=25,
+                        help='Fetches per observer.')
+    parser.add_argument('--scenarios', nargs='+', default=SCENARIOS)
+    parser.add_argument('--pages-dir', default=None,
+                        help='Directory of recorded <scenario>.html pages.')
+    parser.add_argument('--slow-delay', type=float, default=0.05)
+    parser.add_argument('--json', default=None, help='Write results to file.')
+    args = parser.parse_args()
+
+    with FixtureServer(pages_dir=args.pages_dir,
+                       slow_delay_sec=args.slow_delay) as server:
+        scenarios = args.scenarios + [
+            s for s in server.recorded if s not in args.scenarios
+        ]
+
+        results = [
+            run_scenario(server, scenario, args.observers, args.fetches)
+            for scenario in scenarios
+        ]
+
+    lr.Log.table(
+        ['Scenario', 'Fetch/s', 'p50 ms', 'p95 ms', 'p99 ms', 'Parsed',
+         'Empty', 'Errors', 'Peak KiB'],
+        [
+            (r['scenario'], f'{r["throughput_per_sec"]:.1f}',
+             f'{r["latency"]["p50_ms"]:.2f}', f'{r["latency"]["p95_ms"]:.2f}',
+             f'{r["latency"]["p99_ms"]:.2f}', str(r['parsed']),
+             str(r['empty']), str(r['errors']),
+             f'{r["peak_memory_kib"]:.0f}')
+            for r in results
+        ],
+        table_name='JE Fetch Benchmark'
+    )
+
+    if args.json:
+        write_json(args.json, { 'je_fetching': results })
+
+if __name__ == '__main__': main()
@@ -0,0 +1,237 @@
+from aiohttp import web
+from pathlib import Path
+import threading, asyncio
+import loggerric as lr
+
+PLAYER_PAGE = '''<!DOCTYPE html>
+<html>
+<body>
+{headings}
+<div class="mt-1 text-base font-medium">{balance}</div>
+<div class="grid grid-cols-1 md:grid-cols-2 gap-5">{rows}</div>
+</body>
+</html>'''
+
+HEADING = '<div class="mt-1 text-2xl font-semibold">{text}</div>'
+
+STAT_ROW = '''
+<div>
+<div class="text-xs uppercase tracking-wide text-gray-300/80">{label}</div>
+<div class="mt-1 text-base font-medium">{percent}%</div>
+</div>'''
+
+LOGGED_OUT_PAGE = '''<!DOCTYPE html>
+<html>
+<body>
+<form action="/login" method="post"><button>Login with Discord</button></form>
+</body>
+</html>'''
+
+# Truncated markup with an unparsable percentage
+MALFORMED_PAGE = '''<!DOCTYPE html>
+<html><body>
+<div class="mt-1 text-2xl font-semibold">Fixture
+<div class="grid grid-cols-1 md:grid-cols-2 gap-5">
+<div><div class="text-xs uppercase tracking-wide text-gray-300/80">Growth</div>
+<div class="mt-1 text-base font-medium">N/A%</div>
+<div><div class="text-xs uppercase tracking-wide text-gray-300/80">Hunger'''
+
+SCENARIOS = ['ok', 'logged-out', 'partial', 'malformed', 'slow', 'flaky']
+
+class FixtureServer:
+    """
+    **Local stand-in for the Jurassic Echoes website.**
+
+    Serves synthetic or recorded player pages on `/<scenario>/player` from a
+    background thread, so `Observer` can be pointed at it with
+    `base_url=server.url(scenario)`.
+
+    *Scenarios*:
+    - `ok`: A valid player page whose stats drift on every request.
+    - `logged-out`: A login page without the stat grid.
+    - `partial`: Only some stats and a single species heading.
+    - `malformed`: Truncated markup with unparsable values.
+    - `slow`: A valid page served after `slow_delay_sec`.
+    - `flaky`: Valid pages interrupted by bursts of 503 responses.
+    - Any `<name>.html` in `pages_dir` is served as the recorded scenario
+    `<name>`.
+
+    *Methods*:
+    - `start() -> None`: Start serving in a background thread.
+    - `stop() -> None`: Stop serving and join the thread.
+    - `url(scenario) -> str`: The base URL to hand to an `Observer`.
+    """
+    def __init__(self, host:str='127.0.0.1', port:int=0,
+                 pages_dir:str=None, slow_delay_sec:float=0.5,
+                 burst_every:int=10, burst_length:int=3):
+        """
+        **Initializer.**
+
+        *Parameters*:
+        - `host` (str): Interface to bind to. Defaults to localhost.
+        - `port` (int): Port to bind to, 0 picks a free port.
+        - `pages_dir` (str): Directory of recorded `.html` pages. Optional.
+        - `slow_delay_sec` (float): Response delay of the `slow` scenario.
+        - `burst_every` (int): Requests between 5xx bursts of `flaky`.
+        - `burst_length` (int): Length of each 5xx burst of `flaky`.
+        """
+        self.host = host
+        self.port = port
+        self.slow_delay_sec = slow_delay_sec
+        self.burst_every = burst_every
+        self.burst_length = burst_length
+
+        self.recorded:dict[str, str] = {}
+        if pages_dir:
+            for page in Path(pages_dir).glob('*.html'):
+                self.recorded[page.stem] = page.read_text(encoding='utf-8')
+
+        self.hits:dict[str, int] = {}
+
+        self.__loop:asyncio.AbstractEventLoop = None
+        self.__runner:web.AppRunner = None
+        self.__thread:threading.Thread = None
+        self.__ready = threading.Event()
+
+    def __player_page(self, hit:int, labels:list[str]=None,
+                      species:str='Ceratosaurus') -> str:
+        """
+        **Build a synthetic player page whose values drift with the hit count.**
+
+        *Parameters*:
+        - `hit` (int): How many times the scenario has been requested.
+        - `labels` (list[str]): The stats to include. Defaults to all.
+        - `species` (str): The species heading, `None` leaves it out.
+
+        *Returns*:
+        - (str): The HTML page.
+        """
+        values = {
+            'Growth': min(100.0, 20.0 + hit * 0.5),
+            'Health': min(100.0, 60.0 + hit * 0.25),
+            'Hunger': max(0.0, 90.0 - hit * 0.75),
+            'Thirst': max(0.0, 80.0 - hit * 1.0)
+        }
+
+        rows = ''.join(
+            STAT_ROW.format(label=label, percent=f'{values[label]:.1f}')
+            for label in (labels or values.keys())
+        )
+
+        headings = '\n'.join(
+            HEADING.format(text=text)
+            for text in ['Fixture Player', species] if text
+        )
+
+        return PLAYER_PAGE.format(headings=headings, balance=1000 + hit,
+                                  rows=rows)
+
+    async def __handle_player(self, request:web.Request) -> web.Response:
+        """
+        **Serve the player page of a scenario.**
+
+        *Parameters*:
+        - `request` (web.Request): The incoming request.
+
+        *Returns*:
+        - (web.Response): The scenario's response.
+        """
+        scenario = request.match_info['scenario']
+        hit = self.hits.get(scenario, 0)
+        self.hits[scenario] = hit + 1
+
+        if scenario in self.recorded:
+            return web.Response(text=self.recorded[scenario],
+                                content_type='text/html')
+
+        match scenario:
+            case 'ok':
+                page = self.__player_page(hit)
+            case 'logged-out':
+                page = LOGGED_OUT_PAGE
+            case 'partial':
+                page = self.__player_page(hit, ['Growth', 'Hunger'], None)
+            case 'malformed':
+                page = MALFORMED_PAGE
+            case 'slow':
+                await asyncio.sleep(self.slow_delay_sec)
+                page = self.__player_page(hit)
+            case 'flaky':
+                if hit % self.burst_every < self.burst_length:
+                    return web.Response(status=503,
+                                        reason='Service Unavailable')
+                page = self.__player_page(hit)
+            case _:
+                raise web.HTTPNotFound()
+
+        return web.Response(text=page, content_type='text/html')
+
+    async def __serve(self):
+        """
+        **Set up the web application and bind the socket.**
+        """
+        app = web.Application()
+        app.router.add_get('/{scenario}/player', self.__handle_player)
+
+        self.__runner = web.AppRunner(app, access_log=None)
+        await self.__runner.setup()
+
+        site = web.TCPSite(self.__runner, self.host, self.port)
+        await site.start()
+
+        # Resolve the actual port when binding to port 0
+        self.port = self.__runner.addresses[0][1]
+
+    def __run(self):
+        """
+        **Called by a thread. Runs the event loop until stopped.**
+        """
+        self.__loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.__loop)
+
+        self.__loop.run_until_complete(self.__serve())
+        self.__ready.set()
+
+        self.__loop.run_forever()
+
+        self.__loop.run_until_complete(self.__runner.cleanup())
+        self.__loop.close()
+
+    def start(self):
+        """
+        **Start serving in a background thread.**
+        """
+        self.__thread = threading.Thread(target=self.__run, daemon=True)
+        self.__thread.start()
+        self.__ready.wait()
+
+        lr.Log.debug(f'JE fixture server listening on {self.host}:{self.port}')
+
+    def stop(self):
+        """
+        **Stop serving and join the thread.**
+        """
+        if not self.__thread: return
+
+        self.__loop.call_soon_threadsafe(self.__loop.stop)
+        self.__thread.join()
+        self.__thread = None
+
+    def url(self, scenario:str) -> str:
+        """
+        **The base URL to hand to an `Observer`.**
+
+        *Parameters*:
+        - `scenario` (str): The scenario to serve.
+
+        *Returns*:
+        - (str): Base URL ending in a slash.
+        """
+        return f'http://{self.host}:{self.port}/{scenario}/'
+
+    def __enter__(self) -> 'FixtureServer':
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
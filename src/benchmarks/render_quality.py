@@ -0,0 +1,71 @@
+from PIL import Image
+import argparse, time, sys
+from pathlib import Path
+import loggerric as lr
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from benchmarks.common import summarize, write_json
+from benchmarks.grid_layer import BOUNDS, random_trails
+from client.rendering import render_scaled_image
+from client.map_cache import MapPyramid
+
+MODES = {
+    'nearest': Image.Resampling.NEAREST,
+    'bilinear': Image.Resampling.BILINEAR,
+    'lanczos': Image.Resampling.LANCZOS
+}
+
+def main():
+    """
+    **Main entrypoint.**
+    """
+    parser = argparse.ArgumentParser(
+        description='Frame times of the interactive and full quality render '
+                    + 'modes while sweeping the zoom like a mouse wheel does.'
+    )
+    parser.add_argument('--map', default='TheIsleMap_Jan2026.png')
+    parser.add_argument('--frames', type=int, default=40)
+    parser.add_argument('--json', default=None, help='Write results to file.')
+    args = parser.parse_args()
+
+    base_image = Image.open(ROOT / 'client' / 'maps' / args.map)
+    trails = random_trails(6, 16)
+
+    results = []
+    for width, height in [(1280, 720), (1920, 1080)]:
+        for mode, resample in MODES.items():
+            # Fresh pyramid so no scaled size is served from its LRU
+            base_map = MapPyramid(base_image)
+
+            samples = []
+            for frame in range(args.frames):
+                zoom = 1.0 + 2.0 * frame / max(1, args.frames - 1)
+
+                start = time.perf_counter()
+                render_scaled_image(base_map, width, height, trails, zoom,
+                                    (0, 0), {}, BOUNDS, resample=resample)
+                samples.append(time.perf_counter() - start)
+
+            results.append({
+                'size': f'{width}x{height}', 'mode': mode,
+                'frame': summarize(samples)
+            })
+
+    lr.Log.table(
+        ['Size', 'Mode', 'Mean ms', 'p50 ms', 'p95 ms', 'Max ms'],
+        [
+            (r['size'], r['mode'], f'{r["frame"]["mean_ms"]:.2f}',
+             f'{r["frame"]["p50_ms"]:.2f}', f'{r["frame"]["p95_ms"]:.2f}',
+             f'{r["frame"]["max_ms"]:.2f}')
+            for r in results
+        ],
+        table_name='Render Quality Frame Times'
+    )
+
+    if args.json:
+        write_json(args.json, { 'render_quality': results })
+
+if __name__ == '__main__': main()
@@ -0,0 +1,424 @@
+from typing import Callable
+from PIL import Image
+import argparse, subprocess, itertools, json, random, time, sys
+from pathlib import Path
+import loggerric as lr
+
+# Peak RSS is only available on Unix, memory is not measured elsewhere
+try:
+    import resource
+except ImportError:
+    resource = None
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from benchmarks.common import summarize, write_json
+from benchmarks.grid_layer import BOUNDS, random_trails
+from client.rendering import render_scaled_image, RenderCache
+from client.map_cache import MapPyramid
+from client.tiles import TileCache
+
+def uncached_path(map_path:Path, workers:int) -> tuple[Callable, Callable]:
+    """
+    **Every frame rendered from scratch, without a render cache.**
+
+    *Parameters*:
+    - `map_path` (Path): The map to render.
+    - `workers` (int): Band resampling threads.
+
+    *Returns*:
+    - (tuple[Callable, Callable]): Renders a frame from `(width, height,
+    trails, zoom, pan)`, and stops the map's threads once done.
+    """
+    base_map = MapPyramid(Image.open(map_path), workers=workers)
+
+    def render(width:int, height:int, trails:dict, zoom:float,
+               pan:tuple[int, int]) -> Image.Image:
+        """
+        **Render one frame.**
+        """
+        return render_scaled_image(base_map, width, height, trails, zoom,
+                                   pan, {}, BOUNDS)
+
+    return render, base_map.close
+
+def cached_path(map_path:Path, workers:int) -> tuple[Callable, Callable]:
+    """
+    **Frames rendered through a render cache, like the client does.**
+
+    *Parameters*:
+    - `map_path` (Path): The map to render.
+    - `workers` (int): Band resampling threads.
+
+    *Returns*:
+    - (tuple[Callable, Callable]): Renders a frame from `(width, height,
+    trails, zoom, pan)`, and stops the map's threads once done.
+    """
+    base_map = MapPyramid(Image.open(map_path), workers=workers)
+    cache = RenderCache()
+
+    def render(width:int, height:int, trails:dict, zoom:float,
+               pan:tuple[int, int]) -> Image.Image:
+        """
+        **Render one frame.**
+        """
+        return render_scaled_image(base_map, width, height, trails, zoom,
+                                   pan, {}, BOUNDS, cache)
+
+    return render, base_map.close
+
+def tiled_path(map_path:Path, workers:int) -> tuple[Callable, Callable]:
+    """
+    **Frames rendered from lazily loaded tiles through a render cache, like
+    the client does with `tiled` enabled.**
+
+    *Parameters*:
+    - `map_path` (Path): The map to render, its tiles are generated next to
+    it when missing.
+    - `workers` (int): Band resampling threads.
+
+    *Returns*:
+    - (tuple[Callable, Callable]): Renders a frame from `(width, height,
+    trails, zoom, pan)`, and stops the map's threads once done.
+    """
+    base_map = TileCache(map_path, workers=workers)
+    cache = RenderCache()
+
+    def render(width:int, height:int, trails:dict, zoom:float,
+               pan:tuple[int, int]) -> Image.Image:
+        """
+        **Render one frame.**
+        """
+        return render_scaled_image(base_map, width, height, trails, zoom,
+                                   pan, {}, BOUNDS, cache)
+
+    return render, base_map.close
+
+# Render paths to measure, new paths only need an entry here
+RENDER_PATHS:dict[str, Callable[[Path, int], tuple[Callable, Callable]]] = {
+    'uncached': uncached_path,
+    'cached': cached_path,
+    'tiled': tiled_path
+}
+
+def parse_pan(value:str) -> tuple[int, int]:
+    """
+    **Parse an `x,y` pan.**
+
+    *Parameters*:
+    - `value` (str): The pan.
+
+    *Returns*:
+    - (tuple[int, int]): Horizontal and vertical pan in pixels.
+    """
+    try:
+        x, y = (int(v) for v in value.split(','))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f'Expected x,y, got "{value}"')
+
+    return x, y
+
+def frame_updates(players:int, points:int,
+                  frames:int) -> list[dict[str, list[tuple]]]:
+    """
+    **Trail states of consecutive frames, one player moving per frame.**
+
+    *Parameters*:
+    - `players` (int): Amount of players.
+    - `points` (int): Points per player.
+    - `frames` (int): Amount of frames.
+
+    *Returns*:
+    - (list[dict[str, list[tuple]]]): The trails of every frame.
+    """
+    trails = random_trails(players, points)
+    colors = list(trails)
+
+    updates = []
+    for frame in range(frames):
+        color = colors[frame % len(colors)]
+        trails = trails | { color: trails[color][1:] + [(
+            random.uniform(-600, 500), random.uniform(-500, 600)
+        )] }
+        updates.append(trails)
+
+    return updates
+
+def case_key(case:dict) -> str:
+    """
+    **A stable name of a case, used to match it against a baseline.**
+
+    *Parameters*:
+    - `case` (dict): The case parameters.
+
+    *Returns*:
+    - (str): The key.
+    """
+    return ('{path}|{map}|{size}|zoom={zoom}|pan={pan[0]},{pan[1]}'
+            + '|players={players}|points={points}|workers={workers}'
+            ).format(**case)
+
+def render_frames(render:Callable, case:dict,
+                  frames:int) -> list[float]:
+    """
+    **Render the frames of one case, timing each.**
+
+    *Parameters*:
+    - `render` (Callable): The render path, prepared for the case's map.
+    - `case` (dict): The case parameters.
+    - `frames` (int): Amount of measured frames.
+
+    *Returns*:
+    - (list[float]): Frame times in seconds.
+    """
+    width, height = (int(v) for v in case['size'].split('x'))
+    updates = frame_updates(case['players'], case['points'], frames + 1)
+
+    # The first frame warms caches the same way the client's first frame does
+    render(width, height, updates[0], case['zoom'], case['pan'])
+
+    samples = []
+    for trails in updates[1:]:
+        start = time.perf_counter()
+        render(width, height, trails, case['zoom'], case['pan'])
+        samples.append(time.perf_counter() - start)
+
+    return samples
+
+def run_case(render:Callable, case:dict, frames:int) -> dict:
+    """
+    **Render the frames of one case and measure their times.**
+
+    *Parameters*:
+    - `render` (Callable): The render path, prepared for the case's map.
+    - `case` (dict): The case parameters.
+    - `frames` (int): Amount of measured frames.
+
+    *Returns*:
+    - (dict): The case and its frame latency summary.
+    """
+    return case | {
+        'key': case_key(case),
+        'frame': summarize(render_frames(render, case, frames))
+    }
+
+def peak_rss_kib() -> int:
+    """
+    **Peak resident memory of this process, since the last
+    `reset_peak_rss` where possible.**
+
+    *Returns*:
+    - (int): The peak in KiB.
+    """
+    try:
+        with open('/proc/self/status', 'r') as file:
+            return next(int(line.split()[1]) for line in file
+                        if line.startswith('VmHWM:'))
+    except (OSError, StopIteration):
+        pass
+
+    # Lifetime peak elsewhere, reported in bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == 'darwin' else peak
+
+def reset_peak_rss():
+    """
+    **Restart the peak from the current RSS, only possible on Linux.**
+    """
+    try:
+        with open('/proc/self/clear_refs', 'w') as file:
+            file.write('5')
+    except OSError:
+        pass
+
+def measure_memory(case:dict, frames:int, seed:int) -> int:
+    """
+    **Peak RSS growth of one case, rendered in a fresh process.**
+
+    Pillow's pixel buffers live outside the Python heap and a process' peak
+    RSS never goes down, so every case gets its own process.
+
+    *Parameters*:
+    - `case` (dict): The case parameters.
+    - `frames` (int): Amount of rendered frames.
+    - `seed` (int): Seed of the trails.
+
+    *Returns*:
+    - (int): KiB the peak grew by while rendering, None if unavailable.
+    """
+    if not resource: return None
+
+    process = subprocess.run(
+        [sys.executable, '-m', 'benchmarks.render_suite', '--memory-case',
+         json.dumps(case), '--frames', str(frames), '--seed', str(seed)],
+        cwd=ROOT, capture_output=True, text=True
+    )
+    if process.returncode != 0:
+        lr.Log.warn(f'Memory pass of "{case_key(case)}" failed: '
+                    + ''.join(process.stderr.strip().splitlines()[-1:]))
+        return None
+
+    return json.loads(process.stdout.strip().splitlines()[-1])
+
+def memory_case(case:dict, frames:int):
+    """
+    **Render one case and print how much the peak RSS grew, run by
+    `measure_memory` in a fresh process.**
+
+    *Parameters*:
+    - `case` (dict): The case parameters.
+    - `frames` (int): Amount of rendered frames.
+    """
+    case['pan'] = tuple(case['pan'])
+    render, close = RENDER_PATHS[case['path']](
+        ROOT / 'client' / 'maps' / case['map'], case['workers']
+    )
+
+    # Loading the map is not part of the render path's footprint
+    reset_peak_rss()
+    before = peak_rss_kib()
+    render_frames(render, case, frames)
+    close()
+
+    print(json.dumps(max(0, peak_rss_kib() - before)))
+
+def compare(results:list[dict], baseline_path:str,
+            tolerance:float) -> list[tuple]:
+    """
+    **Find cases whose p95 frame time regressed against a baseline.**
+
+    *Parameters*:
+    - `results` (list[dict]): The measured cases.
+    - `baseline_path` (str): JSON written by an earlier run with `--json`.
+    - `tolerance` (float): Allowed relative slowdown, 0.2 is 20%.
+
+    *Returns*:
+    - (list[tuple]): Key, baseline p95 and current p95 of every regression.
+    """
+    with open(baseline_path, 'r') as file:
+        baseline = {
+            case['key']: case for case in json.load(file)['render_suite']
+        }
+
+    regressions = []
+    for result in results:
+        before = baseline.get(result['key'])
+        if not before: continue
+
+        before_p95 = before['frame']['p95_ms']
+        after_p95 = result['frame']['p95_ms']
+        if after_p95 > before_p95 * (1 + tolerance):
+            regressions.append((result['key'], before_p95, after_p95))
+
+    return regressions
+
+def main():
+    """
+    **Main entrypoint.**
+    """
+    parser = argparse.ArgumentParser(
+        description='Headless frame times of every render path over a matrix '
+                    + 'of maps, window sizes, zooms, pans, player counts and '
+                    + 'trail lengths.'
+    )
+    parser.add_argument('--paths', nargs='+', default=list(RENDER_PATHS),
+                        choices=list(RENDER_PATHS))
+    parser.add_argument('--maps', nargs='+', default=None,
+                        help='Map filenames, defaults to all bundled maps.')
+    parser.add_argument('--sizes', nargs='+',
+                        default=['1280x720', '1920x1080'])
+    parser.add_argument('--zooms', nargs='+', type=float, default=[1.0, 3.0])
+    parser.add_argument('--pans', nargs='+', type=parse_pan,
+                        default=[(0, 0), (400, -300)], help='x,y pixels.')
+    parser.add_argument('--players', nargs='+', type=int, default=[1, 12])
+    parser.add_argument('--points', nargs='+', type=int, default=[16, 256])
+    parser.add_argument('--workers', nargs='+', type=int, default=[1],
+                        help='Band resampling threads, e.g. 1 2 4 8.')
+    parser.add_argument('--frames', type=int, default=10)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', default=None, help='Write results to file.')
+    parser.add_argument('--baseline', default=None,
+                        help='Compare against results written with --json.')
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help='Allowed p95 slowdown against the baseline.')
+    parser.add_argument('--no-memory', action='store_true',
+                        help='Skip the per case memory pass.')
+    parser.add_argument('--memory-case', default=None,
+                        help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+
+    if args.memory_case:
+        memory_case(json.loads(args.memory_case), args.frames)
+        return
+
+    map_dir = ROOT / 'client' / 'maps'
+    map_names = args.maps or sorted(
+        path.name for path in map_dir.glob('*.*')
+    )
+
+    results = []
+    for map_name, workers in itertools.product(map_names, args.workers):
+        for path in args.paths:
+            render, close = RENDER_PATHS[path](map_dir / map_name, workers)
+
+            for size, zoom, pan, players, points in itertools.product(
+                args.sizes, args.zooms, args.pans, args.players, args.points
+            ):
+                case = {
+                    'path': path, 'map': map_name, 'size': size,
+                    'zoom': zoom, 'pan': pan, 'players': players,
+                    'points': points, 'workers': workers
+                }
+                results.append(run_case(render, case, args.frames))
+
+            close()
+
+    # Measured apart from the timed frames, which it would slow down
+    for result in results:
+        case = { key: result[key] for key in ('path', 'map', 'size', 'zoom',
+                                              'pan', 'players', 'points',
+                                              'workers') }
+        result['peak_rss_growth_kib'] = (
+            None if args.no_memory
+            else measure_memory(case, args.frames, args.seed)
+        )
+
+    lr.Log.table(
+        ['Path', 'Map', 'Size', 'Zoom', 'Pan', 'Players', 'Points',
+         'Workers', 'p50 ms', 'p95 ms', 'p99 ms', 'Peak +KiB'],
+        [
+            (r['path'], r['map'], r['size'], f'{r["zoom"]:.1f}',
+             f'{r["pan"][0]},{r["pan"][1]}', str(r['players']),
+             str(r['points']), str(r['workers']),
+             f'{r["frame"]["p50_ms"]:.2f}', f'{r["frame"]["p95_ms"]:.2f}',
+             f'{r["frame"]["p99_ms"]:.2f}',
+             '-' if r['peak_rss_growth_kib'] is None
+             else str(r['peak_rss_growth_kib']))
+            for r in results
+        ],
+        table_name='Render Suite Frame Times'
+    )
+
+    if args.json:
+        write_json(args.json, { 'render_suite': results })
+
+    if not args.baseline: return
+
+    regressions = compare(results, args.baseline, args.tolerance)
+    if not regressions:
+        lr.Log.info('No regressions against the baseline.')
+        return
+
+    lr.Log.table(
+        ['Case', 'Baseline p95 ms', 'Current p95 ms'],
+        [(key, f'{before:.2f}', f'{after:.2f}')
+         for key, before, after in regressions],
+        table_name='Regressions'
+    )
+    sys.exit(1)
+
+if __name__ == '__main__': main()
@@ -0,0 +1,251 @@
+from collections import Counter, defaultdict
+import argparse, asyncio, random, json, time, sys
+from pathlib import Path
+import loggerric as lr
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from benchmarks.common import summarize, write_json
+from benchmarks.grid_layer import BOUNDS
+from server.recorder import RECORDING_FORMAT
+import server.main as server
+
+def load_recording(path:str) -> list[list]:
+    """
+    **Read a recording written by the server.**
+
+    *Parameters*:
+    - `path` (str): The recording.
+
+    *Returns*:
+    - (list[list]): `[offset_ms, event, client_id, args]` of every event.
+    """
+    with open(path, 'r', encoding='utf-8') as file:
+        header:dict = json.loads(file.readline())
+        if header.get('format') != RECORDING_FORMAT:
+            raise ValueError('Unsupported recording format {}!'.format(
+                header.get('format')
+            ))
+
+        return [json.loads(line) for line in file if line.strip()]
+
+class EmitMeter:
+    """
+    **Stands in for the server's emits, counting messages and bytes per
+    event and keeping the newest broadcast map.**
+
+    *Methods*:
+    - `emit(event, data, to) -> None`: Count one emit.
+    - `disconnect(client_id) -> None`: Ignore a disconnect by the server.
+    - `take_map() -> tuple`: The map broadcast since the last call.
+    """
+    def __init__(self):
+        """
+        **Initializer.**
+        """
+        self.messages:Counter[str] = Counter()
+        self.bytes:Counter[str] = Counter()
+        self.__map:tuple = None
+
+    async def emit(self, event:str, data=None, to:str=None, **_):
+        """
+        **Count one emit, a broadcast counts once per connected client.**
+
+        *Parameters*:
+        - `event` (str): The event name.
+        - `data` (Any): The payload.
+        - `to` (str): The receiving client, everyone if missing.
+        """
+        size = len(json.dumps(data, separators=(',', ':')))
+        recipients = 1 if to else max(1, len(server.client_cache))
+
+        self.messages[event] += recipients
+        self.bytes[event] += size * recipients
+
+        if event == 'update-map': self.__map = data
+
+    async def disconnect(self, *_, **__):
+        """
+        **Ignore a disconnect by the server, the recording holds the
+        client's own disconnect event.**
+        """
+
+    def take_map(self) -> tuple:
+        """
+        **The map broadcast since the last call.**
+
+        *Returns*:
+        - (tuple): Coordinates, pins and version, None if nothing was sent.
+        """
+        data, self.__map = self.__map, None
+        return data
+
+def make_renderer(map_name:str, size:str):
+    """
+    **Render broadcast maps like the client's raster path.**
+
+    *Parameters*:
+    - `map_name` (str): Map filename in `client/maps`.
+    - `size` (str): The window size, e.g. `1280x720`.
+
+    *Returns*:
+    - (Callable): Renders a `(coordinates, pins, version)` payload.
+    """
+    # Pillow is only needed when rendering
+    from client.rendering import render_scaled_image, RenderCache
+    from client.map_cache import MapPyramid
+    from PIL import Image
+
+    base_map = MapPyramid(Image.open(ROOT / 'client' / 'maps' / map_name))
+    width, height = (int(v) for v in size.split('x'))
+    cache = RenderCache()
+
+    def render(data:tuple):
+        """
+        **Render one frame.**
+        """
+        coordinate_map, pin_map = data[0], data[1]
+        render_scaled_image(base_map, width, height, {
+            color: [tuple(c) for c in coords]
+            for color, coords in coordinate_map.items()
+        }, 1.0, (0, 0), {
+            color: pin for color, pin in pin_map.items() if pin
+        }, BOUNDS, cache)
+
+    return render
+
+async def replay(events:list[list], speed:float, render=None) -> dict:
+    """
+    **Feed recorded events into the server's handlers.**
+
+    *Parameters*:
+    - `events` (list[list]): The recorded events.
+    - `speed` (float): Playback speed, 1 is real time and 0 as fast as
+    possible.
+    - `render` (Callable): Renders every broadcast map, skipped if missing.
+
+    *Returns*:
+    - (dict): Handler CPU per event, emit volume and render times.
+    """
+    meter = EmitMeter()
+    server.sio.emit = meter.emit
+    server.sio.disconnect = meter.disconnect
+
+    handler_cpu:defaultdict[str, list] = defaultdict(list)
+    render_times:list[float] = []
+
+    start = time.perf_counter()
+    for offset_ms, event, client_id, args in events:
+        handler = server.recorder.handlers.get(event)
+        if not handler:
+            lr.Log.warn(f'No handler for recorded event "{event}"!')
+            continue
+
+        if speed > 0:
+            wait = offset_ms / 1000 / speed - (time.perf_counter() - start)
+            if wait > 0: await asyncio.sleep(wait)
+
+        # Secrets are not recorded, the replay authenticates itself
+        if event == 'connect':
+            args[1]['password'] = server.CONFIG.get('password')
+
+        cpu_start = time.process_time()
+        await handler(client_id, *args)
+        handler_cpu[event].append(time.process_time() - cpu_start)
+
+        data = meter.take_map()
+        if render and data:
+            render_start = time.perf_counter()
+            render(data)
+            render_times.append(time.perf_counter() - render_start)
+
+    return {
+        'wall_sec': time.perf_counter() - start,
+        'handler_cpu': {
+            event: summarize(samples) for event, samples in handler_cpu.items()
+        },
+        'emits': {
+            event: { 'messages': meter.messages[event],
+                     'bytes': meter.bytes[event] }
+            for event in meter.messages
+        },
+        'render': summarize(render_times) if render else None
+    }
+
+def main():
+    """
+    **Main entrypoint.**
+    """
+    parser = argparse.ArgumentParser(
+        description='Replay a server event recording through the server '
+                    + 'handlers, measuring handler CPU time, emit volume and '
+                    + 'optionally client render times.'
+    )
+    parser.add_argument('recording', help='Recording in server/recordings.')
+    parser.add_argument('--speed', type=float, default=0,
+                        help='1 for real time, N for N times faster, 0 for '
+                             + 'as fast as possible.')
+    parser.add_argument('--render', action='store_true',
+                        help='Render every broadcast map like the client.')
+    parser.add_argument('--map', default=None,
+                        help='Map filename, defaults to the first bundled map.')
+    parser.add_argument('--size', default='1280x720')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', default=None, help='Write results to file.')
+    args = parser.parse_args()
+
+    # Colors are handed out randomly, seeding keeps replays identical
+    random.seed(args.seed)
+
+    events = load_recording(args.recording)
+    render = None
+    if args.render:
+        map_name = args.map or sorted(
+            path.name for path in (ROOT / 'client' / 'maps').glob('*.*')
+        )[0]
+        render = make_renderer(map_name, args.size)
+
+    results = asyncio.run(replay(events, args.speed, render))
+
+    duration_sec = events[-1][0] / 1000 if events else 0
+    lr.Log.info(f'Replayed {len(events)} events spanning {duration_sec:.1f}s '
+                + f'in {results["wall_sec"]:.2f}s!')
+
+    lr.Log.table(
+        ['Event', 'Calls', 'p50 ms', 'p95 ms', 'p99 ms', 'Max ms'],
+        [
+            (event, str(cpu['count']), f'{cpu["p50_ms"]:.3f}',
+             f'{cpu["p95_ms"]:.3f}', f'{cpu["p99_ms"]:.3f}',
+             f'{cpu["max_ms"]:.3f}')
+            for event, cpu in results['handler_cpu'].items()
+        ],
+        table_name='Handler CPU Time'
+    )
+    lr.Log.table(
+        ['Event', 'Messages', 'KiB'],
+        [
+            (event, str(emit['messages']), f'{emit["bytes"] / 1024:.1f}')
+            for event, emit in results['emits'].items()
+        ],
+        table_name='Emit Volume'
+    )
+
+    if results['render']:
+        frame = results['render']
+        lr.Log.table(
+            ['Frames', 'p50 ms', 'p95 ms', 'p99 ms', 'Max ms'],
+            [(str(frame['count']), f'{frame["p50_ms"]:.2f}',
+              f'{frame["p95_ms"]:.2f}', f'{frame["p99_ms"]:.2f}',
+              f'{frame["max_ms"]:.2f}')],
+            table_name='Render Times'
+        )
+
+    if args.json:
+        write_json(args.json, { 'replay': results | {
+            'recording': args.recording, 'speed': args.speed,
+            'events': len(events)
+        } })
+
+if __name__ == '__main__': main()
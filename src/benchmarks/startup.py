@@ -0,0 +1,93 @@
+from PIL import Image
+import argparse, shutil, tempfile, time, sys
+from pathlib import Path
+import loggerric as lr
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from benchmarks.common import summarize, write_json
+from benchmarks.grid_layer import BOUNDS, random_trails
+from client.rendering import render_scaled_image
+from client.map_cache import MapPyramid
+
+def first_frame(load) -> tuple[float, float]:
+    """
+    **Time loading the map and rendering the first frame.**
+
+    *Parameters*:
+    - `load` (Callable): Returns the map pyramid.
+
+    *Returns*:
+    - (tuple[float, float]): Seconds spent loading and in total.
+    """
+    start = time.perf_counter()
+    base_map = load()
+    loaded = time.perf_counter()
+
+    render_scaled_image(base_map, 1280, 720, random_trails(6, 16), 1.0,
+                        (0, 0), {}, BOUNDS)
+
+    return loaded - start, time.perf_counter() - start
+
+def main():
+    """
+    **Main entrypoint.**
+    """
+    parser = argparse.ArgumentParser(
+        description='Time-to-first-frame when decoding the map on launch '
+                    + 'against loading the memory-mapped decoded cache.'
+    )
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--json', default=None, help='Write results to file.')
+    args = parser.parse_args()
+
+    results = []
+    for map_path in sorted((ROOT / 'client' / 'maps').glob('*.*')):
+        cache_dir = Path(tempfile.mkdtemp(prefix='decoded-'))
+
+        try:
+            scenarios = {
+                'decode': lambda: MapPyramid(Image.open(map_path)),
+                'cold cache': lambda: MapPyramid.from_file(map_path,
+                                                           cache_dir),
+                'warm cache': lambda: MapPyramid.from_file(map_path,
+                                                           cache_dir)
+            }
+
+            for scenario, load in scenarios.items():
+                load_samples, total_samples = [], []
+                for _ in range(args.runs):
+                    # Cold runs start without a cache, warm runs reuse it
+                    if scenario == 'cold cache':
+                        shutil.rmtree(cache_dir, ignore_errors=True)
+
+                    load_time, total_time = first_frame(load)
+                    load_samples.append(load_time)
+                    total_samples.append(total_time)
+
+                results.append({
+                    'map': map_path.name, 'scenario': scenario,
+                    'load': summarize(load_samples),
+                    'first_frame': summarize(total_samples)
+                })
+        finally:
+            shutil.rmtree(cache_dir, ignore_errors=True)
+
+    lr.Log.table(
+        ['Map', 'Scenario', 'Load p50 ms', 'First frame p50 ms',
+         'First frame max ms'],
+        [
+            (r['map'], r['scenario'], f'{r["load"]["p50_ms"]:.2f}',
+             f'{r["first_frame"]["p50_ms"]:.2f}',
+             f'{r["first_frame"]["max_ms"]:.2f}')
+            for r in results
+        ],
+        table_name='Time To First Frame'
+    )
+
+    if args.json:
+        write_json(args.json, { 'startup': results })
+
+if __name__ == '__main__': main()
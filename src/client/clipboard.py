@@ -0,0 +1,256 @@
+from typing import Callable
+import threading, asyncio, ctypes, sys, re
+import loggerric as lr
+import tkinter as tk
+import pyperclip
+
+# Six comma separated numbers as copied ingame, the 1st and 3rd are kept
+NUMBER = r'\s*([-+]?(?:\d+(?:\.\d*)?|\.\d+)(?:[eE][-+]?\d+)?)\s*'
+COORDINATE_PATTERN = re.compile(','.join([NUMBER] * 6))
+
+def parse_coordinates(text:str) -> list[float]:
+    """
+    **Parse a copied ingame location.**
+
+    *Parameters*:
+    - `text` (str): The clipboard text.
+
+    *Returns*:
+    - (list[float]): The two map coordinates, or None if it is no location.
+    """
+    match = COORDINATE_PATTERN.fullmatch(text)
+    if not match: return None
+
+    return [float(match.group(1)), float(match.group(3))]
+
+class ClipboardSource:
+    """
+    **Reads the clipboard, the base is backed by pyperclip.**
+
+    *Attributes*:
+    - `needs_tk` (bool): Whether reads must happen on the Tk thread.
+    - `cheap_check` (bool): Whether `changed()` costs next to nothing, so it
+    can be polled at full speed without backing off.
+
+    *Methods*:
+    - `changed() -> bool`: Whether the clipboard may have changed.
+    - `read() -> str`: The clipboard text, empty if unavailable.
+    """
+    needs_tk = False
+    cheap_check = False
+
+    def changed(self) -> bool:
+        """
+        **Whether the clipboard may have changed since the last call.**
+
+        *Returns*:
+        - (bool): Always true, pyperclip can not tell without reading.
+        """
+        return True
+
+    def read(self) -> str:
+        """
+        **The clipboard text.**
+
+        *Returns*:
+        - (str): The text, empty if unavailable.
+        """
+        try:
+            return pyperclip.paste()
+        except Exception:
+            return ''
+
+class WindowsClipboard(ClipboardSource):
+    """
+    **Only reads once Windows reports a new clipboard sequence number.**
+
+    The sequence number is bumped by the system on every clipboard change,
+    so checking it is a single call and the clipboard itself is only opened
+    after an actual copy.
+    """
+    cheap_check = True
+
+    def __init__(self):
+        """
+        **Initializer.**
+        """
+        user32 = ctypes.windll.user32
+        self.__sequence_number = user32.GetClipboardSequenceNumber
+        self.__last_sequence = None
+
+    def changed(self) -> bool:
+        """
+        **Whether the clipboard sequence number moved since the last call.**
+
+        *Returns*:
+        - (bool): True after a copy.
+        """
+        sequence = self.__sequence_number()
+        if sequence == self.__last_sequence: return False
+
+        self.__last_sequence = sequence
+        return True
+
+class TkClipboard(ClipboardSource):
+    """
+    **Reads the clipboard through Tk, in process.**
+
+    Avoids the `xclip`/`xsel` subprocess pyperclip spawns per read on
+    Linux, at the cost of having to be polled from the Tk thread.
+    """
+    needs_tk = True
+
+    def __init__(self, root:tk.Misc):
+        """
+        **Initializer.**
+
+        *Parameters*:
+        - `root` (tk.Misc): Any widget of the Tk application.
+        """
+        self.__root = root
+
+    def read(self) -> str:
+        """
+        **The clipboard text.**
+
+        *Returns*:
+        - (str): The text, empty if the clipboard holds no text.
+        """
+        try:
+            return self.__root.clipboard_get()
+        except tk.TclError:
+            return ''
+
+def make_clipboard_source(root:tk.Misc) -> ClipboardSource:
+    """
+    **The cheapest clipboard source available on this platform.**
+
+    *Parameters*:
+    - `root` (tk.Misc): Any widget of the Tk application.
+
+    *Returns*:
+    - (ClipboardSource): The clipboard source.
+    """
+    if sys.platform == 'win32':
+        try:
+            return WindowsClipboard()
+        except (ImportError, AttributeError, OSError) as e:
+            lr.Log.warn(f'Falling back to polling the clipboard: {e}')
+    elif sys.platform.startswith('linux'):
+        return TkClipboard(root)
+
+    return ClipboardSource()
+
+class ClipboardWatcher:
+    """
+    **Watches a clipboard source for copied locations.**
+
+    Sources with a cheap change check are polled at the shortest interval.
+    Others back off while the clipboard stays the same and return to the
+    shortest interval right after it changes, so a burst of copies is
+    picked up quickly while idle polling stays rare.
+
+    *Methods*:
+    - `poll() -> float`: Check the clipboard once.
+    - `start(root) -> None`: Start polling on the Tk loop.
+    - `run() -> None`: Poll as an asyncio task until cancelled or stopped.
+    - `stop() -> None`: Stop polling.
+    """
+    def __init__(self, source:ClipboardSource,
+                 on_coordinates:Callable[[list[float]], None],
+                 min_interval:float=0.1, max_interval:float=0.5,
+                 backoff:float=1.5):
+        """
+        **Initializer.**
+
+        *Parameters*:
+        - `source` (ClipboardSource): The clipboard to watch.
+        - `on_coordinates` (Callable): Receives every newly copied location.
+        - `min_interval` (float): Seconds between polls after a change.
+        Defaults to 0.1.
+        - `max_interval` (float): Seconds between polls when idle. Defaults
+        to 0.5.
+        - `backoff` (float): Interval growth per idle poll. Defaults to 1.5.
+        """
+        self.__source = source
+        self.__on_coordinates = on_coordinates
+        self.__min_interval = min_interval
+        self.__max_interval = max_interval
+        self.__backoff = backoff
+
+        self.__interval = min_interval
+        self.__last_clip = ''
+        self.__stop = threading.Event()
+
+    def poll(self) -> float:
+        """
+        **Check the clipboard once, reporting a newly copied location.**
+
+        *Returns*:
+        - (float): Seconds to wait before the next poll.
+        """
+        clip = self.__last_clip
+        if self.__source.changed():
+            clip = self.__source.read().strip()
+
+        return self.__handle(clip)
+
+    def __handle(self, clip:str) -> float:
+        """
+        **Report the clipboard text if it is a newly copied location.**
+
+        *Parameters*:
+        - `clip` (str): The current clipboard text.
+
+        *Returns*:
+        - (float): Seconds to wait before the next poll.
+        """
+        if clip == self.__last_clip:
+            if not self.__source.cheap_check:
+                self.__interval = min(self.__max_interval,
+                                      self.__interval * self.__backoff)
+            return self.__interval
+
+        self.__last_clip = clip
+        self.__interval = self.__min_interval
+
+        coordinates = parse_coordinates(clip)
+        if coordinates: self.__on_coordinates(coordinates)
+
+        return self.__interval
+
+    def start(self, root:tk.Misc):
+        """
+        **Start polling on the Tk loop until stopped. Only for sources that
+        need the Tk thread, others are polled by `run()`.**
+
+        *Parameters*:
+        - `root` (tk.Misc): Any widget of the Tk application.
+        """
+        def tick():
+            """
+            **Poll once and reschedule on the Tk loop.**
+            """
+            if self.__stop.is_set(): return
+            root.after(int(self.poll() * 1000), tick)
+
+        root.after(0, tick)
+
+    async def run(self):
+        """
+        **Poll as an asyncio task until cancelled or stopped. Only for sources
+        that do not need the Tk thread. Reads happen on a worker thread, as
+        pyperclip blocks on a subprocess or the system clipboard.**
+        """
+        while not self.__stop.is_set():
+            clip = self.__last_clip
+            if self.__source.changed():
+                clip = (await asyncio.to_thread(self.__source.read)).strip()
+
+            await asyncio.sleep(self.__handle(clip))
+
+    def stop(self):
+        """
+        **Stop polling.**
+        """
+        self.__stop.set()
@@ -0,0 +1,133 @@
+from typing import Any, Callable
+from collections import OrderedDict
+import threading, math, time
+import loggerric as lr
+import tkinter as tk
+
+class TkDispatcher:
+    """
+    **Hands work from any thread to the Tk thread, coalesced per key.**
+
+    A post replaces the pending call of its key under a lock, only the
+    first post of a burst schedules a drain on the Tk thread, at most once
+    per frame. The drain runs every pending call together and does not
+    re-arm, so an idle GUI is never woken. A key posted again before the
+    drain keeps only its newest arguments, or the merge of both when a
+    merge function is given, so a burst of network events costs a single
+    render.
+
+    *Methods*:
+    - `start() -> None`: Start draining, must be called on the Tk thread.
+    - `post(key, callback, *args, merge) -> None`: Queue a call.
+    - `stop() -> None`: Drop pending calls and stop draining.
+    """
+    def __init__(self, widget:tk.Misc, max_fps:float=30.0):
+        """
+        **Initializer.**
+
+        *Parameters*:
+        - `widget` (tk.Misc): Any widget of the Tk application.
+        - `max_fps` (float): Most drains per second. Defaults to 30.
+        """
+        self.__widget = widget
+        self.__frame_ms = max(1, int(1000 / max_fps)) if max_fps > 0 else 1
+
+        self.__lock = threading.Lock()
+        self.__pending:OrderedDict[str, tuple[Callable, tuple]] = (
+            OrderedDict()
+        )
+        self.__started = False
+        self.__stopped = False
+        self.__scheduled = False
+        self.__last_drain = 0.0
+        self.__drain_job:str = None
+
+        self.coalesced = 0
+
+    def start(self):
+        """
+        **Start draining pending calls, must be called on the Tk thread.
+        Calls posted before are drained once the Tk loop runs.**
+        """
+        with self.__lock:
+            if self.__started or self.__stopped: return
+            self.__started = True
+            self.__scheduled = True
+
+        self.__drain_job = self.__widget.after(0, self.__drain)
+
+    def post(self, key:str, callback:Callable, *args:Any,
+             merge:Callable[[tuple, tuple], tuple]=None):
+        """
+        **Queue a call for the Tk thread, replacing a pending call of the
+        same key. Safe to call from any thread.**
+
+        *Parameters*:
+        - `key` (str): Calls of the same key coalesce.
+        - `callback` (Callable): Called on the Tk thread.
+        - `*args` (Any): Arguments of the call.
+        - `merge` (Callable): Combines the pending and new arguments, the new
+        ones replace the pending ones if missing.
+        """
+        with self.__lock:
+            if self.__stopped: return
+
+            if key in self.__pending:
+                self.coalesced += 1
+                if merge: args = merge(self.__pending[key][1], args)
+
+            # Re-posted keys move to the back, keeping calls in causal order
+            self.__pending[key] = (callback, args)
+            self.__pending.move_to_end(key)
+
+            if not self.__started or self.__scheduled: return
+            self.__scheduled = True
+
+            next_drain = self.__last_drain + self.__frame_ms / 1000
+            wait = next_drain - time.monotonic()
+
+        try:
+            self.__drain_job = self.__widget.after(
+                max(0, math.ceil(wait * 1000)), self.__drain
+            )
+        except (RuntimeError, tk.TclError):
+            # The window was closed
+            with self.__lock:
+                self.__scheduled = False
+
+    def __drain(self):
+        """
+        **Called by Tk after a post. Runs every pending call.**
+        """
+        with self.__lock:
+            if self.__stopped: return
+
+            calls = list(self.__pending.values())
+            self.__pending.clear()
+            self.__scheduled = False
+            self.__last_drain = time.monotonic()
+            self.__drain_job = None
+
+        for callback, args in calls:
+            try:
+                callback(*args)
+            except Exception as e:
+                lr.Log.error(f'Dispatched call failed: {e}')
+
+    def stop(self):
+        """
+        **Drop pending calls, ignore new ones and stop draining. Must be
+        called on the Tk thread.**
+        """
+        with self.__lock:
+            self.__stopped = True
+            self.__pending.clear()
+
+        if not self.__drain_job: return
+
+        try:
+            self.__widget.after_cancel(self.__drain_job)
+        except tk.TclError:
+            # The window was closed
+            pass
+        self.__drain_job = None
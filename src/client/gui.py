@@ -1,5 +1,5 @@
 from datetime import datetime as dt, timezone as tz
-import socketio, threading, time, sys
+import time, sys, os
 from PIL import Image, ImageTk
 from pathlib import Path
 from tkinter import ttk
@@ -19,9 +19,28 @@ if str(ROOT) not in sys.path:
 
 from shared.datastructs import Client, JurassicEchoes, Coord, deserialize_client
 from shared.je_fetching import Observer, get_sleep_time
-from client.rendering import render_scaled_image
+from client.rendering import (render_scaled_image, transform_frame,
+                              compute_view, RenderCache, TrailLOD)
+from client.render_worker import RenderWorker, RenderRequest
+from client.vector_overlay import VectorOverlay
+from client.heatmap import DensityHeatmap, np
+from client.playback import TrailHistory
+from client.reconnect import ConnectionRejected, Reconnector
+from client.dispatcher import TkDispatcher
+from client.runtime import SyncSocket
+from client.map_cache import MapPyramid
+from client.tiles import TileCache
 from shared.utils import get_exe_path
 
+# Pre-rendered border around the view, exposed instantly while panning
+PAN_MARGIN = 128
+
+# Idle time after panning or zooming before the map is re-rendered
+SETTLE_DELAY_MS = 50
+
+# Time between frames while playing back the trail history
+PLAYBACK_TICK_MS = 100
+
 class Gui(ttk.Frame):
     """
     **The GUI class.**
@@ -34,23 +53,100 @@ class Gui(ttk.Frame):
     - `render_map(coordinate_map) -> None`: Render the map and display it.
     - `set_status_text(text, bad) -> None`: Sets the status text.
     - `tgl_connect() -> None`: Toggle the server connection.
+    - `connection_lost() -> None`: Reconnect after an unexpected disconnect.
+    - `connection_rejected(reason) -> None`: Stop connecting after the server
+    refused the client.
     - `reset_coordinates() -> None`: Reset the clients own coordinates.
     """
-    def __init__(self, root:tk.Tk, sio:socketio.Client, config:dict):
+    def __init__(self, root:tk.Tk, sio:SyncSocket, config:dict,
+                 dispatcher:TkDispatcher):
         super().__init__(root)
 
         self.__sio = sio
         self.__config = config
 
+        # Connect attempts run on the runtime and post their outcome here
+        self.__dispatcher = dispatcher
+
+        # Last map state version seen, lets a reconnect fetch only changes
+        self.map_version:int = None
+
+        # Connections the user did not close are re-established automatically
+        online:dict = self.__config.get('online', {})
+        self.__want_connection = False
+        self.__reconnector = Reconnector(
+            sio.runtime, self.__connect,
+            online.get('reconnect_base_delay_sec', 1.0),
+            online.get('reconnect_max_delay_sec', 30.0)
+        )
+
+        # Why the server refused the last attempt, set on the runtime
+        self.__rejection:str = None
+
         self.__last_status_text_utc_ts = 0
 
         self.__render_job:str = None
+        self.__refine_job:str = None
         self.__tk_image:ImageTk.PhotoImage = None
         self.__canvas_image_id:int = None # GC Prevention
 
-        self.__base_image = Image.open(get_exe_path('client/maps/{}'.format(
-            self.__config.get('map', {}).get('filename')
-        )))
+        # Last full render, used to preview pans and zooms instantly
+        self.__frame:Image.Image = None
+        self.__frame_zoom = 1.0
+        self.__frame_pan = (0, 0)
+
+        map_config:dict = self.__config.get('map', {})
+        map_path = get_exe_path('client/maps/{}'.format(
+            map_config.get('filename')
+        ))
+
+        # Large resizes are split into bands resampled on this many threads
+        workers:int = map_config.get('render_threads',
+                                     min(4, os.cpu_count() or 1))
+
+        # Tiles keep memory flat for large maps and deep zoom levels
+        if map_config.get('tiled'):
+            self.__base_map = TileCache(map_path, workers=workers)
+        elif map_config.get('decoded_cache', True):
+            self.__base_map = MapPyramid.from_file(map_path, workers=workers)
+        else:
+            self.__base_map = MapPyramid(Image.open(map_path),
+                                         workers=workers)
+
+        self.__max_zoom:float = map_config.get('max_zoom', 3.0)
+        self.__refine_delay_ms:int = map_config.get('refine_delay_ms', 300)
+        self.__render_cache = RenderCache()
+        self.__trail_lod = TrailLOD(
+            min_pixel_distance=map_config.get('trail_min_pixel_distance', 2.0),
+            max_dots=map_config.get('trail_dot_budget', 64)
+        )
+
+        # Accumulated even while hidden, so toggling it on shows the history
+        self.__heatmap:DensityHeatmap = None
+        self.__show_heatmap:bool = map_config.get('heatmap', False)
+        if np is not None:
+            self.__heatmap = DensityHeatmap(
+                map_config.get('world_bounds'),
+                map_config.get('heatmap_resolution', 256),
+                map_config.get('heatmap_half_life_min', 60.0)
+            )
+        elif self.__show_heatmap:
+            lr.Log.warn('The heatmap requires NumPy, it is disabled!')
+
+        # Every map state is kept, so the timeline can scrub back through it
+        self.__history = TrailHistory(
+            keyframe_sec=map_config.get('playback_keyframe_sec', 60.0),
+            max_age_min=map_config.get('playback_history_min', 240.0)
+        )
+        self.__playback_speed:float = map_config.get('playback_speed', 30.0)
+        self.__trail_seqs:dict[str, tuple[int, int]] = {}
+        self.__playback_time:float = None
+        self.__playing = False
+        self.__playback_job:str = None
+
+        # PIL work happens on the worker, only PhotoImages on the Tk thread
+        self.__render_worker = RenderWorker(self.__render_frame,
+                                            self.__frame_rendered)
 
         self.__zoom = 1.0
         self.__pan_x = 0
@@ -70,6 +166,16 @@ class Gui(ttk.Frame):
         self.__add_widgets()
         self.update_player_list(disconnected=True)
 
+        # Vector mode keeps trails, pins and the grid as canvas items, so data
+        # updates edit items instead of re-uploading the map image
+        self.__vector_overlay:VectorOverlay = None
+        self.__overlay_data:tuple[dict, dict] = ({}, {})
+        self.__overlay_zoom = 1.0
+        self.__last_request_key:tuple = None
+        if map_config.get('overlay', 'raster') == 'vector':
+            self.__vector_overlay = VectorOverlay(self.__canvas,
+                                                  self.__trail_lod)
+
         self.after(500, self.__update_countdown)
 
     def __update_countdown(self):
@@ -348,13 +454,21 @@ class Gui(ttk.Frame):
                 )
 
     def render_map(self, coordinate_map:dict[str, list]=None,
-                   pin_map:dict[str, tuple]=None):
+                   pin_map:dict[str, tuple]=None,
+                   seq_map:dict[str, tuple]=None, fast:bool=False):
         """
         **Render the map and display it.**
+
+        Merges new data on the calling thread, the frame itself is rendered
+        by the render worker and displayed once finished.
         
         *Parameters*:
         - `coordinate_map` (dict[str, list]): The list of coordinates to render.
         - `pin_map` (dict[str, tuple]): The list of pins to render.
+        - `seq_map` (dict[str, tuple]): The `(seq, base)` trail arrival
+        counters, telling new points from repeated positions.
+        - `fast` (bool): Scale the map with a cheap filter, for frames shown
+        while interacting. Defaults to false.
         """
         width = self.__canvas_frame.winfo_width()
         height = self.__canvas_frame.winfo_height()
@@ -377,6 +491,17 @@ class Gui(ttk.Frame):
                     self.client_list[client_map[color]].coordinates = [Coord(
                         utc_timestamp=0, coordinates=(coord[0], coord[1])
                     ) for coord in coords]
+
+            # Re-renders without new data reuse the server's last counters,
+            # an older server sends none and is matched by content
+            self.__trail_seqs = dict(seq_map or {})
+
+        # Only the offline client counts its own points
+        seq_map = self.__trail_seqs | {
+            client_data.color: (client_data.trail_seq, client_data.trail_base)
+            for client_data in self.client_list.values()
+            if client_data.trail_seq
+        }
         
         if not pin_map:
             pin_map = {
@@ -393,29 +518,306 @@ class Gui(ttk.Frame):
                 if client_map.get(color):
                     self.client_list[client_map[color]].pin_position = pin
 
-        rendered = render_scaled_image(
-            self.__base_image, width, height, coordinate_map, self.__zoom,
-            (self.__pan_x, self.__pan_y), pin_map,
+        coordinate_map = {
+            color: list(coords) for color, coords in coordinate_map.items()
+        }
+        pin_map = dict(pin_map)
+        resample = (Image.Resampling.BILINEAR if fast
+                    else Image.Resampling.LANCZOS)
+
+        heatmap_version = None
+        if self.__heatmap:
+            for color, coords in coordinate_map.items():
+                seq, base = seq_map.get(color) or (None, None)
+                self.__heatmap.observe(color, coords, seq=seq, base=base)
+
+            if self.__show_heatmap:
+                heatmap_version = self.__heatmap.version
+
+        # Live data is always recorded, the timeline decides what is shown
+        self.__history.observe(coordinate_map, pin_map, seq_map=seq_map)
+        if self.__playback_time is not None:
+            coordinate_map, pin_map = self.__history.seek(self.__playback_time)
+
+        if self.__vector_overlay:
+            self.__overlay_data = (coordinate_map, pin_map)
+            try:
+                self.after(0, self.__layout_overlay)
+            except (RuntimeError, tk.TclError):
+                # The window was closed
+                return
+
+            # The map image only depends on the view, skip unchanged views
+            request_key = (width, height, self.__zoom, self.__pan_x,
+                           self.__pan_y, resample, heatmap_version)
+            if request_key == self.__last_request_key: return
+            self.__last_request_key = request_key
+
+            coordinate_map, pin_map = {}, {}
+
+        # Snapshot the state, the worker renders whichever request is newest
+        self.__render_worker.submit(RenderRequest(
+            width=width, height=height, coordinate_map=coordinate_map,
+            pin_map=pin_map, zoom=self.__zoom,
+            pan=(self.__pan_x, self.__pan_y), resample=resample,
+            grid=self.__vector_overlay is None,
+            heatmap_version=heatmap_version
+        ))
+
+    def __layout_overlay(self):
+        """
+        **Place the vector overlay exactly for the current view and data.**
+        """
+        if not self.__vector_overlay: return
+
+        view = compute_view(
+            self.__base_map.size, self.__canvas_frame.winfo_width(),
+            self.__canvas_frame.winfo_height(), self.__zoom,
+            (self.__pan_x, self.__pan_y)
+        )
+        self.__vector_overlay.layout(
+            view, *self.__overlay_data,
             self.__config.get('map', {}).get('world_bounds')
         )
+        self.__overlay_zoom = self.__zoom
 
-        self.__canvas.delete('all')
-        self.__tk_image = ImageTk.PhotoImage(rendered)
-        self.__canvas_image_id = self.__canvas.create_image(
-            0, 0, anchor='nw', image=self.__tk_image
+    def __render_frame(self, request:RenderRequest) -> Image.Image:
+        """
+        **Called by the render worker. Renders a requested frame.**
+        
+        *Parameters*:
+        - `request` (RenderRequest): The state to render.
+        
+        *Returns*:
+        - (Image.Image): The rendered frame, including the pan margin.
+        """
+        # Render a margin around the view so pans can expose it instantly
+        return render_scaled_image(
+            self.__base_map, request.width, request.height,
+            request.coordinate_map, request.zoom, request.pan, request.pin_map,
+            self.__config.get('map', {}).get('world_bounds'),
+            self.__render_cache, PAN_MARGIN, request.resample,
+            self.__trail_lod, request.grid,
+            self.__heatmap if request.heatmap_version is not None else None
         )
 
-    def __schedule_map_render(self, event:tk.Event=None):
+    def __frame_rendered(self, request:RenderRequest, frame:Image.Image):
         """
-        **Schedule the map to render.**
+        **Called by the render worker. Hands a finished frame to the Tk
+        thread.**
+        
+        *Parameters*:
+        - `request` (RenderRequest): The state the frame was rendered from.
+        - `frame` (Image.Image): The rendered frame.
+        """
+        def show():
+            """
+            **Display the frame, compensating for pans and zooms made while
+            it was rendering.**
+            """
+            self.__frame = frame
+            self.__frame_zoom = request.zoom
+            self.__frame_pan = request.pan
+
+            if request.zoom != self.__zoom:
+                self.__preview_zoom()
+                return
+
+            self.__display(frame, -PAN_MARGIN + self.__pan_x - request.pan[0],
+                           -PAN_MARGIN + self.__pan_y - request.pan[1])
+            self.__layout_overlay()
+
+        try:
+            self.after(0, show)
+        except (RuntimeError, tk.TclError):
+            # The window was closed while rendering
+            pass
+
+    def destroy(self):
+        """
+        **Stop the render worker and the map's threads along with the
+        widget.**
+        """
+        self.__render_worker.stop()
+        self.__base_map.close()
+
+        super().destroy()
+
+    def __display(self, image:Image.Image, x:int, y:int):
+        """
+        **Display an image on the canvas, below any vector overlay items.**
+        
+        *Parameters*:
+        - `image` (Image.Image): The image to display.
+        - `x` (int): Canvas x of the image's top left corner.
+        - `y` (int): Canvas y of the image's top left corner.
+        """
+        self.__tk_image = ImageTk.PhotoImage(image)
+
+        if self.__canvas_image_id is None:
+            self.__canvas_image_id = self.__canvas.create_image(
+                x, y, anchor='nw', image=self.__tk_image
+            )
+            self.__canvas.tag_lower(self.__canvas_image_id)
+        else:
+            self.__canvas.itemconfigure(self.__canvas_image_id,
+                                        image=self.__tk_image)
+            self.__canvas.coords(self.__canvas_image_id, x, y)
+
+    def __preview_zoom(self):
+        """
+        **Show the last frame scaled to the current zoom until the full
+        quality render is done.**
+        """
+        if not self.__frame: return
+
+        width = self.__canvas_frame.winfo_width()
+        height = self.__canvas_frame.winfo_height()
+
+        preview = transform_frame(
+            self.__frame, PAN_MARGIN, (width, height),
+            (width / 2 + self.__frame_pan[0], height / 2 + self.__frame_pan[1]),
+            (width / 2 + self.__pan_x, height / 2 + self.__pan_y),
+            self.__zoom / self.__frame_zoom, self.__base_map.letterboxing_color
+        )
+
+        self.__display(preview, 0, 0)
+
+        # Canvas items scale around the same center, exact on the next frame
+        if self.__vector_overlay:
+            self.__vector_overlay.scale(width / 2 + self.__pan_x,
+                                        height / 2 + self.__pan_y,
+                                        self.__zoom / self.__overlay_zoom)
+            self.__overlay_zoom = self.__zoom
+
+    def __schedule_map_render(self, event:tk.Event=None, delay_ms:int=5):
+        """
+        **Schedule a fast render of the map, followed by a single full quality
+        render once idle, replacing already scheduled renders.**
         
         *Parameters*:
         - `event` (tk.Event): The event associated with the function call.
+        - `delay_ms` (int): Milliseconds to wait. Defaults to 5.
         """
         if self.__render_job is not None:
             self.after_cancel(self.__render_job)
+        if self.__refine_job is not None:
+            self.after_cancel(self.__refine_job)
         
-        self.__render_job = self.after(5, self.render_map)
+        self.__render_job = self.after(
+            delay_ms, lambda: self.render_map(fast=True)
+        )
+        self.__refine_job = self.after(
+            delay_ms + self.__refine_delay_ms, self.render_map
+        )
+
+    def __toggle_heatmap(self):
+        """
+        **Show or hide the density heatmap.**
+        """
+        self.__show_heatmap = self.__heatmap_var.get()
+
+        self.__schedule_map_render()
+
+    def __seek_timeline(self, value:str):
+        """
+        **Called when the timeline is dragged. Shows the map as it was at
+        that point, the right end goes back to live.**
+        
+        *Parameters*:
+        - `value` (str): The timeline position, 0 to 1.
+        """
+        span = self.__history.span()
+        if not span or float(value) >= 1.0:
+            self.__go_live()
+            return
+
+        start, end = span[0], time.time()
+        self.__playback_time = start + float(value) * (end - start)
+
+        # Playing on from the new time restarts the tick, never adds one
+        self.__cancel_playback_tick()
+        if self.__playing:
+            self.__playback_job = self.after(PLAYBACK_TICK_MS,
+                                             self.__playback_tick)
+
+        self.__update_timeline()
+        self.__schedule_map_render()
+
+    def __toggle_playback(self):
+        """
+        **Play or pause the trail history, starting from the oldest point
+        when live.**
+        """
+        if self.__playing:
+            self.__playing = False
+            self.__cancel_playback_tick()
+            self.__play_btn.configure(text='Play')
+            return
+
+        span = self.__history.span()
+        if not span: return
+
+        if self.__playback_time is None: self.__playback_time = span[0]
+        self.__playing = True
+        self.__play_btn.configure(text='Pause')
+
+        self.__playback_tick()
+
+    def __playback_tick(self):
+        """
+        **Advance the playback by one frame, going live once it catches up.**
+        """
+        self.__playback_job = None
+        if not self.__playing: return
+
+        self.__playback_time += PLAYBACK_TICK_MS / 1000 * self.__playback_speed
+        if self.__playback_time >= time.time():
+            self.__go_live()
+            return
+
+        self.__update_timeline()
+        self.render_map(fast=True)
+
+        self.__playback_job = self.after(PLAYBACK_TICK_MS, self.__playback_tick)
+
+    def __cancel_playback_tick(self):
+        """
+        **Cancel the scheduled playback tick, if any.**
+        """
+        if self.__playback_job is not None:
+            self.after_cancel(self.__playback_job)
+            self.__playback_job = None
+
+    def __go_live(self):
+        """
+        **Stop the playback and show the live map again.**
+        """
+        self.__playing = False
+        self.__cancel_playback_tick()
+        self.__playback_time = None
+        self.__play_btn.configure(text='Play')
+
+        self.__update_timeline()
+        self.__schedule_map_render()
+
+    def __update_timeline(self):
+        """
+        **Move the timeline and its label to the playback time.**
+        """
+        span = self.__history.span()
+        if self.__playback_time is None or not span:
+            self.__timeline_var.set(1.0)
+            self.__timeline_text.configure(text='Live')
+            return
+
+        start, end = span[0], time.time()
+        self.__timeline_var.set(
+            (self.__playback_time - start) / max(end - start, 1e-6)
+        )
+
+        clock = dt.fromtimestamp(self.__playback_time).strftime('%H:%M:%S')
+        self.__timeline_text.configure(text=f'Playback {clock}')
 
     def set_status_text(self, text:str, bad:bool=False):
         """
@@ -437,45 +839,101 @@ class Gui(ttk.Frame):
         """
         **Toggle the server connection.**
         """
-        if self.__sio.connected:
-            self.__sio.disconnect()
+        if self.__sio.connected or self.__reconnector.active():
+            self.__want_connection = False
+            self.__reconnector.cancel()
+            if self.__sio.connected: self.__sio.disconnect()
             self.connect_btn.configure(text='Connect')
 
             self.__schedule_map_render()
             return
 
-        def connect_worker():
+        def connect_failed():
             """
-            **Connects to the server in a thread to not freeze the GUI.**
+            **Called on the runtime when the attempt failed.**
             """
-            try:
-                oc:dict = self.__config.get('online', {})
-                je:dict = self.__config.get('jurassic_echoes', {})
-
-                self.__sio.connect(
-                    f'http://{oc.get("ip")}:{oc.get("port")}',
-                    auth={
-                        'password': oc.get('password'),
-                        'alias': oc.get('alias'),
-                        'je-cookie': je.get('cookie'),
-                        'user-agent': je.get('user_agent')
-                    }
-                )
-
-                self.after(0, lambda: self.connect_btn.configure(
-                    state='enabled', text='Disconnect'
-                ))
-            except Exception:
-                lr.Log.warn('Issue occurred while connecting to server!')
-                self.after(0, lambda: self.connect_btn.configure(
-                    state='enabled', text='Connect'
-                ))
+            self.__want_connection = False
+            self.__dispatcher.post('connect-button', lambda: (
+                self.connect_btn.configure(state='enabled', text='Connect')
+            ))
 
+        self.__want_connection = True
         self.connect_btn.configure(state='disabled', text='Connecting...')
 
         self.__schedule_map_render()
 
-        threading.Thread(target=connect_worker, daemon=True).start()
+        # Connects on the runtime, so the GUI does not freeze
+        self.__reconnector.connect(on_failure=connect_failed)
+
+    async def __connect(self) -> bool:
+        """
+        **Runs on the runtime. Makes one attempt to connect to the server.**
+        
+        *Returns*:
+        - (bool): Whether the client is connected afterwards.
+        """
+        if self.__sio.connected: return True
+
+        self.__rejection = None
+        try:
+            oc:dict = self.__config.get('online', {})
+            je:dict = self.__config.get('jurassic_echoes', {})
+
+            await self.__sio.connect(
+                f'http://{oc.get("ip")}:{oc.get("port")}',
+                auth={
+                    'password': oc.get('password'),
+                    'alias': oc.get('alias'),
+                    'je-cookie': je.get('cookie'),
+                    'user-agent': je.get('user_agent'),
+                    'state-version': self.map_version
+                }
+            )
+        except Exception:
+            if not self.__rejection:
+                lr.Log.warn('Issue occurred while connecting to server!')
+                return False
+
+            # Retrying with the same settings can not succeed
+            self.__want_connection = False
+            self.__dispatcher.post('connect-button', lambda: (
+                self.connect_btn.configure(state='enabled', text='Connect')
+            ))
+            raise ConnectionRejected(self.__rejection)
+
+        # The user gave up while the attempt was in flight
+        if not self.__want_connection:
+            self.__sio.disconnect()
+            return True
+
+        self.__dispatcher.post('connect-button', lambda: (
+            self.connect_btn.configure(state='enabled', text='Disconnect')
+        ))
+        return True
+
+    def connection_lost(self):
+        """
+        **Called when the connection closed, reconnects unless the user
+        disconnected.**
+        """
+        self.update_player_list(disconnected=True)
+
+        if not self.__want_connection:
+            self.connect_btn.configure(state='enabled', text='Connect')
+            return
+
+        self.connect_btn.configure(state='enabled', text='Reconnecting...')
+        self.__reconnector.start()
+
+    def connection_rejected(self, reason:str):
+        """
+        **Runs on the runtime. Note why the server refused the client, the
+        attempt then stops connecting instead of retrying.**
+
+        *Parameters*:
+        - `reason` (str): The server's error message.
+        """
+        self.__rejection = reason
 
     def reset_coordinates(self):
         """
@@ -500,7 +958,7 @@ class Gui(ttk.Frame):
         canvas_w = self.__canvas.winfo_width()
         canvas_h = self.__canvas.winfo_height()
 
-        img_w, img_h = self.__base_image.size
+        img_w, img_h = self.__base_map.size
 
         scale = min(canvas_w / img_w, canvas_h / img_h) * self.__zoom
 
@@ -551,9 +1009,10 @@ class Gui(ttk.Frame):
         - `event` (tk.Event): The event associated with the function call.
         """
         self.__zoom += 0.1 * (1 if event.delta > 0 else -1)
-        self.__zoom = max(1.0, min(3.0, self.__zoom))
+        self.__zoom = max(1.0, min(self.__max_zoom, self.__zoom))
 
-        self.render_map()
+        self.__preview_zoom()
+        self.__schedule_map_render(delay_ms=SETTLE_DELAY_MS)
 
     def __pan_start(self, event:tk.Event=None):
         """
@@ -576,17 +1035,34 @@ class Gui(ttk.Frame):
         dx = event.x - self.__drag_start_x
         dy = event.y - self.__drag_start_y
 
+        old_pan_x, old_pan_y = self.__pan_x, self.__pan_y
+
         self.__pan_x += dx
         self.__pan_y += dy
 
-        max_pan = int(self.__tk_image.width())
+        # Allow reaching the map edges at zoom levels past 3x
+        canvas_w = self.__canvas.winfo_width()
+        canvas_h = self.__canvas.winfo_height()
+        img_w, img_h = self.__base_map.size
+        scale = min(canvas_w / img_w, canvas_h / img_h) * self.__zoom
+
+        max_pan = max(canvas_w, int(img_w * scale / 2))
         self.__pan_x = max(-max_pan, min(max_pan, self.__pan_x))
         self.__pan_y = max(-max_pan, min(max_pan, self.__pan_y))
 
         self.__drag_start_x = event.x
         self.__drag_start_y = event.y
 
-        self.render_map()
+        # Move the current image right away, re-render once motion settles
+        if self.__canvas_image_id is not None:
+            self.__canvas.move(self.__canvas_image_id,
+                               self.__pan_x - old_pan_x,
+                               self.__pan_y - old_pan_y)
+        if self.__vector_overlay:
+            self.__vector_overlay.move(self.__pan_x - old_pan_x,
+                                       self.__pan_y - old_pan_y)
+
+        self.__schedule_map_render(delay_ms=SETTLE_DELAY_MS)
 
     def __pan_stop(self, event:tk.Event=None):
         """
@@ -597,6 +1073,8 @@ class Gui(ttk.Frame):
         """
         self.__dragging = False
 
+        self.__schedule_map_render()
+
     def __double_click_mouse_wheel(self, event:tk.Event=None):
         """
         **Called when the middle mouse is double clicked, resets pan and zoom.**
@@ -660,4 +1138,36 @@ class Gui(ttk.Frame):
         self.__player_frame = ttk.Frame(self.__sidebar_frame)
         self.__player_frame.grid(row=2, column=0, columnspan=3, padx=10,
                                pady=(0, 10), sticky='nsew')
-        self.__player_frame.grid_columnconfigure(0, weight=1)
\ No newline at end of file
+        self.__player_frame.grid_columnconfigure(0, weight=1)
+
+        self.__heatmap_var = tk.BooleanVar(value=self.__show_heatmap)
+        self.__heatmap_toggle = ttk.Checkbutton(
+            self.__sidebar_frame, text='Heatmap', variable=self.__heatmap_var,
+            command=self.__toggle_heatmap,
+            state='normal' if self.__heatmap else 'disabled'
+        )
+        self.__heatmap_toggle.grid(row=3, column=0, columnspan=3, padx=10,
+                                   pady=(0, 10), sticky='nsw')
+
+        timeline_frame = ttk.Frame(self.__sidebar_frame)
+        timeline_frame.grid(row=4, column=0, columnspan=3, padx=10,
+                            pady=(0, 10), sticky='nsew')
+        timeline_frame.grid_columnconfigure(1, weight=1)
+
+        self.__play_btn = ttk.Button(timeline_frame, width=6, text='Play',
+                                     command=self.__toggle_playback)
+        self.__play_btn.grid(row=0, column=0, sticky='nsw')
+
+        self.__timeline_var = tk.DoubleVar(value=1.0)
+        self.__timeline = ttk.Scale(timeline_frame, from_=0.0, to=1.0,
+                                    variable=self.__timeline_var,
+                                    command=self.__seek_timeline)
+        self.__timeline.grid(row=0, column=1, padx=10, sticky='ew')
+
+        self.__live_btn = ttk.Button(timeline_frame, width=6, text='Live',
+                                     command=self.__go_live)
+        self.__live_btn.grid(row=0, column=2, sticky='nse')
+
+        self.__timeline_text = ttk.Label(timeline_frame, text='Live',
+                                         anchor='center')
+        self.__timeline_text.grid(row=1, column=0, columnspan=3, sticky='ew')
\ No newline at end of file
@@ -0,0 +1,350 @@
+from datetime import datetime as dt, timezone as tz
+import socketio, asyncio, aiohttp, argparse, random, json, sys
+from pathlib import Path
+import loggerric as lr
+
+# Handle both normal execution and PyInstaller bundled exe
+if getattr(sys, 'frozen', False):
+    # Running as PyInstaller exe
+    ROOT = Path(sys._MEIPASS).parent
+else:
+    # Running as script
+    ROOT = Path(__file__).resolve().parents[1]
+
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+# Only modules without tkinter or Pillow may be imported here
+from shared.utils import set_project_root, get_exe_path
+
+set_project_root(ROOT)
+
+class EventSink:
+    """
+    **Streams events as compact JSON lines to a file and or a local socket.**
+
+    Every line is `[utc_ms, event, args]`. The recording is only appended to,
+    so a crash loses at most the last unflushed lines and a restart keeps
+    writing to the same file. A relay that can not be reached is retried on
+    every flush while the recording carries on.
+
+    *Methods*:
+    - `open() -> None`: Open the recording and the relay.
+    - `write(event, args) -> None`: Queue an event.
+    - `flush() -> None`: Write queued events out.
+    - `close() -> None`: Flush and close everything.
+    """
+    def __init__(self, record_path:Path=None, relay:tuple[str, int]=None):
+        """
+        **Initializer.**
+
+        *Parameters*:
+        - `record_path` (Path): File to append events to, none if missing.
+        - `relay` (tuple[str, int]): Host and port to stream events to, none
+        if missing.
+        """
+        self.__record_path = record_path
+        self.__relay = relay
+
+        self.__file = None
+        self.__writer:asyncio.StreamWriter = None
+        self.__lines:list[str] = []
+
+    async def open(self):
+        """
+        **Open the recording and the relay.**
+        """
+        if self.__record_path:
+            self.__record_path.parent.mkdir(parents=True, exist_ok=True)
+            self.__file = open(self.__record_path, 'a', encoding='utf-8')
+            lr.Log.info(f'Recording to "{self.__record_path}"!')
+
+        await self.__connect_relay()
+
+    async def __connect_relay(self):
+        """
+        **Connect to the relay, if one is configured and not connected.**
+        """
+        if not self.__relay or self.__writer: return
+
+        try:
+            _, self.__writer = await asyncio.open_connection(*self.__relay)
+            lr.Log.info('Relaying to {}:{}!'.format(*self.__relay))
+        except OSError as e:
+            lr.Log.warn(f'Relay unreachable: {e}')
+
+    def write(self, event:str, args:list):
+        """
+        **Queue an event, written out on the next flush.**
+
+        *Parameters*:
+        - `event` (str): The event name.
+        - `args` (list): The event arguments.
+        """
+        utc_ms = int(dt.now(tz=tz.utc).timestamp() * 1000)
+        self.__lines.append(json.dumps([utc_ms, event, args],
+                                       separators=(',', ':')) + '\n')
+
+    async def flush(self):
+        """
+        **Write queued events to the recording and the relay.**
+        """
+        if not self.__lines: return
+
+        chunk = ''.join(self.__lines)
+        self.__lines.clear()
+
+        if self.__file:
+            self.__file.write(chunk)
+            self.__file.flush()
+
+        await self.__connect_relay()
+        if not self.__writer: return
+
+        try:
+            self.__writer.write(chunk.encode('utf-8'))
+            await self.__writer.drain()
+        except OSError as e:
+            lr.Log.warn(f'Relay lost: {e}')
+            self.__writer = None
+
+    async def close(self):
+        """
+        **Flush and close the recording and the relay.**
+        """
+        await self.flush()
+
+        if self.__file: self.__file.close()
+        if self.__writer:
+            self.__writer.close()
+            try:
+                await self.__writer.wait_closed()
+            except OSError:
+                pass
+
+class HeadlessClient:
+    """
+    **Connects like the GUI and hands every server event to a sink.**
+
+    Keeps the connection alive with heartbeats and reconnects with jittered
+    exponential backoff, resuming from the last seen map state version so
+    only changes are sent on reconnect.
+
+    *Methods*:
+    - `run() -> None`: Connect and record until cancelled.
+    """
+    def __init__(self, config:dict, sink:EventSink, flush_sec:float=1.0):
+        """
+        **Initializer.**
+
+        *Parameters*:
+        - `config` (dict): The client config.
+        - `sink` (EventSink): Receives every event.
+        - `flush_sec` (float): Seconds between sink flushes. Defaults to 1.
+        """
+        self.__config = config
+        self.__sink = sink
+        self.__flush_sec = flush_sec
+
+        self.__sio:socketio.AsyncClient = None
+        self.__map_version:int = None
+        self.__auth_error:str = None
+        self.__last_heartbeat = 0.0
+
+    async def __on_connect(self):
+        """
+        **Called when connected.**
+        """
+        lr.Log.info('Client connected to server!')
+        self.__last_heartbeat = asyncio.get_running_loop().time()
+        self.__sink.write('connect', [])
+
+    async def __on_disconnect(self, *_):
+        """
+        **Called when disconnected.**
+        """
+        lr.Log.info('Disconnected from server!')
+        self.__sink.write('disconnect', [])
+
+    async def __on_event(self, event:str, *args):
+        """
+        **Called for every server event, keeps the map state version.**
+
+        *Parameters*:
+        - `event` (str): The event name.
+        - `*args` (Any): The event arguments.
+        """
+        if event == 'heartbeat':
+            self.__last_heartbeat = asyncio.get_running_loop().time()
+        elif event == 'update-map' and len(args) > 2:
+            self.__map_version = args[2]
+        elif event == 'update-map-delta' and len(args) > 1:
+            self.__map_version = args[1]
+        elif event == 'auth-error' and args:
+            self.__auth_error = args[0]
+
+        self.__sink.write(event, list(args))
+
+    def __auth(self) -> dict:
+        """
+        **Authentication sent on every connect, mirrors the GUI.**
+
+        *Returns*:
+        - (dict): The authentication parameters.
+        """
+        oc:dict = self.__config.get('online', {})
+        je:dict = self.__config.get('jurassic_echoes', {})
+
+        return {
+            'password': oc.get('password'),
+            'alias': oc.get('alias'),
+            'je-cookie': je.get('cookie'),
+            'user-agent': je.get('user_agent'),
+            'state-version': self.__map_version
+        }
+
+    async def __heartbeats(self):
+        """
+        **Send heartbeats and disconnect if the server went silent.**
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            if self.__sio.connected:
+                await self.__sio.emit('heartbeat')
+
+                if loop.time() >= self.__last_heartbeat + 12:
+                    lr.Log.warn('Server timed out!')
+                    await self.__sio.disconnect()
+
+            await asyncio.sleep(5)
+
+    async def __flushing(self):
+        """
+        **Flush the sink periodically.**
+        """
+        while True:
+            await asyncio.sleep(self.__flush_sec)
+            await self.__sink.flush()
+
+    async def run(self):
+        """
+        **Connect and record until cancelled or rejected by the server.**
+        """
+        oc:dict = self.__config.get('online', {})
+        url = f'http://{oc.get("ip")}:{oc.get("port")}'
+        base_delay:float = oc.get('reconnect_base_delay_sec', 1.0)
+        max_delay:float = oc.get('reconnect_max_delay_sec', 30.0)
+        stable:float = oc.get('reconnect_stable_sec', 30.0)
+
+        # An own HTTP session, so it is closed once done
+        async with aiohttp.ClientSession() as session:
+            self.__sio = socketio.AsyncClient(reconnection=False,
+                                              http_session=session)
+            self.__sio.on('connect', self.__on_connect)
+            self.__sio.on('disconnect', self.__on_disconnect)
+            self.__sio.on('*', self.__on_event)
+
+            await self.__sink.open()
+            await self.__record(url, base_delay, max_delay, stable)
+
+    async def __record(self, url:str, base_delay:float, max_delay:float,
+                       stable:float):
+        """
+        **Stay connected until cancelled or rejected, reconnecting with
+        jittered exponential backoff.**
+
+        *Parameters*:
+        - `url` (str): The server URL.
+        - `base_delay` (float): Cap of the first retry delay in seconds.
+        - `max_delay` (float): Largest cap in seconds.
+        - `stable` (float): Seconds a connection has to last before the
+        backoff starts over.
+        """
+        loop = asyncio.get_running_loop()
+        tasks = [asyncio.create_task(self.__heartbeats()),
+                 asyncio.create_task(self.__flushing())]
+
+        try:
+            attempt = 0
+            while True:
+                try:
+                    await self.__sio.connect(url, auth=self.__auth())
+                # A timed out disconnect can still be closing the dead
+                # socket, engineio refuses to connect until it is done
+                except (socketio.exceptions.ConnectionError, ValueError) as e:
+                    if self.__auth_error:
+                        lr.Log.error(f'Rejected: {self.__auth_error}')
+                        return
+
+                    reason = f'Could not connect ({e})'
+                else:
+                    connected_at = loop.time()
+                    await self.__sio.wait()
+
+                    # Only a connection that held up resets the backoff, so a
+                    # server dropping clients right away is not hammered
+                    if loop.time() - connected_at >= stable: attempt = 0
+                    reason = 'Connection lost'
+
+                cap = min(max_delay, base_delay * 2 ** attempt)
+                delay = random.uniform(0, cap)
+                lr.Log.warn(f'{reason}, retrying in {delay:.1f}s!')
+
+                attempt += 1
+                await asyncio.sleep(delay)
+        finally:
+            for task in tasks: task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+            await self.__sio.shutdown()
+            await self.__sink.close()
+
+def parse_relay(value:str) -> tuple[str, int]:
+    """
+    **Parse a `host:port` relay address.**
+
+    *Parameters*:
+    - `value` (str): The address.
+
+    *Returns*:
+    - (tuple[str, int]): Host and port.
+    """
+    host, _, port = value.rpartition(':')
+    if not host or not port.isdigit():
+        raise argparse.ArgumentTypeError(f'Expected host:port, got "{value}"')
+
+    return host, int(port)
+
+def main():
+    """
+    **Main entrypoint.**
+    """
+    parser = argparse.ArgumentParser(
+        description='Connect without a GUI and record every server event '
+                    + 'to an append-only JSON lines file, or relay them to a '
+                    + 'local socket.'
+    )
+    parser.add_argument('--record', default=None,
+                        help='File to append to, defaults to a new file in '
+                             + 'client/recordings unless relaying.')
+    parser.add_argument('--relay', type=parse_relay, default=None,
+                        help='Stream events to host:port.')
+    parser.add_argument('--flush-sec', type=float, default=1.0)
+    args = parser.parse_args()
+
+    with open(get_exe_path('client/config.json'), 'r') as file:
+        config:dict = json.load(file)
+
+    record_path = Path(args.record) if args.record else None
+    if not record_path and not args.relay:
+        utc = dt.now(tz=tz.utc).strftime('%Y%m%d-%H%M%S')
+        record_path = ROOT / 'client' / 'recordings' / f'{utc}.jsonl'
+
+    client = HeadlessClient(config, EventSink(record_path, args.relay),
+                            flush_sec=args.flush_sec)
+    try:
+        asyncio.run(client.run())
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == '__main__': main()
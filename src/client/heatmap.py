@@ -0,0 +1,231 @@
+from functools import lru_cache
+from pathlib import Path
+from PIL import Image
+import threading, time, sys
+
+# NumPy is optional, bundled builds without it have no heatmap
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Handle both normal execution and PyInstaller bundled exe
+if getattr(sys, 'frozen', False):
+    # Running as PyInstaller exe
+    ROOT = Path(sys._MEIPASS).parent
+else:
+    # Running as script
+    ROOT = Path(__file__).resolve().parents[1]
+
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from client.playback import new_points
+from client.rendering import View
+
+# Density to color stops, transparent where nobody has been
+HEAT_STOPS = [
+    (0.0, (0, 0, 0, 0)),
+    (0.25, (0, 0, 255, 96)),
+    (0.5, (0, 255, 255, 128)),
+    (0.75, (255, 255, 0, 160)),
+    (1.0, (255, 0, 0, 192))
+]
+
+# Rebase the decay weights before they lose float precision
+MAX_WEIGHT_EXPONENT = 64
+
+@lru_cache(maxsize=1)
+def heat_palette() -> 'np.ndarray':
+    """
+    **The colormap lookup table, built once.**
+
+    *Returns*:
+    - (np.ndarray): 256 RGBA entries indexed by scaled density.
+    """
+    positions = [stop for stop, _ in HEAT_STOPS]
+    samples = np.linspace(0.0, 1.0, 256)
+
+    return np.stack([
+        np.interp(samples, positions, [color[channel]
+                                       for _, color in HEAT_STOPS])
+        for channel in range(4)
+    ], axis=1).astype(np.uint8)
+
+class DensityHeatmap:
+    """
+    **Long-term density of player positions on a fixed grid.**
+
+    Positions are accumulated into a fixed-resolution grid in normalized map
+    space as they arrive, costing O(1) per point no matter how long the
+    history is. Decay is applied lazily by weighting newer points higher
+    instead of touching every cell, the grid is only rescaled once the
+    weights grow too large. Rendering colors the grid through a cached
+    lookup table and is redone only when the data or the view changed.
+
+    *Methods*:
+    - `observe(color, coords, timestamp) -> None`: Accumulate the points of
+    a trail that were not seen before.
+    - `add(coord, timestamp) -> None`: Accumulate a single point.
+    - `layer(view) -> tuple`: The colored heatmap of the visible region.
+    - `clear() -> None`: Forget all accumulated points.
+    """
+    def __init__(self, bounds:dict[str, int], resolution:int=256,
+                 half_life_min:float=60.0):
+        """
+        **Initializer.**
+
+        *Parameters*:
+        - `bounds` (dict[str, int]): Bounds of the ingame map.
+        - `resolution` (int): Cells along each side of the grid. Defaults to
+        256.
+        - `half_life_min` (float): Minutes after which a point counts half,
+        0 disables decay. Defaults to 60.
+        """
+        self.__bounds = bounds
+        self.__resolution = resolution
+        self.__half_life_sec = half_life_min * 60
+
+        self.__lock = threading.Lock()
+        self.__grid = np.zeros((resolution, resolution), dtype=np.float64)
+        self.__max = 0.0
+        self.__epoch = time.time()
+        self.__trails:dict[str, tuple[list[tuple], int]] = {}
+
+        # Bumped on every change, the rendered layer is cached against it
+        self.version = 0
+        self.__layer_key:tuple = None
+        self.__layer:tuple[Image.Image, tuple[int, int]] = (None, None)
+
+    def __weight(self, timestamp:float) -> float:
+        """
+        **The weight of a point, relative to the current epoch.**
+
+        Must be called with the lock held.
+
+        *Parameters*:
+        - `timestamp` (float): When the point arrived.
+
+        *Returns*:
+        - (float): The weight to accumulate.
+        """
+        if self.__half_life_sec <= 0: return 1.0
+
+        exponent = (timestamp - self.__epoch) / self.__half_life_sec
+        if exponent > MAX_WEIGHT_EXPONENT:
+            # Rescale everything once so weights restart near 1
+            factor = 2.0 ** -exponent
+            self.__grid *= factor
+            self.__max *= factor
+            self.__epoch = timestamp
+            exponent = 0.0
+
+        return 2.0 ** exponent
+
+    def observe(self, color:str, coords:list[tuple],
+                timestamp:float=None, seq:int=None, base:int=None):
+        """
+        **Accumulate the points of a trail that were not seen before.**
+
+        Trails arrive as a sliding window of the latest positions, the new
+        points are told apart by the trail's arrival counter, see
+        `new_points`.
+
+        *Parameters*:
+        - `color` (str): The player's color.
+        - `coords` (list[tuple]): The player's current trail.
+        - `timestamp` (float): When the points arrived. Defaults to now.
+        - `seq` (int): The trail's arrival counter, points are matched by
+        content if missing.
+        - `base` (int): The counter the trail was last rebuilt at.
+        """
+        coords = [tuple(coord) for coord in coords]
+        with self.__lock:
+            previous, previous_seq = self.__trails.get(color, ([], None))
+            self.__trails[color] = (coords,
+                                    previous_seq if seq is None else seq)
+
+        for coord in new_points(previous, coords, previous_seq, seq, base):
+            self.add(coord, timestamp)
+
+    def add(self, coord:tuple[float, float], timestamp:float=None):
+        """
+        **Accumulate a single point, ignoring points outside the map.**
+
+        *Parameters*:
+        - `coord` (tuple[float, float]): The ingame (y, x) coordinates.
+        - `timestamp` (float): When the point arrived. Defaults to now.
+        """
+        bounds = self.__bounds
+
+        # Same orientation as translate_coords, normalized to 0..1
+        nx = (coord[1] - bounds['min_x']) / (bounds['max_x'] - bounds['min_x'])
+        ny = 1 - (coord[0] - bounds['min_y']) / (bounds['max_y']
+                                                 - bounds['min_y'])
+        if not (0 <= nx < 1 and 0 <= ny < 1): return
+
+        col = int(nx * self.__resolution)
+        row = int(ny * self.__resolution)
+
+        with self.__lock:
+            self.__grid[row, col] += self.__weight(timestamp or time.time())
+            self.__max = max(self.__max, self.__grid[row, col])
+            self.version += 1
+
+    def layer(self, view:View) -> tuple[Image.Image, tuple[int, int]]:
+        """
+        **The colored heatmap of the visible region of a view.**
+
+        *Parameters*:
+        - `view` (View): The view transform.
+
+        *Returns*:
+        - (tuple[Image.Image, tuple[int, int]]): The layer and where to place
+        it in the frame, or (None, None) when nothing is visible.
+        """
+        with self.__lock:
+            key = (self.version, view)
+            if key == self.__layer_key: return self.__layer
+
+            if self.__max <= 0: return None, None
+            density = self.__grid / self.__max
+
+        target_width, target_height = view.target_size
+        new_size = view.map_size
+        offset_x, offset_y = view.offset
+
+        box = (
+            max(0, -offset_x), max(0, -offset_y),
+            min(new_size[0], target_width - offset_x),
+            min(new_size[1], target_height - offset_y)
+        )
+        if box[0] >= box[2] or box[1] >= box[3]: return None, None
+
+        # Square root lifts rarely visited cells into view
+        indices = (np.sqrt(density) * 255).astype(np.uint8)
+        heat = Image.fromarray(heat_palette()[indices])
+
+        fx = self.__resolution / new_size[0]
+        fy = self.__resolution / new_size[1]
+        layer = heat.resize(
+            (box[2] - box[0], box[3] - box[1]), Image.Resampling.BILINEAR,
+            box=(box[0] * fx, box[1] * fy, box[2] * fx, box[3] * fy)
+        )
+        position = (offset_x + box[0], offset_y + box[1])
+
+        with self.__lock:
+            self.__layer_key = key
+            self.__layer = (layer, position)
+
+        return layer, position
+
+    def clear(self):
+        """
+        **Forget all accumulated points.**
+        """
+        with self.__lock:
+            self.__grid.fill(0)
+            self.__max = 0.0
+            self.__epoch = time.time()
+            self.__trails.clear()
+            self.version += 1
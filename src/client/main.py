@@ -1,4 +1,4 @@
-import socketio, json, threading, time, pyperclip, sys, re
+import socketio, asyncio, aiohttp, json, sys
 from datetime import datetime as dt, timezone as tz
 from pathlib import Path
 import loggerric as lr
@@ -18,24 +18,42 @@ if str(ROOT) not in sys.path:
 from shared.utils import set_project_root, get_exe_path
 from shared.je_fetching import get_sleep_time
 from shared.datastructs import Coord, JEStat
+from client.clipboard import ClipboardWatcher, make_clipboard_source
+from client.dispatcher import TkDispatcher
+from client.runtime import AsyncRuntime, SyncSocket
+from client.outbox import LocationOutbox
 from client.gui import Gui
 
 set_project_root(ROOT)
 
-sio = socketio.Client()
+# Reconnects are handled by the GUI, so they can catch up by state version
+sio = socketio.AsyncClient(reconnection=False)
+
+# Socket, fetching, heartbeat and clipboard polling share one loop thread
+runtime = AsyncRuntime()
+socket = SyncSocket(runtime, sio)
 
 app:Gui = None
-threads:list[threading.Thread] = []
 last_heartbeat_utc_ts = None
-stop_threads = False
-last_clip = ''
+clipboard_watcher:ClipboardWatcher = None
+dispatcher:TkDispatcher = None
+
+# Last full map state, kept to apply catch-up deltas onto
+map_coordinates:dict[str, list] = {}
+map_pins:dict[str, tuple] = {}
+map_seqs:dict[str, list] = {}
 
 # Read the config file once
-with open(get_exe_path('client/config.json'), 'r') as file:
+CONFIG_PATH = Path(get_exe_path('client/config.json'))
+with open(CONFIG_PATH, 'r') as file:
     CONFIG:dict = json.load(file)
 
+# Locations captured while offline, uploaded in one batch on connect. Kept
+# next to the config, it does not exist before the first offline copy
+outbox = LocationOutbox(CONFIG_PATH.parent / 'outbox.json')
+
 @sio.event
-def connect():
+async def connect():
     """
     **Called when the client successfully connected.**
     """
@@ -45,17 +63,73 @@ def connect():
 
     last_heartbeat_utc_ts = int(dt.now(tz=tz.utc).timestamp())
 
+    await flush_outbox()
+
+def dispatch(key:str, callback, *args, merge=None):
+    """
+    **Hand a GUI call to the Tk thread, coalesced with pending calls of the
+    same key. Dropped while the GUI is not up.**
+
+    *Parameters*:
+    - `key` (str): Calls of the same key coalesce.
+    - `callback` (Callable): The GUI method to call.
+    - `*args` (Any): Arguments of the call.
+    - `merge` (Callable): Combines pending and new arguments.
+    """
+    if not dispatcher: return
+
+    dispatcher.post(key, callback, *args, merge=merge)
+
+def merge_player_lists(pending:tuple, new:tuple) -> tuple:
+    """
+    **Merge two pending player list updates. A refresh without a list of its
+    own keeps the pending list, anything else replaces it.**
+
+    *Parameters*:
+    - `pending` (tuple): Arguments of the pending update.
+    - `new` (tuple): Arguments of the new update.
+
+    *Returns*:
+    - (tuple): Arguments of the merged update.
+    """
+    new_list, new_disconnected = new
+    if new_list is None and new_disconnected == pending[1]: return pending
+
+    return new
+
+async def flush_outbox():
+    """
+    **Upload the locations captured while offline in a single batch, they
+    are dropped from the outbox once the server acknowledged them.**
+    """
+    pending = outbox.pending()
+    if not pending: return
+
+    lr.Log.info(f'Uploading {len(pending)} locations captured offline!')
+
+    def acknowledged(accepted:int=0, *_):
+        """
+        **Drop as many locations as the server stored, a batch it stored
+        none of is kept for the next flush.**
+        """
+        if not isinstance(accepted, int) or accepted <= 0:
+            lr.Log.warn('Offline locations were not stored, keeping them!')
+            return
+
+        outbox.acknowledge(min(accepted, len(pending)))
+
+    await sio.emit('updated-locations', pending, callback=acknowledged)
+
 @sio.event
 def disconnect():
     """
     **Called when the client successfully disconnects.**
     """
     lr.Log.info('Disconnected from server!')
-    
+
     if not app: return
 
-    app.connect_btn.configure(text='Connect')
-    app.update_player_list(disconnected=True)
+    dispatch('connection', app.connection_lost)
 
 @sio.on('auth-error')
 def auth_error(reason:str):
@@ -67,20 +141,60 @@ def auth_error(reason:str):
     """
     if not app: return
 
-    app.set_status_text(reason, bad=True)
+    app.connection_rejected(reason)
+    dispatch('status', lambda: app.set_status_text(reason, bad=True))
 
 @sio.on('update-map')
-def update_map(coordinate_map:dict, pin_map:dict):
+def update_map(coordinate_map:dict, pin_map:dict, version:int=None,
+               seq_map:dict=None):
     """
     **Called when a player on the server updated their map.**
     
     *Parameters*:
     - `coordinate_map` (dict): The list of coordinates and belonging to whom.
     - `pin_map` (dict): The list of pinned places and belonging to whom.
+    - `version` (int): The server's map state version.
+    - `seq_map` (dict): The `[seq, base]` trail arrival counters, keyed by
+    color.
+    """
+    global map_coordinates, map_pins, map_seqs
+
+    map_coordinates, map_pins = dict(coordinate_map), dict(pin_map)
+    map_seqs = dict(seq_map or {})
+
+    if not app: return
+
+    # Only the newest map state of a burst is rendered
+    app.map_version = version
+    dispatch('map', app.render_map, coordinate_map, pin_map, seq_map)
+
+@sio.on('update-map-delta')
+def update_map_delta(changes:dict, version:int):
     """
+    **Called on reconnect with only what changed since the last seen map
+    state version.**
+    
+    *Parameters*:
+    - `changes` (dict): New trail and pin keyed by color, None for players
+    that left.
+    - `version` (int): The server's map state version.
+    """
+    for color, state in changes.items():
+        if state is None:
+            map_coordinates.pop(color, None)
+            map_pins.pop(color, None)
+            map_seqs.pop(color, None)
+            continue
+
+        map_coordinates[color] = state.get('coordinates')
+        map_pins[color] = state.get('pin')
+        if state.get('seq') is not None: map_seqs[color] = state['seq']
+
     if not app: return
 
-    app.render_map(coordinate_map, pin_map)
+    app.map_version = version
+    dispatch('map', app.render_map, dict(map_coordinates), dict(map_pins),
+             dict(map_seqs) or None)
 
 @sio.on('update-player-list')
 def update_player_list(player_list:dict):
@@ -92,7 +206,8 @@ def update_player_list(player_list:dict):
     """
     if not app: return
 
-    app.update_player_list(player_list)
+    dispatch('player-list', app.update_player_list, player_list, False,
+             merge=merge_player_lists)
 
 @sio.on('heartbeat')
 def heartbeat():
@@ -103,124 +218,145 @@ def heartbeat():
 
     last_heartbeat_utc_ts = int(dt.now(tz=tz.utc).timestamp())
 
-def fetching_worker():
+async def fetching_task():
     """
-    **Called by a thread. Worker fetching data from the Jurassic Echoes API.**
+    **Runs on the runtime. Fetches data from the Jurassic Echoes API.**
     """
-    global stop_threads
-
     je:dict = CONFIG.get('jurassic_echoes', {})
     delay:int = je.get('fetching_delay_sec', 3)
-    while not stop_threads:
-        time.sleep(get_sleep_time(delay))
-
-        if sio.connected: continue
-
-        if not app: continue
-        if not app.client_list.get('OFFLINE'): continue
-        if not app.client_list['OFFLINE'].je: continue
-
-        client_data = app.client_list['OFFLINE']
-
-        je_data = app.client_list['OFFLINE'].je.fetching_client.fetch()
-        invalid_cookie = not client_data.je.fetching_client.valid_cookie
-        client_data.je.invalid_cookie = invalid_cookie
-        website_down = client_data.je.fetching_client.is_down
-        client_data.je.website_down = website_down
-
-        if not je_data: continue
-
-        percent:dict = je_data.get('current', {})
-        delta_rate:dict = je_data.get('delta-per-min', {})
-        est_time_min:dict = je_data.get('est-time-min', {})
-
-        client_data.je.health = JEStat(
-            percent=percent.get('Health'),
-            delta_rate=delta_rate.get('Health'),
-            eta_to_bounds=est_time_min.get('Health')
-        )
-        client_data.je.growth = JEStat(
-            percent=percent.get('Growth'),
-            delta_rate=delta_rate.get('Growth'),
-            eta_to_bounds=est_time_min.get('Growth')
-        )
-        client_data.je.hunger = JEStat(
-            percent=percent.get('Hunger'),
-            delta_rate=delta_rate.get('Hunger'),
-            eta_to_bounds=est_time_min.get('Hunger')
-        )
-        client_data.je.thirst = JEStat(
-            percent=percent.get('Thirst'),
-            delta_rate=delta_rate.get('Thirst'),
-            eta_to_bounds=est_time_min.get('Thirst')
-        )
-
-        client_data.je.species = je_data.get('dinosaur')
-        client_data.je.balance = je_data.get('balance')
-
-        app.update_player_list(disconnected=True)
-
-def clipboard_worker():
-    """
-    **Called by a thread. Watches the clipboard to check if a new valid
-    coordinate set has been copied.**
-    """
-    global stop_threads, last_clip
-
-    while not stop_threads:
-        time.sleep(0.5)
-
-        try:
-            clip = pyperclip.paste().strip()
-        except Exception:
-            clip = ''
-        
-        if clip == last_clip: continue
-        last_clip = clip
-
-        s = clip.replace(' ', '')
-        if s.count(',') != 5: continue
-        
-        try:
-            for part in s.split(','):
-                float(part)
-
-            parsed_coords = []
-            for index, segment in enumerate(clip.split(',')):
-                if index % 2 != 0: continue
-                parsed_coords.append(float(segment))
-
-            if sio.connected:
-                sio.emit('updated-location', parsed_coords[0:2])
-            else:
-                if not app: continue
-                
-                if app.client_list.get('OFFLINE'):
-                    app.client_list['OFFLINE'].coordinates.append(Coord(
-                        utc_timestamp=int(dt.now(tz=tz.utc).timestamp()),
-                        coordinates=parsed_coords[0:2]
-                    ))
-                app.render_map()
-        except ValueError: continue
-
-def heartbeat_worker():
-    """
-    **Called by a thread. Sends heartbeats to the server, aswell as checks if
-    the server is flatlining in which case it will disconnect the client.**
+
+    async with aiohttp.ClientSession() as session:
+        while True:
+            await asyncio.sleep(get_sleep_time(delay))
+
+            # A bad response must not end fetching for the whole session
+            try:
+                await fetch_je(session)
+            except Exception as e:
+                lr.Log.error(f'Issue occurred while fetching JE data: {e}')
+
+async def fetch_je(session:aiohttp.ClientSession):
     """
-    global stop_threads
+    **Fetch the Jurassic Echoes stats of the offline client once.**
+
+    *Parameters*:
+    - `session` (aiohttp.ClientSession): Session to send the request on.
+    """
+    if sio.connected: return
+
+    if not app: return
+    client_data = app.client_list.get('OFFLINE')
+    if not client_data or not client_data.je: return
 
-    while not stop_threads:
+    fetching_client = client_data.je.fetching_client
+    je_data = await fetching_client.fetch_async(session)
+
+    # The client list belongs to the Tk thread, it applies the result
+    dispatch('offline-je', apply_je_data, not fetching_client.valid_cookie,
+             fetching_client.is_down, je_data)
+
+def apply_je_data(invalid_cookie:bool, website_down:bool, je_data:dict):
+    """
+    **Runs on the Tk thread. Store fetched Jurassic Echoes stats on the
+    offline client.**
+
+    *Parameters*:
+    - `invalid_cookie` (bool): Whether the cookie was rejected.
+    - `website_down` (bool): Whether the website is down.
+    - `je_data` (dict): The fetched stats, None if fetching failed.
+    """
+    client_data = app.client_list.get('OFFLINE')
+    if not client_data or not client_data.je: return
+
+    client_data.je.invalid_cookie = invalid_cookie
+    client_data.je.website_down = website_down
+
+    if not je_data: return
+
+    percent:dict = je_data.get('current', {})
+    delta_rate:dict = je_data.get('delta-per-min', {})
+    est_time_min:dict = je_data.get('est-time-min', {})
+
+    client_data.je.health = JEStat(
+        percent=percent.get('Health'),
+        delta_rate=delta_rate.get('Health'),
+        eta_to_bounds=est_time_min.get('Health')
+    )
+    client_data.je.growth = JEStat(
+        percent=percent.get('Growth'),
+        delta_rate=delta_rate.get('Growth'),
+        eta_to_bounds=est_time_min.get('Growth')
+    )
+    client_data.je.hunger = JEStat(
+        percent=percent.get('Hunger'),
+        delta_rate=delta_rate.get('Hunger'),
+        eta_to_bounds=est_time_min.get('Hunger')
+    )
+    client_data.je.thirst = JEStat(
+        percent=percent.get('Thirst'),
+        delta_rate=delta_rate.get('Thirst'),
+        eta_to_bounds=est_time_min.get('Thirst')
+    )
+
+    client_data.je.species = je_data.get('dinosaur')
+    client_data.je.balance = je_data.get('balance')
+
+    app.update_player_list(None, True)
+
+def copied_location(coordinates:list[float]):
+    """
+    **Called by the clipboard watcher when a new location was copied.**
+    
+    *Parameters*:
+    - `coordinates` (list[float]): The copied map coordinates.
+    """
+    if sio.connected:
+        socket.emit('updated-location', coordinates)
+        return
+
+    utc_ts = int(dt.now(tz=tz.utc).timestamp())
+    outbox.push(utc_ts, coordinates)
+
+    # Copies of one burst are appended together, none is dropped
+    dispatch('offline-map', add_offline_locations,
+             [Coord(utc_timestamp=utc_ts, coordinates=coordinates)],
+             merge=lambda pending, new: (pending[0] + new[0],))
+
+def add_offline_locations(coords:list[Coord]):
+    """
+    **Runs on the Tk thread. Append copied locations to the offline client's
+    trail and render it.**
+
+    *Parameters*:
+    - `coords` (list[Coord]): The copied locations, oldest first.
+    """
+    client_data = app.client_list.get('OFFLINE')
+    if client_data:
+        client_data.coordinates.extend(coords)
+        client_data.trail_seq += len(coords)
+
+    app.render_map()
+
+async def heartbeat_task():
+    """
+    **Runs on the runtime. Sends heartbeats to the server, aswell as checks if
+    the server is flatlining in which case it will disconnect the client.**
+    """
+    while True:
         if sio.connected:
-            sio.emit('heartbeat')
+            await sio.emit('heartbeat')
 
             utc_ts = int(dt.now(tz=tz.utc).timestamp())
             if utc_ts >= last_heartbeat_utc_ts + 12:
                 lr.Log.warn('Server timed out!')
-                app.set_status_text('Server timed out!', bad=True)
-                sio.disconnect()
+                dispatch('status', lambda: app.set_status_text(
+                    'Server timed out!', bad=True
+                ))
+
+                # Reconnects since the GUI still wants a connection
+                await sio.disconnect()
 
-        time.sleep(5)
+        await asyncio.sleep(5)
 
 def on_close(root:tk.Tk):
     """
@@ -229,12 +365,16 @@ def on_close(root:tk.Tk):
     *Parameters*:
     - `root` (tk.Tk): The tkinter instance.
     """
-    global stop_threads
+    if clipboard_watcher: clipboard_watcher.stop()
+    if dispatcher: dispatcher.stop()
 
-    stop_threads = True
+    try:
+        runtime.run(sio.shutdown(), timeout=2)
+    except Exception as e:
+        lr.Log.warn(f'Issue occurred while disconnecting: {e}')
 
-    sio.disconnect()
-    sio.shutdown()
+    # Cancels fetching, heartbeats and clipboard polling mid sleep
+    runtime.stop()
     root.destroy()
     exit()
 
@@ -242,7 +382,7 @@ def main():
     """
     **Main entrypoint.**
     """
-    global app
+    global app, clipboard_watcher, dispatcher
 
     root = tk.Tk()
     root.wm_title('The Isle Map v5.3')
@@ -250,15 +390,31 @@ def main():
     root.protocol('WM_DELETE_WINDOW', lambda: on_close(root))
     root.wm_minsize(640, 360)
 
-    threads.append(threading.Thread(target=fetching_worker, daemon=True))
-    threads.append(threading.Thread(target=clipboard_worker, daemon=True))
-    threads.append(threading.Thread(target=heartbeat_worker, daemon=True))
-    
-    for thread in threads:
-        thread.start()
+    runtime.start()
+    runtime.submit(fetching_task())
+    runtime.submit(heartbeat_task())
+
+    # The runtime thread only posts, the Tk thread renders
+    dispatcher = TkDispatcher(
+        root, max_fps=CONFIG.get('map', {}).get('max_fps', 30)
+    )
+    dispatcher.start()
 
-    app = Gui(root, sio, CONFIG)
+    app = Gui(root, socket, CONFIG, dispatcher)
     app.pack(expand=True, fill='both')
+
+    clipboard:dict = CONFIG.get('clipboard', {})
+    clipboard_source = make_clipboard_source(root)
+    clipboard_watcher = ClipboardWatcher(
+        clipboard_source, copied_location,
+        min_interval=clipboard.get('min_poll_sec', 0.1),
+        max_interval=clipboard.get('max_poll_sec', 0.5)
+    )
+    if clipboard_source.needs_tk:
+        clipboard_watcher.start(root)
+    else:
+        runtime.submit(clipboard_watcher.run())
+
     app.mainloop()
 
 if __name__ == '__main__': main()
\ No newline at end of file
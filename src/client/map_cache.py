@@ -0,0 +1,346 @@
+from concurrent.futures import ThreadPoolExecutor
+from collections import OrderedDict
+from pathlib import Path
+from PIL import Image
+import json, math, mmap, shutil
+import loggerric as lr
+
+# Bands thinner than this cost more to schedule than they save
+MIN_BAND_ROWS = 64
+
+def resize_bands(image:Image.Image, size:tuple[int, int],
+                 resample:Image.Resampling, box:tuple=None,
+                 pool:ThreadPoolExecutor=None,
+                 workers:int=1) -> Image.Image:
+    """
+    **Resize an image as horizontal bands resampled concurrently.**
+
+    Pillow releases the GIL while resampling, so the bands scale across
+    cores. Every band samples the same source with a shifted box, which
+    keeps the seams identical to a single resize up to rounding.
+
+    *Parameters*:
+    - `image` (Image.Image): The image to resize.
+    - `size` (tuple[int, int]): The requested width and height.
+    - `resample` (Image.Resampling): The filter to scale with.
+    - `box` (tuple): Source region to scale, defaults to the whole image.
+    - `pool` (ThreadPoolExecutor): Pool running the bands, resized in one
+    piece when missing.
+    - `workers` (int): Amount of bands to split into. Defaults to 1.
+
+    *Returns*:
+    - (Image.Image): The resized image.
+    """
+    box = box or (0, 0, image.width, image.height)
+    bands = min(workers, size[1] // MIN_BAND_ROWS)
+    if pool is None or bands < 2:
+        return image.resize(size, resample, box=box)
+
+    rows = math.ceil(size[1] / bands)
+    scale_y = (box[3] - box[1]) / size[1]
+
+    def band(top:int) -> tuple[int, Image.Image]:
+        """
+        **Resample the rows of one band.**
+        """
+        bottom = min(size[1], top + rows)
+        return top, image.resize((size[0], bottom - top), resample, box=(
+            box[0], box[1] + top * scale_y, box[2], box[1] + bottom * scale_y
+        ))
+
+    resized = Image.new(image.mode, size)
+    for top, part in pool.map(band, range(0, size[1], rows)):
+        resized.paste(part, (0, top))
+
+    return resized
+
+class MapPyramid:
+    """
+    **Multi-resolution cache of the base map.**
+
+    Converts the base map to RGBA once and precomputes a mip pyramid by
+    repeatedly halving it. Scaled copies are resampled from the nearest level
+    that is at least as large as the requested size, and recently used exact
+    sizes are kept in a small LRU.
+
+    *Methods*:
+    - `from_file(source_path, cache_dir, min_level_size, lru_size) ->
+    MapPyramid`: Load a map through the decoded disk cache.
+    - `save(cache_dir, source_key) -> None`: Store the decoded levels on disk.
+    - `level_for(size) -> Image.Image`: The smallest level covering a size.
+    - `scaled(size, resample) -> Image.Image`: The base map scaled to an
+    exact size.
+    - `region(size, box, resample) -> Image.Image`: A region of the base map
+    scaled to an exact size, resampling only that region.
+    - `close() -> None`: Stop the resampling threads.
+    """
+    CACHE_VERSION = 1
+
+    def __init__(self, base_image:Image.Image, min_level_size:int=256,
+                 lru_size:int=8, workers:int=1):
+        """
+        **Initializer.**
+
+        *Parameters*:
+        - `base_image` (Image.Image): The full resolution base map.
+        - `min_level_size` (int): Stop halving once the longest side is below
+        this. Defaults to 256 pixels.
+        - `lru_size` (int): Amount of exact sizes to keep. Defaults to 8.
+        - `workers` (int): Threads resampling bands of large resizes
+        concurrently. Defaults to 1.
+        """
+        levels = [base_image.convert('RGBA')]
+
+        while max(levels[-1].size) // 2 >= min_level_size:
+            levels.append(levels[-1].reduce(2))
+
+        self.__setup(levels, lru_size, workers)
+
+    def __setup(self, levels:list[Image.Image], lru_size:int, workers:int):
+        """
+        **Adopt a list of decoded pyramid levels.**
+
+        *Parameters*:
+        - `levels` (list[Image.Image]): The RGBA levels, full resolution first.
+        - `lru_size` (int): Amount of exact sizes to keep.
+        - `workers` (int): Threads resampling bands concurrently.
+        """
+        self.__workers = workers
+        self.__pool = ThreadPoolExecutor(workers) if workers > 1 else None
+
+        self.levels:list[Image.Image] = levels
+
+        self.size:tuple[int, int] = self.levels[0].size
+        self.letterboxing_color:tuple = self.levels[0].getpixel((0, 0))
+
+        self.__lru_size = lru_size
+        self.__scaled:OrderedDict[tuple, Image.Image] = OrderedDict()
+
+    @classmethod
+    def from_file(cls, source_path:str, cache_dir:str=None,
+                  min_level_size:int=256, lru_size:int=8,
+                  workers:int=1) -> 'MapPyramid':
+        """
+        **Load a map, reusing its decoded levels from disk when possible.**
+
+        The first launch decodes the map as usual and stores every level as
+        raw RGBA. Later launches memory-map those files and wrap them with
+        `Image.frombuffer` without copying, so nothing is decoded and pages
+        are only read as they are touched.
+
+        *Parameters*:
+        - `source_path` (str): Path of the full resolution map file.
+        - `cache_dir` (str): Where to keep the decoded levels. Defaults to a
+        `decoded` folder next to the map.
+        - `min_level_size` (int): Stop halving once the longest side is below
+        this. Defaults to 256 pixels.
+        - `lru_size` (int): Amount of exact sizes to keep. Defaults to 8.
+        - `workers` (int): Threads resampling bands of large resizes
+        concurrently. Defaults to 1.
+
+        *Returns*:
+        - (MapPyramid): The pyramid of the map.
+        """
+        source = Path(source_path)
+        cache_dir = Path(cache_dir or source.parent/'decoded'/source.stem)
+
+        stat = source.stat()
+        source_key = {
+            'version': MapPyramid.CACHE_VERSION, 'source': source.name,
+            'bytes': stat.st_size, 'mtime_ns': stat.st_mtime_ns,
+            'min_level_size': min_level_size
+        }
+
+        levels = MapPyramid.__load_levels(cache_dir, source_key)
+        if levels:
+            pyramid = cls.__new__(cls)
+            pyramid.__setup(levels, lru_size, workers)
+            return pyramid
+
+        with Image.open(source) as image:
+            pyramid = cls(image, min_level_size, lru_size, workers)
+
+        try:
+            pyramid.save(cache_dir, source_key)
+        except OSError as e:
+            lr.Log.warn(f'Could not write the decoded map cache: {e}')
+
+        return pyramid
+
+    @staticmethod
+    def __load_levels(cache_dir:Path, source_key:dict) -> list[Image.Image]:
+        """
+        **Memory-map the decoded levels, ignoring a missing or stale cache.**
+
+        *Parameters*:
+        - `cache_dir` (Path): Folder of the decoded levels.
+        - `source_key` (dict): Identifies the source the cache must belong to.
+
+        *Returns*:
+        - (list[Image.Image]): The read-only levels, or None.
+        """
+        try:
+            with open(cache_dir / 'index.json', 'r') as file:
+                index:dict = json.load(file)
+        except (OSError, ValueError):
+            return None
+
+        if index.get('source_key') != source_key:
+            return None
+
+        levels = []
+        try:
+            for number, size in enumerate(index['level_sizes']):
+                with open(cache_dir / f'{number}.rgba', 'rb') as file:
+                    buffer = mmap.mmap(file.fileno(), 0,
+                                       access=mmap.ACCESS_READ)
+
+                # The image keeps the mapping alive, the file can be closed
+                levels.append(Image.frombuffer('RGBA', tuple(size), buffer,
+                                               'raw', 'RGBA', 0, 1))
+        except (OSError, ValueError) as e:
+            lr.Log.warn(f'Ignoring the decoded map cache: {e}')
+            return None
+
+        return levels
+
+    def save(self, cache_dir:str, source_key:dict):
+        """
+        **Store every level as raw RGBA, loadable by `from_file`.**
+
+        *Parameters*:
+        - `cache_dir` (str): Folder to write the decoded levels to.
+        - `source_key` (dict): Identifies the source of the levels.
+        """
+        cache_dir = Path(cache_dir)
+        lr.Log.info(f'Writing decoded map cache in "{cache_dir}"')
+
+        shutil.rmtree(cache_dir, ignore_errors=True)
+        cache_dir.mkdir(parents=True)
+
+        for number, level in enumerate(self.levels):
+            with open(cache_dir / f'{number}.rgba', 'wb') as file:
+                file.write(level.tobytes())
+
+        # Written last so an interrupted write is redone next launch
+        with open(cache_dir / 'index.json', 'w') as file:
+            json.dump({
+                'source_key': source_key,
+                'level_sizes': [level.size for level in self.levels]
+            }, file)
+
+    def level_for(self, size:tuple[int, int]) -> Image.Image:
+        """
+        **The smallest pyramid level that is at least as large as a size.**
+
+        *Parameters*:
+        - `size` (tuple[int, int]): The requested width and height.
+
+        *Returns*:
+        - (Image.Image): The pyramid level to resample from.
+        """
+        for level in reversed(self.levels):
+            if level.width >= size[0] and level.height >= size[1]:
+                return level
+
+        # Upscaling past full resolution always starts from the full map
+        return self.levels[0]
+
+    def __cached(self, size:tuple[int, int],
+                 resample:Image.Resampling) -> Image.Image:
+        """
+        **A cached exact size, preferring full quality over the requested
+        filter since it costs nothing extra.**
+
+        *Parameters*:
+        - `size` (tuple[int, int]): The requested width and height.
+        - `resample` (Image.Resampling): The requested filter.
+
+        *Returns*:
+        - (Image.Image): The cached scaled map, or None.
+        """
+        for key in [(size, Image.Resampling.LANCZOS), (size, resample)]:
+            if key in self.__scaled:
+                self.__scaled.move_to_end(key)
+                return self.__scaled[key]
+
+        return None
+
+    def scaled(self, size:tuple[int, int],
+               resample:Image.Resampling=Image.Resampling.LANCZOS
+               ) -> Image.Image:
+        """
+        **The base map scaled to an exact size.**
+
+        *Parameters*:
+        - `size` (tuple[int, int]): The requested width and height.
+        - `resample` (Image.Resampling): The filter to scale with. Defaults to
+        LANCZOS, cheaper filters are used while interacting.
+
+        *Returns*:
+        - (Image.Image): The scaled RGBA map, shared with the cache so it must
+        not be drawn onto.
+        """
+        scaled = self.__cached(size, resample)
+        if scaled is not None: return scaled
+
+        level = self.level_for(size)
+        if level.size == size:
+            scaled = level
+        else:
+            scaled = resize_bands(level, size, resample, pool=self.__pool,
+                                  workers=self.__workers)
+
+        self.__scaled[(size, resample)] = scaled
+        if len(self.__scaled) > self.__lru_size:
+            self.__scaled.popitem(last=False)
+
+        return scaled
+
+    def region(self, size:tuple[int, int], box:tuple[int, int, int, int],
+               resample:Image.Resampling=Image.Resampling.LANCZOS
+               ) -> Image.Image:
+        """
+        **A region of the base map scaled to an exact size, resampling only
+        that region.**
+
+        Reuses a cached or cheap full scale when one exists, otherwise only
+        the source pixels behind `box` are resampled, so the cost follows the
+        region size rather than the zoom level.
+
+        *Parameters*:
+        - `size` (tuple[int, int]): The width and height of the whole scaled
+        map.
+        - `box` (tuple[int, int, int, int]): The left, top, right and bottom
+        of the region in scaled map pixels.
+        - `resample` (Image.Resampling): The filter to scale with. Defaults to
+        LANCZOS.
+
+        *Returns*:
+        - (Image.Image): The scaled region.
+        """
+        scaled = self.__cached(size, resample)
+        if scaled is not None: return scaled.crop(box)
+
+        box_w, box_h = box[2] - box[0], box[3] - box[1]
+
+        # Scaling the whole map is about as cheap, and warms the cache for pans
+        if size[0] * size[1] <= 2 * box_w * box_h:
+            return self.scaled(size, resample).crop(box)
+
+        level = self.level_for(size)
+        fx, fy = level.width / size[0], level.height / size[1]
+
+        return resize_bands(
+            level, (box_w, box_h), resample,
+            (box[0] * fx, box[1] * fy, box[2] * fx, box[3] * fy),
+            self.__pool, self.__workers
+        )
+
+    def close(self):
+        """
+        **Stop the resampling threads, later resizes run on the calling
+        thread.**
+        """
+        if self.__pool: self.__pool.shutdown(wait=False)
+        self.__pool = None
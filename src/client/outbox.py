@@ -0,0 +1,88 @@
+from collections import deque
+from pathlib import Path
+import threading, json
+import loggerric as lr
+
+class LocationOutbox:
+    """
+    **Queue of locations captured while offline, waiting for the server.**
+
+    Every location is kept with the time it was captured and written to
+    disk, so a restart does not lose it either. On connect the whole queue
+    is sent as a single batch and only dropped once the server acknowledged
+    it, a batch lost to a dropped connection is sent again next time.
+
+    *Methods*:
+    - `push(utc_ts, coordinates) -> None`: Queue a captured location.
+    - `pending() -> list`: A snapshot of the queued locations.
+    - `acknowledge(count) -> None`: Drop the oldest sent locations.
+    """
+    def __init__(self, path:str|Path=None, max_size:int=1024):
+        """
+        **Initializer. Loads locations queued by an earlier run.**
+
+        *Parameters*:
+        - `path` (str|Path): File to persist the queue in, kept in memory only if
+        missing.
+        - `max_size` (int): Most locations to keep, the oldest are dropped
+        first. Defaults to 1024.
+        """
+        self.__path = Path(path) if path else None
+        self.__lock = threading.Lock()
+        self.__queue:deque[list] = deque(maxlen=max_size)
+
+        if not self.__path: return
+
+        try:
+            with open(self.__path, 'r') as file:
+                self.__queue.extend(json.load(file))
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            lr.Log.warn(f'Ignoring unreadable location outbox: {e}')
+
+    def __save(self):
+        """
+        **Write the queue to disk. Must be called with the lock held.**
+        """
+        if not self.__path: return
+
+        try:
+            with open(self.__path, 'w') as file:
+                json.dump(list(self.__queue), file)
+        except OSError as e:
+            lr.Log.warn(f'Could not persist the location outbox: {e}')
+
+    def push(self, utc_ts:int, coordinates:list[float]):
+        """
+        **Queue a captured location.**
+
+        *Parameters*:
+        - `utc_ts` (int): When the location was captured.
+        - `coordinates` (list[float]): The map coordinates.
+        """
+        with self.__lock:
+            self.__queue.append([utc_ts, *coordinates])
+            self.__save()
+
+    def pending(self) -> list[list]:
+        """
+        **A snapshot of the queued locations, oldest first.**
+
+        *Returns*:
+        - (list[list]): `[utc_ts, x, y]` entries.
+        """
+        with self.__lock:
+            return list(self.__queue)
+
+    def acknowledge(self, count:int):
+        """
+        **Drop the oldest locations once the server stored them.**
+
+        *Parameters*:
+        - `count` (int): How many locations were sent.
+        """
+        with self.__lock:
+            for _ in range(min(count, len(self.__queue))):
+                self.__queue.popleft()
+            self.__save()
@@ -0,0 +1,301 @@
+from bisect import bisect_right
+from array import array
+import time
+
+def new_points(previous:list[tuple], coords:list[tuple],
+               previous_seq:int=None, seq:int=None,
+               base:int=None) -> list[tuple]:
+    """
+    **The points of a trail window that were not in the previous window.**
+
+    Trails arrive as a sliding window of the latest positions. With the
+    server's arrival counter the new points are the last `seq -
+    previous_seq` of the window, so a player standing still still counts.
+    Without it, e.g. from an older server, they are whatever follows the
+    overlap with the last window, which can not tell repeated positions
+    from no update.
+
+    *Parameters*:
+    - `previous` (list[tuple]): The previous window.
+    - `coords` (list[tuple]): The current window.
+    - `previous_seq` (int): Arrival counter of the previous window.
+    - `seq` (int): Arrival counter of the current window.
+    - `base` (int): Counter the window was last rebuilt at, by older
+    points inserted into it. Only points appended since are new to a
+    previous window from before it.
+
+    *Returns*:
+    - (list[tuple]): The new points, the whole window without an overlap.
+    """
+    if seq is not None:
+        # A first window or a restarted counter is new as a whole
+        if previous_seq is None or seq < previous_seq: return coords
+
+        since = max(previous_seq, base or previous_seq)
+        return coords[max(0, len(coords) - (seq - since)):]
+
+    # Longest tail of the previous window that starts the new one
+    for start in range(len(previous)):
+        overlap = len(previous) - start
+        if previous[start:] == coords[:overlap]:
+            return coords[overlap:]
+
+    return coords
+
+class Track:
+    """
+    **Every point of one player in time order, as compact arrays.**
+
+    *Attributes*:
+    - `times` (array): Arrival time of every point.
+    - `ys` (array): First coordinate of every point.
+    - `xs` (array): Second coordinate of every point.
+    - `cuts` (array): Times the trail was reset, older points are not part
+    of the trail after them.
+    """
+    def __init__(self):
+        """
+        **Initializer.**
+        """
+        self.times = array('d')
+        self.ys = array('f')
+        self.xs = array('f')
+        self.cuts = array('d')
+
+    def trail(self, timestamp:float, length:int) -> list[tuple]:
+        """
+        **The trail as it was at a point in time.**
+
+        *Parameters*:
+        - `timestamp` (float): The point in time.
+        - `length` (int): Most points in a trail.
+
+        *Returns*:
+        - (list[tuple]): The latest points up to the time, oldest first.
+        """
+        end = bisect_right(self.times, timestamp)
+
+        start = max(0, end - length)
+        cut = bisect_right(self.cuts, timestamp)
+        if cut:
+            start = max(start, bisect_right(self.times, self.cuts[cut - 1]))
+
+        return [(self.ys[i], self.xs[i]) for i in range(start, end)]
+
+    def drop_before(self, timestamp:float, keep:int=0):
+        """
+        **Forget points and cuts older than a point in time.**
+
+        *Parameters*:
+        - `timestamp` (float): The oldest time to keep.
+        - `keep` (int): Older points to keep anyway, so the trail at the time
+        stays whole. Defaults to 0.
+        """
+        end = max(0, bisect_right(self.times, timestamp) - keep)
+
+        # Points before a dropped cut are never part of a trail again
+        cut = bisect_right(self.cuts, timestamp)
+        if cut: end = max(end, bisect_right(self.times, self.cuts[cut - 1]))
+
+        del self.times[:end], self.ys[:end], self.xs[:end]
+        del self.cuts[:cut]
+
+class TrailHistory:
+    """
+    **Time-travel store of the trails and pins of every player.**
+
+    Points are appended per player to time sorted arrays as they arrive.
+    Which players were present and where their pins were is kept as periodic
+    keyframes with the changes in between. Seeking bisects to the last
+    keyframe, applies the few changes after it and bisects every trail, so
+    it costs O(log n) and never replays from the start. Must be used from a
+    single thread.
+
+    *Methods*:
+    - `observe(coordinate_map, pin_map, timestamp, seq_map) -> None`: Record
+    a map state.
+    - `seek(timestamp) -> tuple`: The map state at a point in time.
+    - `span() -> tuple`: The oldest and newest recorded time.
+    - `clear() -> None`: Forget everything.
+    """
+    def __init__(self, trail_length:int=16, keyframe_sec:float=60.0,
+                 max_age_min:float=240.0):
+        """
+        **Initializer.**
+
+        *Parameters*:
+        - `trail_length` (int): Points per trail when seeking. Defaults to
+        16, the length the server keeps.
+        - `keyframe_sec` (float): Seconds between keyframes, bounds the
+        changes applied per seek. Defaults to 60.
+        - `max_age_min` (float): Minutes of history to keep. Defaults to 240.
+        """
+        self.__trail_length = trail_length
+        self.__keyframe_sec = keyframe_sec
+        self.__max_age_sec = max_age_min * 60
+        self.clear()
+
+    def clear(self):
+        """
+        **Forget everything.**
+        """
+        self.__tracks:dict[str, Track] = {}
+        self.__windows:dict[str, list[tuple]] = {}
+        self.__seqs:dict[str, int] = {}
+
+        # Present players and their pins, live and as keyframes
+        self.__state:dict[str, tuple] = {}
+        self.__key_times = array('d')
+        self.__keyframes:list[dict[str, tuple]] = []
+
+        # Joins, leaves and pin moves, every keyframe notes how many came
+        # before it counting the pruned ones
+        self.__change_times = array('d')
+        self.__changes:list[tuple[str, bool, tuple]] = []
+        self.__key_changes = array('q')
+        self.__pruned_changes = 0
+
+        self.__latest:float = None
+
+    def span(self) -> tuple[float, float]:
+        """
+        **The oldest and newest recorded time.**
+
+        *Returns*:
+        - (tuple[float, float]): The time range, None if nothing was
+        recorded.
+        """
+        if not self.__key_times: return None
+
+        return self.__key_times[0], self.__latest
+
+    def observe(self, coordinate_map:dict[str, list],
+                pin_map:dict[str, tuple], timestamp:float=None,
+                seq_map:dict[str, int]=None):
+        """
+        **Record a map state, only what changed since the last one is
+        stored.**
+
+        *Parameters*:
+        - `coordinate_map` (dict[str, list]): The trails keyed by color.
+        - `pin_map` (dict[str, tuple]): The pins keyed by color.
+        - `timestamp` (float): When the state arrived. Defaults to now.
+        - `seq_map` (dict[str, tuple]): `(seq, base)` arrival counters of
+        the trails keyed by color, new points are matched by content if
+        missing.
+        """
+        timestamp = max(timestamp or time.time(), self.__latest or 0)
+        self.__latest = timestamp
+
+        for color, coords in coordinate_map.items():
+            coords = [tuple(coord) for coord in coords]
+            previous = self.__windows.get(color, [])
+            self.__windows[color] = coords
+
+            seq, base = (seq_map or {}).get(color) or (None, None)
+            previous_seq = self.__seqs.get(color)
+            if seq is not None: self.__seqs[color] = seq
+
+            track = self.__tracks.setdefault(color, Track())
+            if previous and not coords:
+                track.cuts.append(timestamp)
+
+            for y, x in new_points(previous, coords, previous_seq, seq,
+                                   base):
+                track.times.append(timestamp)
+                track.ys.append(y)
+                track.xs.append(x)
+
+            pin = tuple(pin_map.get(color) or ())
+            if self.__state.get(color) != pin:
+                self.__state[color] = pin
+                self.__change(timestamp, color, True, pin)
+
+        for color in [c for c in self.__state if c not in coordinate_map]:
+            del self.__state[color]
+            self.__windows.pop(color, None)
+            self.__seqs.pop(color, None)
+
+            # A later player of the same color starts a new trail
+            if color in self.__tracks:
+                self.__tracks[color].cuts.append(timestamp)
+            self.__change(timestamp, color, False, None)
+
+        if (not self.__key_times
+                or timestamp - self.__key_times[-1] >= self.__keyframe_sec):
+            self.__key_times.append(timestamp)
+            self.__keyframes.append(dict(self.__state))
+            self.__key_changes.append(self.__pruned_changes
+                                      + len(self.__changes))
+            self.__prune(timestamp - self.__max_age_sec)
+
+    def __change(self, timestamp:float, color:str, present:bool, pin:tuple):
+        """
+        **Log a join, leave or pin move.**
+
+        *Parameters*:
+        - `timestamp` (float): When it happened.
+        - `color` (str): The player's color.
+        - `present` (bool): Whether the player is present afterwards.
+        - `pin` (tuple): The player's pin afterwards.
+        """
+        self.__change_times.append(timestamp)
+        self.__changes.append((color, present, pin))
+
+    def __prune(self, cutoff:float):
+        """
+        **Forget history older than a point in time, keeping the keyframe
+        that covers it.**
+
+        *Parameters*:
+        - `cutoff` (float): The oldest time to keep.
+        """
+        first = bisect_right(self.__key_times, cutoff) - 1
+        if first <= 0: return
+
+        since = self.__key_times[first]
+        end = self.__key_changes[first] - self.__pruned_changes
+        del self.__key_times[:first], self.__keyframes[:first]
+        del self.__key_changes[:first]
+
+        del self.__change_times[:end], self.__changes[:end]
+        self.__pruned_changes += end
+
+        for color in list(self.__tracks):
+            track = self.__tracks[color]
+            track.drop_before(since, self.__trail_length)
+            if not track.times and color not in self.__state:
+                del self.__tracks[color]
+
+    def seek(self, timestamp:float) -> tuple[dict[str, list],
+                                             dict[str, tuple]]:
+        """
+        **The map state at a point in time.**
+
+        *Parameters*:
+        - `timestamp` (float): The point in time.
+
+        *Returns*:
+        - (tuple[dict[str, list], dict[str, tuple]]): Trails and pins keyed
+        by color, like the server sends them.
+        """
+        frame = bisect_right(self.__key_times, timestamp) - 1
+        if frame < 0: return {}, {}
+
+        # The keyframe, then only the changes after it up to the time
+        state = dict(self.__keyframes[frame])
+        start = self.__key_changes[frame] - self.__pruned_changes
+        end = bisect_right(self.__change_times, timestamp)
+        for color, present, pin in self.__changes[start:end]:
+            if present:
+                state[color] = pin
+            else:
+                state.pop(color, None)
+
+        coordinate_map = {
+            color: self.__tracks[color].trail(timestamp, self.__trail_length)
+            for color in state if color in self.__tracks
+        }
+        pin_map = { color: pin for color, pin in state.items() if pin }
+
+        return coordinate_map, pin_map
@@ -0,0 +1,126 @@
+from typing import Awaitable, Callable
+import concurrent.futures, asyncio, random
+import loggerric as lr
+
+from client.runtime import AsyncRuntime
+
+class ConnectionRejected(Exception):
+    """
+    **Raised by a connect attempt the server refused, e.g. for a wrong
+    password. Retrying can not fix it, so connecting stops.**
+    """
+
+class Reconnector:
+    """
+    **Connects on the runtime, retrying a lost connection with jittered
+    exponential backoff.**
+
+    Every retry waits a random time between zero and an exponentially
+    growing cap, so clients dropped by the same server hiccup do not all
+    reconnect at the same moment. Attempts and waits are one task on the
+    runtime, cancelling it stops them mid sleep. An attempt raising
+    `ConnectionRejected` stops retrying.
+
+    *Methods*:
+    - `connect(on_failure) -> None`: Make one attempt now unless already
+    connecting.
+    - `start() -> None`: Start retrying unless already connecting.
+    - `cancel() -> None`: Stop connecting.
+    - `active() -> bool`: Whether it is currently connecting.
+    """
+    def __init__(self, runtime:AsyncRuntime,
+                 connect:Callable[[], Awaitable[bool]], base_delay:float=1.0,
+                 max_delay:float=30.0):
+        """
+        **Initializer.**
+
+        *Parameters*:
+        - `runtime` (AsyncRuntime): The runtime to connect on.
+        - `connect` (Callable): Coroutine function making one connection
+        attempt, returns whether it succeeded. Raises `ConnectionRejected`
+        if the server refused it.
+        - `base_delay` (float): Cap of the first delay in seconds. Defaults to
+        1.
+        - `max_delay` (float): Largest cap in seconds. Defaults to 30.
+        """
+        self.__runtime = runtime
+        self.__connect = connect
+        self.__base_delay = base_delay
+        self.__max_delay = max_delay
+
+        self.__task:concurrent.futures.Future = None
+
+    def active(self) -> bool:
+        """
+        **Whether it is currently connecting.**
+
+        *Returns*:
+        - (bool): True while an attempt or a retry is pending.
+        """
+        return self.__task is not None and not self.__task.done()
+
+    def connect(self, on_failure:Callable[[], None]=None):
+        """
+        **Make one attempt now, unless already connecting.**
+
+        *Parameters*:
+        - `on_failure` (Callable): Called on the runtime if the attempt
+        failed.
+        """
+        if self.active(): return
+
+        self.__task = self.__runtime.submit(self.__attempt(on_failure))
+
+    async def __attempt(self, on_failure:Callable[[], None]):
+        """
+        **Runs on the runtime. Makes one attempt to connect.**
+
+        *Parameters*:
+        - `on_failure` (Callable): Called if the attempt failed.
+        """
+        try:
+            connected = await self.__connect()
+        except ConnectionRejected as e:
+            lr.Log.error(f'Connection rejected: {e}')
+            connected = False
+
+        if not connected and on_failure: on_failure()
+
+    def start(self):
+        """
+        **Start retrying, unless already connecting.**
+        """
+        if self.active(): return
+
+        self.__task = self.__runtime.submit(self.__retry())
+
+    async def __retry(self):
+        """
+        **Runs on the runtime. Attempts to connect until it succeeds or is
+        cancelled.**
+        """
+        attempt = 0
+        while True:
+            cap = min(self.__max_delay, self.__base_delay * 2 ** attempt)
+            delay = random.uniform(0, cap)
+            lr.Log.info(f'Reconnecting in {delay:.1f}s!')
+
+            await asyncio.sleep(delay)
+            attempt += 1
+
+            try:
+                connected = await self.__connect()
+            except ConnectionRejected as e:
+                lr.Log.error(f'Stopped reconnecting, rejected: {e}')
+                return
+
+            if connected:
+                lr.Log.info(f'Reconnected after {attempt} attempts!')
+                return
+
+    def cancel(self):
+        """
+        **Stop connecting.**
+        """
+        if self.__task is not None: self.__task.cancel()
+        self.__task = None
@@ -0,0 +1,104 @@
+from typing import Callable, Optional
+from dataclasses import dataclass
+from PIL import Image
+import threading
+import loggerric as lr
+
+@dataclass(frozen=True)
+class RenderRequest:
+    """
+    **Everything needed to render one frame, copied off the Tk thread.**
+    """
+    width:int
+    height:int
+    coordinate_map:dict[str, list]
+    pin_map:dict[str, tuple]
+    zoom:float
+    pan:tuple[int, int]
+    resample:Image.Resampling
+    grid:bool=True
+    heatmap_version:int=None
+
+class RenderWorker:
+    """
+    **Renders frames on a background thread.**
+
+    Requests go into a single latest-wins slot, so a request that is replaced
+    before the worker picks it up is dropped and only the newest state is
+    ever rendered.
+
+    *Methods*:
+    - `submit(request) -> None`: Replace the pending request.
+    - `stop() -> None`: Stop the worker and join the thread.
+    """
+    def __init__(self, render:Callable[[RenderRequest], Image.Image],
+                 on_done:Callable[[RenderRequest, Image.Image], None]):
+        """
+        **Initializer. Starts the worker thread.**
+
+        *Parameters*:
+        - `render` (Callable): Renders a request into an image, only ever
+        called from the worker thread.
+        - `on_done` (Callable): Receives each finished frame on the worker
+        thread, it should hand the image over to the Tk thread.
+        """
+        self.__render = render
+        self.__on_done = on_done
+
+        self.__lock = threading.Lock()
+        self.__wakeup = threading.Event()
+        self.__pending:Optional[RenderRequest] = None
+        self.__stopped = False
+
+        self.dropped = 0
+
+        self.__thread = threading.Thread(target=self.__run, daemon=True)
+        self.__thread.start()
+
+    def submit(self, request:RenderRequest):
+        """
+        **Replace the pending request, dropping the previous one if it was
+        not started yet.**
+
+        *Parameters*:
+        - `request` (RenderRequest): The newest state to render.
+        """
+        with self.__lock:
+            if self.__pending is not None:
+                self.dropped += 1
+            self.__pending = request
+
+        self.__wakeup.set()
+
+    def stop(self):
+        """
+        **Stop the worker and join the thread.**
+        """
+        self.__stopped = True
+        self.__wakeup.set()
+
+        if threading.current_thread() is not self.__thread:
+            self.__thread.join(timeout=1)
+
+    def __run(self):
+        """
+        **Called by a thread. Renders the newest request until stopped.**
+        """
+        while True:
+            self.__wakeup.wait()
+
+            with self.__lock:
+                request = self.__pending
+                self.__pending = None
+                self.__wakeup.clear()
+
+            if self.__stopped: return
+            if request is None: continue
+
+            try:
+                image = self.__render(request)
+            except Exception as e:
+                lr.Log.error(f'Rendering failed: {e}')
+                continue
+
+            self.__on_done(request, image)
@@ -1,6 +1,15 @@
 from PIL import Image, ImageDraw
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
-import sys
+import math, sys
+
+# NumPy is optional, bundled builds without it fall back to plain Python
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
 # Handle both normal execution and PyInstaller bundled exe
 if getattr(sys, 'frozen', False):
@@ -14,6 +23,8 @@ if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
 
 from shared.colors import darken_hex_color
+from client.map_cache import MapPyramid
+from client.tiles import TileCache
 
 def translate_coords(coord:tuple[float, float], image_size:tuple[int, int],
                      bounds:dict) -> tuple[int, int]:
@@ -47,114 +58,664 @@ def translate_coords(coord:tuple[float, float], image_size:tuple[int, int],
 
     return int(px), int(py)
 
-def render_scaled_image(base_image:Image.Image, target_width:int,
-                        target_height:int, coordinates:dict[str, list[tuple]],
-                        zoom:float, panning:tuple[float, float],
-                        pin_map:dict[str, tuple],
-                        bounds:dict[str, int]) -> Image.Image:
+@dataclass(frozen=True)
+class View:
     """
-    **Render a scaled image of the map, rendering coords and chess grid.**
-    
+    **The view transform of a rendered frame.**
+
+    *Attributes*:
+    - `target_size` (tuple[int, int]): Size of the rendered frame.
+    - `map_size` (tuple[int, int]): Size of the whole map at this zoom.
+    - `offset` (tuple[int, int]): Position of the map's top left corner in
+    the frame.
+    """
+    target_size:tuple[int, int]
+    map_size:tuple[int, int]
+    offset:tuple[int, int]
+
+def compute_view(base_size:tuple[int, int], target_width:int,
+                 target_height:int, zoom:float,
+                 panning:tuple[float, float], margin:int=0) -> View:
+    """
+    **Compute the view transform for a frame.**
+
     *Parameters*:
-    - `base_image` (Image.Image): The base image of the map.
+    - `base_size` (tuple[int, int]): Full resolution size of the map.
     - `target_width` (int): The target width of the image.
     - `target_height` (int): The target height of the image.
-    - `coordinates` (dict[str, list[tuple]]): Coordinates of all clients to
-    render onto the map.
-    - `bounds` (dict[str, int]): Bounds of the ingame map so the coords can be
-    correctly translated onto the map.
-    
+    - `zoom` (float): The zoom level, 1.0 fits the map to the frame.
+    - `panning` (tuple[float, float]): The pan offset in frame pixels.
+    - `margin` (int): Extra border rendered around the target on every side,
+    it does not affect the fit. Defaults to 0.
+
     *Returns*:
-    - (Image.Image): The rendered image.
+    - (View): The view transform.
     """
-
-    base_width, base_height = base_image.size
+    base_width, base_height = base_size
     scale = min(target_width / base_width, target_height / base_height) * zoom
     new_size = (int(base_width * scale), int(base_height * scale))
-    
-    resized = base_image.resize(new_size, Image.Resampling.LANCZOS)
-    resized = resized.convert('RGBA')
 
-    letterboxing_color = resized.getpixel((0, 0))
-    canvas = Image.new('RGBA', (target_width, target_height), letterboxing_color)
+    offset_x = (target_width - new_size[0]) // 2 + panning[0] + margin
+    offset_y = (target_height - new_size[1]) // 2 + panning[1] + margin
 
-    offset_x = (target_width - new_size[0]) // 2 + panning[0]
-    offset_y = (target_height - new_size[1]) // 2 + panning[1]
+    return View((target_width + 2 * margin, target_height + 2 * margin),
+                new_size, (offset_x, offset_y))
 
-    canvas.paste(resized, (offset_x, offset_y))
+def view_affine(view:View, bounds:dict) -> tuple[float, float, float, float]:
+    """
+    **Precompute the affine transform from world coordinates to map pixels.**
 
-    overlay = Image.new('RGBA', (target_width, target_height), (0, 0, 0, 0))
-    draw = ImageDraw.Draw(overlay)
+    Equivalent to `translate_coords`, as `x = ax * coord[1] + bx` and
+    `y = ay * coord[0] + by`, before truncation and the view offset.
 
-    # Pin locations
-    for color, pin_scale in pin_map.items():
-        if not pin_scale: continue
+    *Parameters*:
+    - `view` (View): The view transform.
+    - `bounds` (dict): Dictionary with min/max bounds for x and y.
 
-        x = new_size[0] * pin_scale[0] + offset_x
-        y = new_size[1] * pin_scale[1] + offset_y
+    *Returns*:
+    - (tuple[float, float, float, float]): The `ax`, `bx`, `ay` and `by`
+    coefficients.
+    """
+    w, h = view.map_size
 
-        radius = int(new_size[0] * 0.03)
+    ax = w / (bounds['max_x'] - bounds['min_x'])
+    ay = -h / (bounds['max_y'] - bounds['min_y'])
 
-        draw.circle((x, y), radius=radius, fill=None, outline=color, width=2)
+    return ax, -bounds['min_x'] * ax, ay, h - bounds['min_y'] * ay
+
+def transform_points(coordinates:dict[str, list[tuple]], view:View,
+                     bounds:dict) -> dict[str, list[tuple[int, int]]]:
+    """
+    **Translate every player's coordinates to frame pixels in one batch.**
+
+    *Parameters*:
+    - `coordinates` (dict[str, list[tuple]]): Coordinates keyed by color.
+    - `view` (View): The view transform.
+    - `bounds` (dict): Dictionary with min/max bounds for x and y.
+
+    *Returns*:
+    - (dict[str, list[tuple[int, int]]]): Frame pixels keyed by color.
+    """
+    ax, bx, ay, by = view_affine(view, bounds)
+    offset_x, offset_y = view.offset
+
+    if np is None:
+        return {
+            color: [
+                (int(ax * coord[1] + bx) + offset_x,
+                 int(ay * coord[0] + by) + offset_y)
+                for coord in coordlist
+            ]
+            for color, coordlist in coordinates.items()
+        }
+
+    counts = [len(coordlist) for coordlist in coordinates.values()]
+    points = [
+        coord for coordlist in coordinates.values() for coord in coordlist
+    ]
+    if not points:
+        return { color: [] for color in coordinates }
+
+    # Same truncation toward zero as int(), then shift into the frame
+    world = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    screen = np.empty((len(world), 2), dtype=np.int64)
+    screen[:, 0] = np.trunc(world[:, 1] * ax + bx) + offset_x
+    screen[:, 1] = np.trunc(world[:, 0] * ay + by) + offset_y
+
+    translated = {}
+    start = 0
+    for color, count in zip(coordinates, counts):
+        translated[color] = [
+            (x, y) for x, y in screen[start:start + count].tolist()
+        ]
+        start += count
+
+    return translated
+
+@lru_cache(maxsize=64)
+def player_palette(color:str) -> tuple[str, str]:
+    """
+    **The trail line and history dot colors of a player.**
+
+    *Parameters*:
+    - `color` (str): The player's hex color.
+
+    *Returns*:
+    - (tuple[str, str]): The line color and history dot color.
+    """
+    try:
+        history_dot_color = darken_hex_color(color, 0.2)
+    except Exception:
+        history_dot_color = color
+
+    return darken_hex_color(color, 0.4), history_dot_color
+
+def draw_grid(draw:ImageDraw.ImageDraw, view:View):
+    """
+    **Draw the chess grid and its labels, only inside the viewport.**
+
+    *Parameters*:
+    - `draw` (ImageDraw.ImageDraw): Draw context of a frame sized overlay.
+    - `view` (View): The view transform.
+    """
+    target_width, target_height = view.target_size
+    new_size = view.map_size
+    offset_x, offset_y = view.offset
 
-    # Location lines
-    for color, coordlist in coordinates.items():
-        # Precompute coords
-        translated = []
-        for coords in coordlist:
-            x, y = translate_coords(coords, new_size, bounds)
-            translated.append((x + offset_x, y + offset_y))
-        
-        # Draw connecting line
-        if len(translated) > 1:
-            for i in range(len(translated) - 1):
-                draw.line(
-                    (translated[i], translated[i + 1]),
-                    fill=darken_hex_color(color, 0.4),
-                    width=int(new_size[0] * 0.005)
-                )
-        
-        # Draw dots
-        for i, (x, y) in enumerate(translated):
-            if i == len(translated) - 1:
-                radius = int(new_size[0] * 0.008)
-                draw.ellipse(
-                    (x - radius, y - radius, x + radius, y + radius),
-                    fill=color, outline='#ffffff', width=1
-                )
-            else:
-                radius = int(new_size[0] * 0.005)
-                try:
-                    history_dot_color = darken_hex_color(color, 0.2)
-                except Exception:
-                    history_dot_color = color
-                
-                draw.ellipse(
-                    (x - radius, y - radius, x + radius, y + radius),
-                    fill=history_dot_color, outline=None
-                )
-
-    # Chess grid
     cell_size = new_size[0] / 8
 
     color = (255, 255, 255, 128)
 
+    top = max(0, offset_y)
+    bottom = min(target_height, offset_y + new_size[0])
+    left = max(0, offset_x)
+    right = min(target_width, offset_x + new_size[0])
+
     for c in range(9):
         x = offset_x + (c * cell_size)
-        draw.line((x, offset_y, x, offset_y + new_size[0]), fill=color, width=1)
+        if not 0 <= x <= target_width or top > bottom: continue
+        draw.line((x, top, x, bottom), fill=color, width=1)
     
     for r in range(9):
         y = offset_y + (r * cell_size)
-        draw.line((offset_x, y, offset_x + new_size[0], y), fill=color, width=1)
+        if not 0 <= y <= target_height or left > right: continue
+        draw.line((left, y, right, y), fill=color, width=1)
     
     for c in range(8):
         x = offset_x + (c * cell_size) + 15
         y = offset_y + 5
+        if not (-10 <= x <= target_width and -10 <= y <= target_height):
+            continue
         draw.text((x, y), 'ABCDEFGH'[c], fill=color)
     
     for r in range(8):
         x = offset_x + 5
         y = offset_y + (r * cell_size) + 15
+        if not (-10 <= x <= target_width and -10 <= y <= target_height):
+            continue
         draw.text((x, y), str(r + 1), fill=color)
+
+def render_base_layer(base_map:MapPyramid | TileCache, view:View,
+                      resample:Image.Resampling=Image.Resampling.LANCZOS,
+                      grid:bool=True) -> Image.Image:
+    """
+    **Render the static layer of a frame, the visible map and chess grid.**
+
+    *Parameters*:
+    - `base_map` (MapPyramid | TileCache): The pyramid or tile cache of the
+    base map.
+    - `view` (View): The view transform.
+    - `resample` (Image.Resampling): The filter to scale the map with.
+    Defaults to LANCZOS.
+    - `grid` (bool): Draw the chess grid. Defaults to true.
+
+    *Returns*:
+    - (Image.Image): The static layer.
+    """
+    target_width, target_height = view.target_size
+    new_size = view.map_size
+    offset_x, offset_y = view.offset
+
+    canvas = Image.new('RGBA', view.target_size, base_map.letterboxing_color)
+
+    # Visible part of the scaled map, only this region gets resampled
+    box = (
+        max(0, -offset_x), max(0, -offset_y),
+        min(new_size[0], target_width - offset_x),
+        min(new_size[1], target_height - offset_y)
+    )
+    if box[0] < box[2] and box[1] < box[3]:
+        canvas.paste(base_map.region(new_size, box, resample),
+                     (offset_x + box[0], offset_y + box[1]))
+
+    if not grid: return canvas
+
+    overlay = Image.new('RGBA', view.target_size, (0, 0, 0, 0))
+    draw_grid(ImageDraw.Draw(overlay), view)
+
+    return Image.alpha_composite(canvas, overlay)
+
+@dataclass(frozen=True)
+class TrailLOD:
+    """
+    **Level of detail of rendered trails.**
+
+    *Attributes*:
+    - `min_pixel_distance` (float): Trail points closer than this to the
+    previously kept point on screen are merged into it.
+    - `max_dots` (int): Most history dots drawn per player, the latest
+    position is always drawn on top.
+    """
+    min_pixel_distance:float=2.0
+    max_dots:int=64
+
+def decimate(points:list[tuple[int, int]],
+             min_distance:float) -> list[tuple[int, int]]:
+    """
+    **Merge screen points closer than a distance, keeping the first and last
+    point.**
+
+    *Parameters*:
+    - `points` (list[tuple[int, int]]): Points in frame pixels.
+    - `min_distance` (float): Distance in pixels below which points merge.
+
+    *Returns*:
+    - (list[tuple[int, int]]): The decimated points.
+    """
+    if len(points) < 3 or min_distance <= 0: return points
+
+    min_sq = min_distance * min_distance
+    kept = [points[0]]
+    for x, y in points[1:-1]:
+        last_x, last_y = kept[-1]
+        if (x - last_x) ** 2 + (y - last_y) ** 2 >= min_sq:
+            kept.append((x, y))
+
+    # The latest position always survives, replacing a point it overlaps
+    last_x, last_y = kept[-1]
+    end_x, end_y = points[-1]
+    if len(kept) > 1 and (end_x - last_x) ** 2 + (end_y - last_y) ** 2 < min_sq:
+        kept[-1] = points[-1]
+    else:
+        kept.append(points[-1])
+
+    return kept
+
+def visible_runs(points:list[tuple[int, int]], width:int, height:int,
+                 margin:float) -> list[list[tuple[int, int]]]:
+    """
+    **Split a polyline into runs of consecutive segments that touch the
+    frame, so each run can be drawn with a single call.**
+
+    *Parameters*:
+    - `points` (list[tuple[int, int]]): The polyline in frame pixels.
+    - `width` (int): Width of the frame.
+    - `height` (int): Height of the frame.
+    - `margin` (float): Extra border counted as visible, the line width.
+
+    *Returns*:
+    - (list[list[tuple[int, int]]]): The visible runs.
+    """
+    runs = []
+    run = []
+    for (x1, y1), (x2, y2) in zip(points, points[1:]):
+        if (max(x1, x2) < -margin or min(x1, x2) > width + margin
+            or max(y1, y2) < -margin or min(y1, y2) > height + margin):
+            if len(run) > 1: runs.append(run)
+            run = []
+            continue
+
+        if not run: run = [(x1, y1)]
+        run.append((x2, y2))
+
+    if len(run) > 1: runs.append(run)
+
+    return runs
+
+def render_dynamic_layer(view:View, coordinates:dict[str, list[tuple]],
+                         pin_map:dict[str, tuple], bounds:dict[str, int],
+                         lod:TrailLOD=TrailLOD()
+                         ) -> tuple[Image.Image, tuple[int, int]]:
+    """
+    **Render trails and pins onto an overlay only as large as they are.**
+
+    Trails are decimated in screen space first, so the cost is bounded by the
+    frame resolution rather than the length of the history.
+
+    *Parameters*:
+    - `view` (View): The view transform.
+    - `coordinates` (dict[str, list[tuple]]): Coordinates of all clients.
+    - `pin_map` (dict[str, tuple]): Normalized pin positions of all clients.
+    - `bounds` (dict[str, int]): Bounds of the ingame map.
+    - `lod` (TrailLOD): Level of detail of the trails. Defaults to merging
+    points within 2 pixels and at most 64 dots per player.
+
+    *Returns*:
+    - (tuple[Image.Image, tuple[int, int]]): The overlay and where to place
+    it in the frame, or (None, None) when nothing is visible.
+    """
+    target_width, target_height = view.target_size
+    new_size = view.map_size
+    offset_x, offset_y = view.offset
+
+    def visible(x:float, y:float, margin:float=0) -> bool:
+        """
+        **Whether a point, grown by a margin, touches the viewport.**
+        """
+        return (-margin <= x <= target_width + margin
+                and -margin <= y <= target_height + margin)
+
+    # Collect visible shapes in draw order, so the overlay can be cropped
+    pins = []
+    shapes = []
+
+    # Pin locations
+    for color, pin_scale in pin_map.items():
+        if not pin_scale: continue
+
+        x = new_size[0] * pin_scale[0] + offset_x
+        y = new_size[1] * pin_scale[1] + offset_y
+
+        radius = int(new_size[0] * 0.03)
+        if not visible(x, y, radius + 2): continue
+
+        pins.append((x, y, radius, color))
+
+    # Location lines
+    line_width = int(new_size[0] * 0.005)
+    last_radius = int(new_size[0] * 0.008)
+    history_radius = int(new_size[0] * 0.005)
+    for color, translated in transform_points(coordinates, view,
+                                              bounds).items():
+        line_color, history_dot_color = player_palette(color)
+        if not translated: continue
+
+        translated = decimate(translated, lod.min_pixel_distance)
+
+        # Connecting lines as polylines, skipping runs entirely off screen
+        for run in visible_runs(translated, target_width, target_height,
+                                line_width):
+            shapes.append(('line', run, line_color))
+
+        # History dots, evenly thinned out to the dot budget
+        history = translated[:-1]
+        if len(history) > lod.max_dots:
+            stride = len(history) / max(1, lod.max_dots)
+            history = [history[int(i * stride)] for i in range(lod.max_dots)]
+
+        for x, y in history:
+            if not visible(x, y, history_radius): continue
+            shapes.append(
+                ('dot', x, y, history_radius, history_dot_color, None)
+            )
+
+        # The latest position is drawn larger and outlined
+        x, y = translated[-1]
+        if visible(x, y, last_radius + 1):
+            shapes.append(('dot', x, y, last_radius, color, '#ffffff'))
+
+    # Bounding box of everything visible, clipped to the frame
+    extents = [
+        (x - r - 2, y - r - 2, x + r + 2, y + r + 2)
+        for x, y, r, _ in pins
+    ]
+    for kind, *shape in shapes:
+        if kind == 'line':
+            run, _ = shape
+            xs, ys = [x for x, _ in run], [y for _, y in run]
+            extents.append((min(xs) - line_width, min(ys) - line_width,
+                            max(xs) + line_width, max(ys) + line_width))
+        else:
+            x, y, r, *_ = shape
+            extents.append((x - r - 1, y - r - 1, x + r + 1, y + r + 1))
+
+    if not extents: return None, None
+
+    left = max(0, int(min(e[0] for e in extents)))
+    top = max(0, int(min(e[1] for e in extents)))
+    right = min(target_width, int(max(e[2] for e in extents)) + 1)
+    bottom = min(target_height, int(max(e[3] for e in extents)) + 1)
+    if left >= right or top >= bottom: return None, None
+
+    overlay = Image.new('RGBA', (right - left, bottom - top), (0, 0, 0, 0))
+    draw = ImageDraw.Draw(overlay)
+
+    for x, y, radius, color in pins:
+        draw.circle((x - left, y - top), radius=radius, fill=None,
+                    outline=color, width=2)
+
+    for kind, *shape in shapes:
+        if kind == 'line':
+            run, color = shape
+            draw.line([(x - left, y - top) for x, y in run], fill=color,
+                      width=line_width, joint='curve')
+        else:
+            x, y, radius, color, outline = shape
+            x, y = x - left, y - top
+            draw.ellipse((x - radius, y - radius, x + radius, y + radius),
+                         fill=color, outline=outline, width=1)
+
+    return overlay, (left, top)
+
+class RenderCache:
+    """
+    **Keeps frame layers between renders.**
+
+    The map and chess grid only change with the view transform, so they are
+    rendered and composited once per view and reused while only trails and
+    pins change. Every player also gets a cropped transparent layer keyed by
+    their data and the view, so an update from one player only redraws that
+    player's layer.
+
+    *Methods*:
+    - `base_layer(base_map, view, resample) -> Image.Image`: The cached
+    static layer.
+    - `player_layer(view, color, coords, pin, bounds, lod) -> tuple`: The
+    cached layer of a single player.
+    - `prune_players(colors) -> None`: Drop layers of players not listed.
+    - `clear() -> None`: Drop all cached layers.
+    """
+    def __init__(self, max_views:int=4):
+        """
+        **Initializer.**
+
+        *Parameters*:
+        - `max_views` (int): Amount of views to keep layers for. Defaults to 4.
+        """
+        self.__max_views = max_views
+        self.__base_layers:OrderedDict[tuple, Image.Image] = OrderedDict()
+        self.__player_layers:dict[str, tuple] = {}
+
+    def base_layer(self, base_map:MapPyramid | TileCache, view:View,
+                   resample:Image.Resampling=Image.Resampling.LANCZOS,
+                   grid:bool=True) -> Image.Image:
+        """
+        **The static layer of a view, rendered on first use.**
+
+        *Parameters*:
+        - `base_map` (MapPyramid | TileCache): The pyramid or tile cache of
+        the base map.
+        - `view` (View): The view transform.
+        - `resample` (Image.Resampling): The filter to scale the map with.
+        Defaults to LANCZOS.
+        - `grid` (bool): Draw the chess grid. Defaults to true.
+
+        *Returns*:
+        - (Image.Image): The cached static layer, must not be drawn onto.
+        """
+        # A full quality layer is always an acceptable answer
+        for key in [(id(base_map), view, Image.Resampling.LANCZOS, grid),
+                    (id(base_map), view, resample, grid)]:
+            if key in self.__base_layers:
+                self.__base_layers.move_to_end(key)
+                return self.__base_layers[key]
+
+        layer = render_base_layer(base_map, view, resample, grid)
+
+        self.__base_layers[(id(base_map), view, resample, grid)] = layer
+        if len(self.__base_layers) > self.__max_views:
+            self.__base_layers.popitem(last=False)
+
+        return layer
+
+    def player_layer(self, view:View, color:str, coords:list[tuple],
+                     pin:tuple, bounds:dict[str, int],
+                     lod:TrailLOD=TrailLOD()
+                     ) -> tuple[Image.Image, tuple[int, int]]:
+        """
+        **The layer of a single player, redrawn only when their trail, pin
+        or the view changed.**
+
+        *Parameters*:
+        - `view` (View): The view transform.
+        - `color` (str): The player's color.
+        - `coords` (list[tuple]): The player's coordinates.
+        - `pin` (tuple): The player's normalized pin position, if any.
+        - `bounds` (dict[str, int]): Bounds of the ingame map.
+        - `lod` (TrailLOD): Level of detail of the trail.
+
+        *Returns*:
+        - (tuple[Image.Image, tuple[int, int]]): The layer and where to place
+        it in the frame, or (None, None) when nothing is visible.
+        """
+        # The player's data itself is the version, it is only a few points
+        version = (
+            view, lod, tuple(tuple(coord) for coord in coords or ()),
+            tuple(pin) if pin else None
+        )
+
+        cached = self.__player_layers.get(color)
+        if cached and cached[0] == version:
+            return cached[1], cached[2]
+
+        layer, position = render_dynamic_layer(
+            view, { color: coords or [] }, { color: pin }, bounds, lod
+        )
+        self.__player_layers[color] = (version, layer, position)
+
+        return layer, position
+
+    def prune_players(self, colors:set[str]):
+        """
+        **Drop the layers of players that are no longer rendered.**
+
+        *Parameters*:
+        - `colors` (set[str]): Colors of the players still rendered.
+        """
+        for color in set(self.__player_layers) - colors:
+            del self.__player_layers[color]
+
+    def clear(self):
+        """
+        **Drop all cached layers.**
+        """
+        self.__base_layers.clear()
+        self.__player_layers.clear()
+
+def render_scaled_image(base_map:MapPyramid | TileCache, target_width:int,
+                        target_height:int, coordinates:dict[str, list[tuple]],
+                        zoom:float, panning:tuple[float, float],
+                        pin_map:dict[str, tuple],
+                        bounds:dict[str, int],
+                        cache:RenderCache=None, margin:int=0,
+                        resample:Image.Resampling=Image.Resampling.LANCZOS,
+                        lod:TrailLOD=TrailLOD(),
+                        grid:bool=True, heatmap=None) -> Image.Image:
+    """
+    **Render a scaled image of the map, rendering coords and chess grid.**
+    
+    *Parameters*:
+    - `base_map` (MapPyramid | TileCache): The pyramid or tile cache of the
+    base map.
+    - `target_width` (int): The target width of the image.
+    - `target_height` (int): The target height of the image.
+    - `coordinates` (dict[str, list[tuple]]): Coordinates of all clients to
+    render onto the map.
+    - `bounds` (dict[str, int]): Bounds of the ingame map so the coords can be
+    correctly translated onto the map.
+    - `cache` (RenderCache): Cache of static layers. Optional, without it the
+    map and grid are rendered every time.
+    - `margin` (int): Extra border rendered around the target on every side,
+    the returned image grows by twice the margin. Defaults to 0.
+    - `resample` (Image.Resampling): The filter to scale the map with.
+    Defaults to LANCZOS, cheaper filters suit frames shown while interacting.
+    - `lod` (TrailLOD): Level of detail of the trails.
+    - `grid` (bool): Draw the chess grid, left out when it is drawn as
+    canvas items instead. Defaults to true.
+    - `heatmap` (DensityHeatmap): Density heatmap drawn between the map and
+    the trails, if any.
     
-    return Image.alpha_composite(canvas, overlay)
\ No newline at end of file
+    *Returns*:
+    - (Image.Image): The rendered image.
+    """
+    view = compute_view(base_map.size, target_width, target_height, zoom,
+                        panning, margin)
+
+    if not cache:
+        frame = render_base_layer(base_map, view, resample, grid)
+        if heatmap:
+            layer, position = heatmap.layer(view)
+            if layer: frame.alpha_composite(layer, dest=position)
+
+        overlay, position = render_dynamic_layer(view, coordinates, pin_map,
+                                                 bounds, lod)
+        if overlay:
+            frame.alpha_composite(overlay, dest=position)
+
+        return frame
+
+    frame = cache.base_layer(base_map, view, resample, grid).copy()
+    if heatmap:
+        layer, position = heatmap.layer(view)
+        if layer: frame.alpha_composite(layer, dest=position)
+
+    # Only players whose data changed get their layer redrawn
+    colors = set(coordinates) | set(pin_map)
+    cache.prune_players(colors)
+    for color in sorted(colors):
+        layer, position = cache.player_layer(
+            view, color, coordinates.get(color), pin_map.get(color), bounds,
+            lod
+        )
+        if layer:
+            frame.alpha_composite(layer, dest=position)
+
+    return frame
+
+def transform_frame(frame:Image.Image, margin:int, view_size:tuple[int, int],
+                    old_center:tuple[float, float],
+                    new_center:tuple[float, float], factor:float,
+                    fill:tuple) -> Image.Image:
+    """
+    **Cheaply rescale and shift an already rendered frame, used as a preview
+    while a full quality frame is pending.**
+
+    Screen points move from `old_center + d` to `new_center + d * factor`,
+    the same transform a zoom and pan change applies to the map. Only the
+    part of the frame that lands inside the view is resampled.
+
+    *Parameters*:
+    - `frame` (Image.Image): The last rendered frame.
+    - `margin` (int): Pre-rendered margin around the view in `frame`.
+    - `view_size` (tuple[int, int]): Width and height of the view.
+    - `old_center` (tuple[float, float]): Zoom center the frame was rendered
+    with, in view pixels.
+    - `new_center` (tuple[float, float]): The new zoom center.
+    - `factor` (float): New zoom divided by the frame's zoom.
+    - `fill` (tuple): Color of areas the frame does not cover.
+
+    *Returns*:
+    - (Image.Image): The preview, sized to the view.
+    """
+    width, height = view_size
+    preview = Image.new('RGBA', view_size, fill)
+
+    def to_view(value:float, axis:int) -> float:
+        """
+        **Map a frame pixel coordinate to a view coordinate.**
+        """
+        return new_center[axis] + (value - margin - old_center[axis]) * factor
+
+    def to_frame(value:float, axis:int) -> float:
+        """
+        **Map a view coordinate back to a frame pixel coordinate.**
+        """
+        return old_center[axis] + (value - new_center[axis]) / factor + margin
+
+    # Where the frame lands in the view, clipped to the view
+    left = max(0, math.floor(to_view(0, 0)))
+    top = max(0, math.floor(to_view(0, 1)))
+    right = min(width, math.ceil(to_view(frame.width, 0)))
+    bottom = min(height, math.ceil(to_view(frame.height, 1)))
+    if left >= right or top >= bottom: return preview
+
+    box = (
+        max(0.0, to_frame(left, 0)), max(0.0, to_frame(top, 1)),
+        min(frame.width, to_frame(right, 0)),
+        min(frame.height, to_frame(bottom, 1))
+    )
+    preview.paste(frame.resize((right - left, bottom - top),
+                               Image.Resampling.BILINEAR, box=box),
+                  (left, top))
+
+    return preview
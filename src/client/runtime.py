@@ -0,0 +1,204 @@
+from typing import Any, Coroutine
+import concurrent.futures, threading, asyncio
+import loggerric as lr
+import socketio
+
+class AsyncRuntime:
+    """
+    **An asyncio event loop running on one background thread.**
+
+    Networking, fetching and timers all run as tasks on this loop instead of
+    on a thread each, other threads hand it coroutines. Stopping cancels
+    every task and waits for them, so shutdown takes as long as the slowest
+    cleanup rather than the longest sleep.
+
+    *Methods*:
+    - `start() -> None`: Start the loop thread.
+    - `submit(coro) -> Future`: Schedule a coroutine from any thread.
+    - `run(coro, timeout) -> Any`: Run a coroutine and wait for its result.
+    - `stop(timeout) -> None`: Cancel all tasks and stop the loop.
+    """
+    def __init__(self):
+        """
+        **Initializer.**
+        """
+        self.__loop:asyncio.AbstractEventLoop = None
+        self.__thread:threading.Thread = None
+
+    def start(self):
+        """
+        **Start the loop thread, returns once the loop runs.**
+        """
+        if self.__thread: return
+
+        running = threading.Event()
+        self.__loop = asyncio.new_event_loop()
+
+        def run():
+            """
+            **Called by a thread. Runs the loop until stopped.**
+            """
+            asyncio.set_event_loop(self.__loop)
+            self.__loop.call_soon(running.set)
+            self.__loop.run_forever()
+            self.__loop.close()
+
+        self.__thread = threading.Thread(target=run, daemon=True)
+        self.__thread.start()
+        running.wait()
+
+    def submit(self, coro:Coroutine) -> concurrent.futures.Future:
+        """
+        **Schedule a coroutine on the loop, safe to call from any thread.
+        Exceptions it raises are logged, even if nobody reads the result.**
+
+        *Parameters*:
+        - `coro` (Coroutine): The coroutine to run.
+
+        *Returns*:
+        - (concurrent.futures.Future): Resolves to the coroutine's result,
+        cancelling it cancels the task.
+        """
+        future = asyncio.run_coroutine_threadsafe(coro, self.__loop)
+        future.add_done_callback(self.__log_failure)
+
+        return future
+
+    @staticmethod
+    def __log_failure(future:concurrent.futures.Future):
+        """
+        **Log the exception of a finished task.**
+
+        *Parameters*:
+        - `future` (concurrent.futures.Future): The finished task.
+        """
+        if future.cancelled() or not future.exception(): return
+
+        lr.Log.error('Background task failed: {!r}'.format(future.exception()))
+
+    def run(self, coro:Coroutine, timeout:float=None) -> Any:
+        """
+        **Run a coroutine on the loop and wait for its result. Must not be
+        called from the loop thread.**
+
+        *Parameters*:
+        - `coro` (Coroutine): The coroutine to run.
+        - `timeout` (float): Seconds to wait before cancelling it, waits
+        forever if missing.
+
+        *Returns*:
+        - (Any): The coroutine's result.
+        """
+        # Raised to the caller, so not logged like submitted tasks
+        future = asyncio.run_coroutine_threadsafe(coro, self.__loop)
+        try:
+            return future.result(timeout)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            raise
+
+    def stop(self, timeout:float=2.0):
+        """
+        **Cancel every task, wait for them to finish and stop the loop.**
+
+        *Parameters*:
+        - `timeout` (float): Seconds to wait for the tasks. Defaults to 2.
+        """
+        if not self.__thread: return
+
+        async def cancel_tasks():
+            """
+            **Cancel every other task and wait for their cleanup.**
+            """
+            tasks = asyncio.all_tasks() - { asyncio.current_task() }
+            for task in tasks: task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        try:
+            self.run(cancel_tasks(), timeout)
+        except concurrent.futures.TimeoutError:
+            lr.Log.warn('Background tasks did not stop in time!')
+
+        self.__loop.call_soon_threadsafe(self.__loop.stop)
+        self.__thread.join(timeout)
+        self.__thread = None
+
+class SyncSocket:
+    """
+    **Thread-safe facade over a `socketio.AsyncClient` on an
+    `AsyncRuntime`.**
+
+    Lets the Tk side disconnect and emit without knowing about the loop.
+    Neither waits, so the Tk thread never blocks on the loop while the
+    loop posts back to it. Connecting is a coroutine for tasks on the
+    runtime.
+
+    *Methods*:
+    - `runtime -> AsyncRuntime`: The runtime the client lives on.
+    - `connected -> bool`: Whether the client is connected.
+    - `connect(url, **kwargs) -> None`: Coroutine connecting once.
+    - `disconnect() -> None`: Disconnect without waiting.
+    - `emit(event, data, callback) -> None`: Emit without waiting.
+    """
+    def __init__(self, runtime:AsyncRuntime, sio:socketio.AsyncClient,
+                 timeout:float=10.0):
+        """
+        **Initializer.**
+
+        *Parameters*:
+        - `runtime` (AsyncRuntime): The runtime the client lives on.
+        - `sio` (socketio.AsyncClient): The client.
+        - `timeout` (float): Seconds to wait on connecting. Defaults to 10.
+        """
+        self.__runtime = runtime
+        self.__sio = sio
+        self.__timeout = timeout
+
+    @property
+    def runtime(self) -> AsyncRuntime:
+        """
+        **The runtime the client lives on.**
+
+        *Returns*:
+        - (AsyncRuntime): The runtime.
+        """
+        return self.__runtime
+
+    @property
+    def connected(self) -> bool:
+        """
+        **Whether the client is connected.**
+
+        *Returns*:
+        - (bool): The connection state.
+        """
+        return self.__sio.connected
+
+    async def connect(self, url:str, **kwargs):
+        """
+        **Runs on the runtime. Connect once, raises if it failed or timed
+        out.**
+
+        *Parameters*:
+        - `url` (str): The server URL.
+        - `**kwargs` (Any): Passed on to `AsyncClient.connect`.
+        """
+        await asyncio.wait_for(self.__sio.connect(url, **kwargs),
+                               self.__timeout)
+
+    def disconnect(self):
+        """
+        **Disconnect without waiting for it.**
+        """
+        self.__runtime.submit(self.__sio.disconnect())
+
+    def emit(self, event:str, data:Any=None, callback=None):
+        """
+        **Emit an event without waiting for it to be sent.**
+
+        *Parameters*:
+        - `event` (str): The event name.
+        - `data` (Any): The event payload.
+        - `callback` (Callable): Called with the server's acknowledgement.
+        """
+        self.__runtime.submit(self.__sio.emit(event, data, callback=callback))
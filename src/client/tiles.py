@@ -0,0 +1,249 @@
+from concurrent.futures import ThreadPoolExecutor
+from collections import OrderedDict
+from pathlib import Path
+from PIL import Image
+import json, math, shutil
+import loggerric as lr
+
+from client.map_cache import resize_bands
+
+class TileCache:
+    """
+    **Tiled, lazily loaded cache of the base map.**
+
+    Cuts the base map into fixed-size tiles for every level of a halving
+    pyramid once, storing them on disk next to the map. Tiles are loaded on
+    demand and held in an LRU bounded by memory, so the full map is never
+    kept decoded and a render only touches the tiles it can see.
+
+    Implements the same `size`, `letterboxing_color` and `region()` surface as
+    `MapPyramid`, so both can be handed to `render_scaled_image`.
+
+    *Methods*:
+    - `generate(source_path) -> None`: Cut the map into tiles on disk.
+    - `tile(level, col, row) -> Image.Image`: A single tile, loaded lazily.
+    - `region(size, box, resample) -> Image.Image`: A region of the base map
+    scaled to an exact size, composited from the visible tiles.
+    - `close() -> None`: Stop the resampling threads.
+    """
+    INDEX_VERSION = 1
+
+    def __init__(self, source_path:str, cache_dir:str=None,
+                 tile_size:int=256, min_level_size:int=256,
+                 max_bytes:int=64 * 1024 * 1024, workers:int=1):
+        """
+        **Initializer. Generates the tiles when the cache is missing or stale.**
+
+        *Parameters*:
+        - `source_path` (str): Path of the full resolution map file.
+        - `cache_dir` (str): Where to keep the tiles. Defaults to a `tiles`
+        folder next to the map.
+        - `tile_size` (int): Width and height of a tile. Defaults to 256.
+        - `min_level_size` (int): Stop halving once the longest side is below
+        this. Defaults to 256 pixels.
+        - `max_bytes` (int): Decoded tile memory to keep. Defaults to 64 MiB.
+        - `workers` (int): Threads resampling bands of large resizes
+        concurrently. Defaults to 1.
+        """
+        source = Path(source_path)
+
+        self.tile_size = tile_size
+        self.min_level_size = min_level_size
+        self.cache_dir = Path(cache_dir or source.parent/'tiles'/source.stem)
+
+        self.__max_bytes = max_bytes
+        self.__workers = workers
+        self.__pool = ThreadPoolExecutor(workers) if workers > 1 else None
+        self.__bytes = 0
+        self.__tiles:OrderedDict[tuple[int, int, int], Image.Image] = (
+            OrderedDict()
+        )
+
+        stat = source.stat()
+        self.__source_key = {
+            'version': TileCache.INDEX_VERSION, 'source': source.name,
+            'bytes': stat.st_size, 'mtime_ns': stat.st_mtime_ns,
+            'tile_size': tile_size, 'min_level_size': min_level_size
+        }
+
+        index = self.__read_index()
+        if not index:
+            self.generate(source)
+            index = self.__read_index()
+
+        self.size:tuple[int, int] = tuple(index['size'])
+        self.letterboxing_color:tuple = tuple(index['letterboxing_color'])
+        self.level_sizes:list[tuple[int, int]] = [
+            tuple(size) for size in index['level_sizes']
+        ]
+
+    def __read_index(self) -> dict:
+        """
+        **Read the tile index, ignoring it if it belongs to another source.**
+
+        *Returns*:
+        - (dict): The index, or None if missing or stale.
+        """
+        try:
+            with open(self.cache_dir / 'index.json', 'r') as file:
+                index:dict = json.load(file)
+        except (OSError, ValueError):
+            return None
+
+        if index.get('source_key') != self.__source_key:
+            return None
+
+        return index
+
+    def generate(self, source_path:str):
+        """
+        **Cut the map into tiles for every pyramid level on disk.**
+
+        *Parameters*:
+        - `source_path` (str): Path of the full resolution map file.
+        """
+        lr.Log.info(f'Generating map tiles in "{self.cache_dir}"')
+
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+        self.cache_dir.mkdir(parents=True)
+
+        with Image.open(source_path) as source:
+            level = source.convert('RGBA')
+        letterboxing_color = level.getpixel((0, 0))
+
+        level_sizes = []
+        while True:
+            index = len(level_sizes)
+            level_sizes.append(level.size)
+
+            level_dir = self.cache_dir / str(index)
+            level_dir.mkdir()
+
+            for row in range(math.ceil(level.height / self.tile_size)):
+                for col in range(math.ceil(level.width / self.tile_size)):
+                    x, y = col * self.tile_size, row * self.tile_size
+                    tile = level.crop((
+                        x, y, min(level.width, x + self.tile_size),
+                        min(level.height, y + self.tile_size)
+                    ))
+                    tile.save(level_dir / f'{col}_{row}.png', compress_level=1)
+
+            if max(level.size) // 2 < self.min_level_size: break
+            level = level.reduce(2)
+
+        # Written last so an interrupted generation is retried next launch
+        with open(self.cache_dir / 'index.json', 'w') as file:
+            json.dump({
+                'source_key': self.__source_key,
+                'size': level_sizes[0],
+                'letterboxing_color': letterboxing_color,
+                'level_sizes': level_sizes
+            }, file)
+
+    def tile(self, level:int, col:int, row:int) -> Image.Image:
+        """
+        **A single tile, loaded from disk on first use.**
+
+        *Parameters*:
+        - `level` (int): The pyramid level, 0 is full resolution.
+        - `col` (int): The tile column.
+        - `row` (int): The tile row.
+
+        *Returns*:
+        - (Image.Image): The RGBA tile.
+        """
+        key = (level, col, row)
+        if key in self.__tiles:
+            self.__tiles.move_to_end(key)
+            return self.__tiles[key]
+
+        with Image.open(self.cache_dir / str(level) / f'{col}_{row}.png') as f:
+            tile = f.convert('RGBA')
+
+        self.__tiles[key] = tile
+        self.__bytes += tile.width * tile.height * 4
+
+        # Evict least recently used tiles, always keeping the newest one
+        while self.__bytes > self.__max_bytes and len(self.__tiles) > 1:
+            _, evicted = self.__tiles.popitem(last=False)
+            self.__bytes -= evicted.width * evicted.height * 4
+
+        return tile
+
+    def level_for(self, size:tuple[int, int]) -> int:
+        """
+        **The smallest level that is at least as large as a size.**
+
+        *Parameters*:
+        - `size` (tuple[int, int]): The requested width and height.
+
+        *Returns*:
+        - (int): The level to resample from.
+        """
+        for index in reversed(range(len(self.level_sizes))):
+            level_w, level_h = self.level_sizes[index]
+            if level_w >= size[0] and level_h >= size[1]:
+                return index
+
+        return 0
+
+    def region(self, size:tuple[int, int], box:tuple[int, int, int, int],
+               resample:Image.Resampling=Image.Resampling.LANCZOS
+               ) -> Image.Image:
+        """
+        **A region of the base map scaled to an exact size, composited from
+        the tiles it overlaps.**
+
+        *Parameters*:
+        - `size` (tuple[int, int]): The width and height of the whole scaled
+        map.
+        - `box` (tuple[int, int, int, int]): The left, top, right and bottom
+        of the region in scaled map pixels.
+        - `resample` (Image.Resampling): The filter to scale with. Defaults to
+        LANCZOS.
+
+        *Returns*:
+        - (Image.Image): The scaled region.
+        """
+        level = self.level_for(size)
+        level_w, level_h = self.level_sizes[level]
+        fx, fy = level_w / size[0], level_h / size[1]
+
+        # Region in level pixels, widened by the filter's reach so the
+        # region's border samples the same neighbours as the whole level
+        src = (box[0] * fx, box[1] * fy, box[2] * fx, box[3] * fy)
+        reach = math.ceil(3 * max(1.0, fx, fy)) + 1
+
+        # The tiles covering it, edge tiles are cut short at the level bounds
+        col0 = max(0, int(src[0]) - reach) // self.tile_size
+        row0 = max(0, int(src[1]) - reach) // self.tile_size
+        col1 = (min(math.ceil(src[2]) + reach, level_w) - 1) // self.tile_size
+        row1 = (min(math.ceil(src[3]) + reach, level_h) - 1) // self.tile_size
+
+        left, top = col0 * self.tile_size, row0 * self.tile_size
+        mosaic = Image.new('RGBA', (
+            min(level_w, (col1 + 1) * self.tile_size) - left,
+            min(level_h, (row1 + 1) * self.tile_size) - top
+        ))
+        for row in range(row0, row1 + 1):
+            for col in range(col0, col1 + 1):
+                mosaic.paste(self.tile(level, col, row), (
+                    col * self.tile_size - left, row * self.tile_size - top
+                ))
+
+        local = (src[0] - left, src[1] - top, src[2] - left, src[3] - top)
+
+        # Exact level hit, no resampling needed
+        if (level_w, level_h) == size:
+            return mosaic.crop(tuple(int(v) for v in local))
+
+        return resize_bands(mosaic, (box[2] - box[0], box[3] - box[1]),
+                            resample, local, self.__pool, self.__workers)
+
+    def close(self):
+        """
+        **Stop the resampling threads, later resizes run on the calling
+        thread.**
+        """
+        if self.__pool: self.__pool.shutdown(wait=False)
+        self.__pool = None
@@ -0,0 +1,262 @@
+from pathlib import Path
+import tkinter as tk
+import sys
+
+# Handle both normal execution and PyInstaller bundled exe
+if getattr(sys, 'frozen', False):
+    # Running as PyInstaller exe
+    ROOT = Path(sys._MEIPASS).parent
+else:
+    # Running as script
+    ROOT = Path(__file__).resolve().parents[1]
+
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from client.rendering import (View, TrailLOD, decimate, player_palette,
+                              transform_points)
+
+# Tag shared by every overlay item, used to move and scale them together
+OVERLAY_TAG = 'overlay'
+
+class VectorOverlay:
+    """
+    **Trails, pins and the chess grid as native canvas items.**
+
+    Every player owns a fixed set of line and oval items tagged with their
+    color, which are edited in place through `coords()` and `itemconfig()`
+    when their data changes. Pans and zooms transform the existing items
+    with `Canvas.move` and `Canvas.scale`, so the map image underneath is
+    never re-uploaded for a position update.
+
+    *Methods*:
+    - `layout(view, coordinates, pin_map, bounds) -> None`: Place all items
+    exactly for a view.
+    - `move(dx, dy) -> None`: Move all items by an offset.
+    - `scale(x, y, factor) -> None`: Scale all items around a point.
+    - `clear() -> None`: Delete all items.
+    """
+    def __init__(self, canvas:tk.Canvas, lod:TrailLOD=TrailLOD()):
+        """
+        **Initializer.**
+
+        *Parameters*:
+        - `canvas` (tk.Canvas): The canvas to draw onto.
+        - `lod` (TrailLOD): Level of detail of the trails. Defaults to merging
+        points within 2 pixels and at most 64 dots per player.
+        """
+        self.__canvas = canvas
+        self.__lod = lod
+
+        self.__grid_items:dict[str, list[int]] = {}
+        self.__player_items:dict[str, dict] = {}
+
+    def __create_grid(self):
+        """
+        **Create the grid lines and labels, positioned by `layout()`.**
+        """
+        options = { 'fill': '#c0c0c0', 'width': 1,
+                    'tags': (OVERLAY_TAG, 'grid') }
+        label = { 'fill': '#ffffff', 'anchor': 'nw', 'font': ('Segoe UI', 8),
+                  'tags': (OVERLAY_TAG, 'grid') }
+
+        self.__grid_items = {
+            'columns': [self.__canvas.create_line(0, 0, 0, 0, **options)
+                        for _ in range(9)],
+            'rows': [self.__canvas.create_line(0, 0, 0, 0, **options)
+                     for _ in range(9)],
+            'column_labels': [
+                self.__canvas.create_text(0, 0, text=letter, **label)
+                for letter in 'ABCDEFGH'
+            ],
+            'row_labels': [
+                self.__canvas.create_text(0, 0, text=str(r + 1), **label)
+                for r in range(8)
+            ]
+        }
+
+    def __layout_grid(self, view:View):
+        """
+        **Place the grid lines and labels over the map.**
+
+        *Parameters*:
+        - `view` (View): The view transform.
+        """
+        if not self.__grid_items: self.__create_grid()
+
+        new_size = view.map_size
+        offset_x, offset_y = view.offset
+        cell_size = new_size[0] / 8
+
+        for c, item in enumerate(self.__grid_items['columns']):
+            x = offset_x + c * cell_size
+            self.__canvas.coords(item, x, offset_y, x, offset_y + new_size[0])
+
+        for r, item in enumerate(self.__grid_items['rows']):
+            y = offset_y + r * cell_size
+            self.__canvas.coords(item, offset_x, y, offset_x + new_size[0], y)
+
+        for c, item in enumerate(self.__grid_items['column_labels']):
+            self.__canvas.coords(item, offset_x + c * cell_size + 15,
+                                 offset_y + 5)
+
+        for r, item in enumerate(self.__grid_items['row_labels']):
+            self.__canvas.coords(item, offset_x + 5,
+                                 offset_y + r * cell_size + 15)
+
+    def __items_for(self, color:str) -> dict:
+        """
+        **The items of a player, created on first use.**
+
+        *Parameters*:
+        - `color` (str): The player's color.
+
+        *Returns*:
+        - (dict): The pin, trail, dot and latest position items.
+        """
+        items = self.__player_items.get(color)
+        if items: return items
+
+        line_color, _ = player_palette(color)
+        tags = (OVERLAY_TAG, f'player-{color.lstrip("#")}')
+
+        # Creation order is the stacking order: pin, trail, dots, latest
+        items = {
+            'tags': tags,
+            'pin': self.__canvas.create_oval(0, 0, 0, 0, outline=color,
+                                             width=2, state='hidden',
+                                             tags=tags),
+            'trail': self.__canvas.create_line(0, 0, 0, 0, fill=line_color,
+                                               capstyle='round',
+                                               joinstyle='round',
+                                               state='hidden', tags=tags),
+            'dots': [],
+            'last': self.__canvas.create_oval(0, 0, 0, 0, fill=color,
+                                              outline='#ffffff', width=1,
+                                              state='hidden', tags=tags)
+        }
+        self.__player_items[color] = items
+
+        return items
+
+    def __layout_player(self, view:View, color:str,
+                        translated:list[tuple[int, int]], pin:tuple):
+        """
+        **Edit a player's items in place to match their data.**
+
+        *Parameters*:
+        - `view` (View): The view transform.
+        - `color` (str): The player's color.
+        - `translated` (list[tuple[int, int]]): The trail in canvas pixels.
+        - `pin` (tuple): The player's normalized pin position, if any.
+        """
+        canvas = self.__canvas
+        items = self.__items_for(color)
+        new_size = view.map_size
+        offset_x, offset_y = view.offset
+
+        if pin:
+            x = new_size[0] * pin[0] + offset_x
+            y = new_size[1] * pin[1] + offset_y
+            radius = int(new_size[0] * 0.03)
+            canvas.coords(items['pin'], x - radius, y - radius,
+                          x + radius, y + radius)
+            canvas.itemconfigure(items['pin'], state='normal')
+        else:
+            canvas.itemconfigure(items['pin'], state='hidden')
+
+        translated = decimate(translated, self.__lod.min_pixel_distance)
+
+        if len(translated) > 1:
+            canvas.coords(items['trail'],
+                          *[value for point in translated for value in point])
+            canvas.itemconfigure(items['trail'], state='normal',
+                                 width=max(1, int(new_size[0] * 0.005)))
+        else:
+            canvas.itemconfigure(items['trail'], state='hidden')
+
+        # History dots, evenly thinned out to the dot budget
+        history = translated[:-1]
+        if len(history) > self.__lod.max_dots:
+            stride = len(history) / max(1, self.__lod.max_dots)
+            history = [history[int(i * stride)]
+                       for i in range(self.__lod.max_dots)]
+
+        dots:list[int] = items['dots']
+        if len(dots) < len(history):
+            _, history_dot_color = player_palette(color)
+            dots.extend(
+                canvas.create_oval(0, 0, 0, 0, fill=history_dot_color,
+                                   outline='', tags=items['tags'])
+                for _ in range(len(history) - len(dots))
+            )
+            canvas.tag_raise(items['last'], dots[-1])
+        while len(dots) > len(history):
+            canvas.delete(dots.pop())
+
+        radius = int(new_size[0] * 0.005)
+        for item, (x, y) in zip(dots, history):
+            canvas.coords(item, x - radius, y - radius, x + radius, y + radius)
+
+        if translated:
+            x, y = translated[-1]
+            radius = int(new_size[0] * 0.008)
+            canvas.coords(items['last'], x - radius, y - radius,
+                          x + radius, y + radius)
+            canvas.itemconfigure(items['last'], state='normal')
+        else:
+            canvas.itemconfigure(items['last'], state='hidden')
+
+    def layout(self, view:View, coordinates:dict[str, list[tuple]],
+               pin_map:dict[str, tuple], bounds:dict[str, int]):
+        """
+        **Place all items exactly for a view, creating and deleting player
+        items as players come and go.**
+
+        *Parameters*:
+        - `view` (View): The view transform, without a margin.
+        - `coordinates` (dict[str, list[tuple]]): Coordinates of all clients.
+        - `pin_map` (dict[str, tuple]): Normalized pin positions of all
+        clients.
+        - `bounds` (dict[str, int]): Bounds of the ingame map.
+        """
+        self.__layout_grid(view)
+
+        colors = set(coordinates) | set(pin_map)
+        for color in set(self.__player_items) - colors:
+            self.__canvas.delete(self.__player_items.pop(color)['tags'][1])
+
+        translated = transform_points(coordinates, view, bounds)
+        for color in sorted(colors):
+            self.__layout_player(view, color, translated.get(color, []),
+                                 pin_map.get(color))
+
+    def move(self, dx:float, dy:float):
+        """
+        **Move all items by an offset, used while panning.**
+
+        *Parameters*:
+        - `dx` (float): Horizontal offset in canvas pixels.
+        - `dy` (float): Vertical offset in canvas pixels.
+        """
+        self.__canvas.move(OVERLAY_TAG, dx, dy)
+
+    def scale(self, x:float, y:float, factor:float):
+        """
+        **Scale all item positions around a point, used while zooming until
+        the next exact layout.**
+
+        *Parameters*:
+        - `x` (float): Canvas x of the zoom center.
+        - `y` (float): Canvas y of the zoom center.
+        - `factor` (float): The scale factor.
+        """
+        self.__canvas.scale(OVERLAY_TAG, x, y, factor, factor)
+
+    def clear(self):
+        """
+        **Delete all items.**
+        """
+        self.__canvas.delete(OVERLAY_TAG)
+        self.__grid_items.clear()
+        self.__player_items.clear()
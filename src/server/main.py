@@ -1,5 +1,6 @@
 from datetime import datetime as dt, timezone as tz
-import socketio, json, asyncio, sys
+import socketio, json, asyncio, math, time, sys
+from collections import deque
 from pathlib import Path
 from aiohttp import web
 import loggerric as lr
@@ -13,6 +14,8 @@ from shared.je_fetching import Observer, get_sleep_time
 from shared.colors import ColorManager
 from shared.datastructs import (Client, JurassicEchoes, JEStat, Coord,
                          serialize_client)
+from server.recorder import EventRecorder, redact_connect
+from server.trail_index import TrailIndex
 
 set_project_root(ROOT)
 
@@ -22,10 +25,232 @@ sio.attach(app)
 
 client_cache:dict[str, Client] = {}
 
+# Inbound events, only written when recording is enabled in the config
+recorder = EventRecorder()
+
 # Read the config file once
 with open(get_exe_path('server/config.json'), 'r') as file:
     CONFIG:dict = json.load(file)
 
+# Map state version, started from the clock so it also grows across restarts
+state_version = int(time.time() * 1000)
+state_journal:deque[dict] = deque(maxlen=CONFIG.get('journal_size', 256))
+
+# Trail points ever added, started from the clock like the state version. A
+# client's trail counter starts from it, so it never repeats across players
+# sharing a color or across restarts
+trail_seq = int(time.time() * 1000)
+
+# Every point ever reported keyed by alias, trails only carry the latest ones
+trail_index = TrailIndex(
+    cell_size=CONFIG.get('trail_index_cell_size', 64.0),
+    max_points=CONFIG.get('trail_history_max_points', 100000)
+)
+
+def map_snapshot() -> tuple[dict, dict, dict]:
+    """
+    **The trails, pins and trail counters of every connected client.**
+    
+    *Returns*:
+    - (tuple[dict, dict, dict]): Coordinates, pins and `[seq, base]` trail
+    counters keyed by color.
+    """
+    coord_data = {
+        client_data.color: [
+            coord.coordinates for coord in client_data.coordinates
+        ]
+        for client_data in client_cache.values()
+    }
+    pin_data = {
+        client_data.color: client_data.pin_position
+        for client_data in client_cache.values()
+    }
+    seq_data = {
+        client_data.color: [client_data.trail_seq, client_data.trail_base]
+        for client_data in client_cache.values()
+    }
+
+    return coord_data, pin_data, seq_data
+
+def count_points(client_data:Client, amount:int=1, rebuilt:bool=False):
+    """
+    **Advance a client's trail counter, letting receivers tell new points
+    from repeated positions.**
+    
+    *Parameters*:
+    - `client_data` (Client): The client that added points.
+    - `amount` (int): Amount of points appended to the trail. Defaults to 1.
+    - `rebuilt` (bool): Whether points were also inserted before the trail's
+    end. Receivers behind the current counter can not count those, so they
+    re-baseline from it. Defaults to false.
+    """
+    global trail_seq
+
+    if rebuilt: client_data.trail_base = client_data.trail_seq
+
+    trail_seq += amount
+    client_data.trail_seq += amount
+
+def record_change(color:str, client_data:Client=None) -> int:
+    """
+    **Bump the map state version and journal the new state of one client.**
+    
+    *Parameters*:
+    - `color` (str): The color of the changed client.
+    - `client_data` (Client): The client's new state, or None if they left.
+    
+    *Returns*:
+    - (int): The new state version.
+    """
+    global state_version
+
+    state_version += 1
+
+    state = None
+    if client_data:
+        state = {
+            'coordinates': [
+                coord.coordinates for coord in client_data.coordinates
+            ],
+            'pin': client_data.pin_position,
+            'seq': [client_data.trail_seq, client_data.trail_base]
+        }
+    state_journal.append({
+        'version': state_version, 'color': color, 'state': state
+    })
+
+    return state_version
+
+def changes_since(version:int) -> dict:
+    """
+    **The latest state of every client that changed after a version.**
+    
+    *Parameters*:
+    - `version` (int): The last state version a client has seen.
+    
+    *Returns*:
+    - (dict): New states keyed by color, None for clients that left. None
+    if the journal no longer reaches back to the version.
+    """
+    if not isinstance(version, int) or version > state_version: return None
+    if version == state_version: return {}
+
+    if not state_journal or state_journal[0]['version'] > version + 1:
+        return None
+
+    changes = {}
+    for entry in state_journal:
+        if entry['version'] > version:
+            changes[entry['color']] = entry['state']
+
+    return changes
+
+def parse_trail_query(params:dict) -> dict:
+    """
+    **Validate the parameters of a trail history query.**
+    
+    *Parameters*:
+    - `params` (dict): `alias` plus optional `start` & `end` UTC timestamps,
+    `min_x`, `max_x`, `min_y` & `max_y` world bounds, `cursor`, the `next`
+    of a previous page, and `limit`.
+    
+    *Returns*:
+    - (dict): Keyword arguments for `TrailIndex.query`.
+    """
+    if not isinstance(params, dict) or not params.get('alias'):
+        raise ValueError('Missing alias!')
+
+    def number(key:str) -> float:
+        """
+        **An optional number parameter.**
+        """
+        value = params.get(key)
+        if value in (None, ''): return None
+
+        value = float(value)
+        if not math.isfinite(value):
+            raise ValueError(f'{key} must be a finite number!')
+
+        return value
+
+    def integer(key:str, default:int) -> int:
+        """
+        **An optional whole number parameter.**
+        """
+        value = number(key)
+        if value is None: return default
+        if not value.is_integer():
+            raise ValueError(f'{key} must be a whole number!')
+
+        return int(value)
+
+    bbox_keys = ('min_x', 'max_x', 'min_y', 'max_y')
+    bbox = { key: number(key) for key in bbox_keys }
+    if all(value is None for value in bbox.values()):
+        bbox = None
+    elif any(value is None for value in bbox.values()):
+        raise ValueError('Bounding box needs all of {}!'.format(
+            ', '.join(bbox_keys)
+        ))
+
+    max_limit:int = CONFIG.get('trail_query_max_limit', 1000)
+    limit = integer('limit', max_limit)
+    if limit < 1:
+        raise ValueError('Limit must be positive!')
+
+    # The `utc_ts:seq` key of the last point of the previous page
+    cursor = None
+    if params.get('cursor') not in (None, ''):
+        utc_ts, _, seq = str(params['cursor']).partition(':')
+        try:
+            cursor = (float(utc_ts), int(seq))
+        except ValueError:
+            pass
+
+        if not cursor or not math.isfinite(cursor[0]) or cursor[1] < 0:
+            raise ValueError('Malformed cursor!')
+
+    return {
+        'player': str(params['alias']),
+        'start': number('start'),
+        'end': number('end'),
+        'bbox': bbox,
+        'cursor': cursor,
+        'limit': min(limit, max_limit)
+    }
+
+def query_trail(params:dict) -> dict:
+    """
+    **Answer a trail history query.**
+    
+    *Parameters*:
+    - `params` (dict): The query, see `parse_trail_query`.
+    
+    *Returns*:
+    - (dict): `points` as `[utc_ts, coord_0, coord_1]` oldest first and the
+    `next` cursor, None on the last page. Only `error` if invalid.
+    """
+    try:
+        query = parse_trail_query(params)
+    except (TypeError, ValueError) as e:
+        return { 'error': str(e) }
+
+    points, cursor = trail_index.query(**query)
+    if cursor is not None: cursor = f'{cursor[0]!r}:{cursor[1]}'
+
+    return { 'points': points, 'next': cursor }
+
+async def broadcast_map(to:str=None):
+    """
+    **Send the full map state along with its version and trail counters.**
+    
+    *Parameters*:
+    - `to` (str): The client to send to, everyone if missing.
+    """
+    coord_data, pin_data, seq_data = map_snapshot()
+    await sio.emit('update-map',
+                   (coord_data, pin_data, state_version, seq_data), to=to)
+
 async def disconnect_protocol(client_id:str):
     """
     **Run the cleanup process when a client disconnects.**
@@ -39,22 +264,14 @@ async def disconnect_protocol(client_id:str):
                     highlight=client_id)
         return
 
-    ColorManager.unassign(client_cache[client_id].color)
+    color = client_cache[client_id].color
+    ColorManager.unassign(color)
 
     del client_cache[client_id]
+    record_change(color)
 
     # Broadcast the new locations without the disconnected client to everyone
-    coord_data = {
-        client_data.color: [
-            coord.coordinates for coord in client_data.coordinates
-        ]
-        for client_data in client_cache.values()
-    }
-    pin_data = {
-        client_data.color: client_data.pin_position
-        for client_data in client_cache.values()
-    }
-    await sio.emit('update-map', (coord_data, pin_data))
+    await broadcast_map()
 
     # Broadcast the new client list to everyone
     data = {
@@ -64,6 +281,7 @@ async def disconnect_protocol(client_id:str):
     await sio.emit('update-player-list', data)
 
 @sio.event
+@recorder.recorded('connect', redact=redact_connect)
 async def connect(client_id:str, environment_values:dict, authentication:dict):
     """
     **Called when a client is attempting to connect.**
@@ -121,21 +339,21 @@ async def connect(client_id:str, environment_values:dict, authentication:dict):
     client_cache[client_id] = Client(
         alias=authentication.get('alias'),
         color=ColorManager.occupy(),
-        je=jurassic_echoes
+        je=jurassic_echoes,
+        trail_seq=trail_seq
     )
 
-    # Broadcast the locations to the new client
-    coord_data = {
-        client_data.color: [
-            coord.coordinates for coord in client_data.coordinates
-        ]
-        for client_data in client_cache.values()
-    }
-    pin_data = {
-        client_data.color: client_data.pin_position
-        for client_data in client_cache.values()
-    }
-    await sio.emit('update-map', (coord_data, pin_data), client_id)
+    record_change(client_cache[client_id].color, client_cache[client_id])
+
+    # Send only what changed since the client's last seen version if possible
+    changes = changes_since(authentication.get('state-version'))
+    if changes is None:
+        await broadcast_map(client_id)
+    else:
+        lr.Log.debug(f'Catching client "{client_id}" up on {len(changes)} '
+                     + 'changes!', highlight=client_id)
+        await sio.emit('update-map-delta', (changes, state_version),
+                       to=client_id)
 
     # Broadcast the new client list to everyone
     data = {
@@ -145,6 +363,7 @@ async def connect(client_id:str, environment_values:dict, authentication:dict):
     await sio.emit('update-player-list', data)
 
 @sio.event
+@recorder.recorded('disconnect')
 async def disconnect(client_id:str):
     """
     **Called when a client is disconnecting.**
@@ -157,6 +376,7 @@ async def disconnect(client_id:str):
     await disconnect_protocol(client_id)
 
 @sio.on('heartbeat')
+@recorder.recorded('heartbeat')
 async def heartbeat(client_id:str) -> dict:
     """
     **Heartbeat endpoint that the client can hit.**
@@ -180,6 +400,7 @@ async def heartbeat(client_id:str) -> dict:
     return { 'status': 'ok' }
 
 @sio.on('updated-location')
+@recorder.recorded('updated-location')
 async def updated_location(client_id:str, coordinates:list[float, float]):
     """
     **Called when a client updates their location.**
@@ -203,23 +424,109 @@ async def updated_location(client_id:str, coordinates:list[float, float]):
         utc_timestamp=utc_ts,
         coordinates=coordinates
     ))
+    count_points(client_cache[client_id])
 
     client_cache[client_id].last_coordinate_utc_ts = utc_ts
+    try:
+        trail_index.add(client_cache[client_id].alias, utc_ts, coordinates)
+    except (TypeError, ValueError, IndexError):
+        lr.Log.warn(f'Client "{client_id}" sent malformed coordinates!',
+                    highlight=client_id)
+    record_change(client_cache[client_id].color, client_cache[client_id])
 
     # Broadcast the new location to everyone
-    coord_data = {
-        client_data.color: [
-            coord.coordinates for coord in client_data.coordinates
-        ]
-        for client_data in client_cache.values()
-    }
-    pin_data = {
-        client_data.color: client_data.pin_position
-        for client_data in client_cache.values()
+    await broadcast_map()
+
+@sio.on('updated-locations')
+@recorder.recorded('updated-locations')
+async def updated_locations(client_id:str, locations:list[list]) -> int:
+    """
+    **Called when a client uploads locations captured while offline.**
+
+    The locations are merged into the client's trail in time order, so an
+    upload that overlaps live updates still yields one ordered trail.
+    
+    *Parameters*:
+    - `client_id` (str): The ID of the client uploading their locations.
+    - `locations` (list[list]): `[utc_ts, x, y]` entries, oldest first.
+
+    *Returns*:
+    - (int): Amount of locations accepted, acknowledging the upload.
+    """
+    # Make sure user exists in the cache
+    if not client_cache.get(client_id):
+        lr.Log.warn(f'Non-cached user "{client_id}" tried uploading '
+                    + 'locations!', highlight=client_id)
+        return 0
+
+    utc_ts = int(dt.now(tz=tz.utc).timestamp())
+
+    uploaded = []
+    for location in locations or []:
+        try:
+            timestamp, x, y = (float(value) for value in location)
+        except (TypeError, ValueError):
+            continue
+
+        # One bad entry must not fail the whole upload
+        if not all(math.isfinite(value) for value in (timestamp, x, y)):
+            continue
+
+        # Client clocks may run ahead, never accept future timestamps
+        uploaded.append(Coord(utc_timestamp=min(int(timestamp), utc_ts),
+                              coordinates=[x, y]))
+
+    lr.Log.debug(f'Client "{client_id}" uploaded {len(uploaded)} locations!',
+                 highlight=client_id)
+
+    if not uploaded: return 0
+
+    for coord in uploaded:
+        trail_index.add(client_cache[client_id].alias, coord.utc_timestamp,
+                        coord.coordinates)
+
+    # Drop uploaded locations that are already known, live repeats of the
+    # same position within a second are kept
+    client_data = client_cache[client_id]
+    tail = (client_data.coordinates[-1].utc_timestamp
+            if client_data.coordinates else None)
+    known = {
+        (coord.utc_timestamp, tuple(coord.coordinates))
+        for coord in client_data.coordinates
     }
-    await sio.emit('update-map', (coord_data, pin_data))
+
+    fresh = []
+    for coord in uploaded:
+        key = (coord.utc_timestamp, tuple(coord.coordinates))
+        if key in known: continue
+        known.add(key)
+        fresh.append(coord)
+
+    # Merge by timestamp, the stable sort keeps live order within a second
+    merged = sorted(list(client_data.coordinates) + fresh,
+                    key=lambda coord: coord.utc_timestamp)
+    client_data.coordinates.clear()
+    client_data.coordinates.extend(merged)
+
+    # Only locations sorted past the old end are counted as appended, older
+    # ones land inside the trail and make receivers re-baseline
+    appended = sum(1 for coord in fresh
+                   if tail is None or coord.utc_timestamp >= tail)
+    count_points(client_data, appended, rebuilt=appended < len(fresh))
+
+    client_data.last_coordinate_utc_ts = max(
+        client_data.last_coordinate_utc_ts, merged[-1].utc_timestamp
+    )
+
+    record_change(client_data.color, client_data)
+
+    # Broadcast the merged trail to everyone
+    await broadcast_map()
+
+    return len(uploaded)
 
 @sio.on('reset-coordinates')
+@recorder.recorded('reset-coordinates')
 async def reset_coordinates(client_id:str):
     """
     **Called when a client wants to reset their cached coordinates.**
@@ -237,21 +544,13 @@ async def reset_coordinates(client_id:str):
                  highlight=client_id)
     
     client_cache[client_id].coordinates.clear()
+    record_change(client_cache[client_id].color, client_cache[client_id])
 
     # Broadcast the reset to everyone
-    coord_data = {
-        client_data.color: [
-            coord.coordinates for coord in client_data.coordinates
-        ]
-        for client_data in client_cache.values()
-    }
-    pin_data = {
-        client_data.color: client_data.pin_position
-        for client_data in client_cache.values()
-    }
-    await sio.emit('update-map', (coord_data, pin_data))
+    await broadcast_map()
 
 @sio.on('pin-location')
+@recorder.recorded('pin-location')
 async def pin_location(client_id:str, location:list[float, float]):
     """
     **Called when a user pins a location on the map.**
@@ -274,19 +573,51 @@ async def pin_location(client_id:str, location:list[float, float]):
         client_cache[client_id].pin_position = None
     else:
         client_cache[client_id].pin_position = location
+    record_change(client_cache[client_id].color, client_cache[client_id])
 
     # Broadcast the update to everyone
-    coord_data = {
-        client_data.color: [
-            coord.coordinates for coord in client_data.coordinates
-        ]
-        for client_data in client_cache.values()
-    }
-    pin_data = {
-        client_data.color: client_data.pin_position
-        for client_data in client_cache.values()
-    }
-    await sio.emit('update-map', (coord_data, pin_data))
+    await broadcast_map()
+
+@sio.on('query-trail')
+@recorder.recorded('query-trail')
+async def query_trail_event(client_id:str, params:dict) -> dict:
+    """
+    **Called when a client requests a page of a player's trail history.**
+    
+    *Parameters*:
+    - `client_id` (str): The ID of the requesting client.
+    - `params` (dict): The query, see `parse_trail_query`.
+    
+    *Returns*:
+    - (dict): The page, acknowledging the request.
+    """
+    # Make sure user exists in the cache
+    if not client_cache.get(client_id):
+        lr.Log.warn(f'Non-cached user "{client_id}" tried querying a trail!',
+                    highlight=client_id)
+        return { 'error': 'Not connected!' }
+
+    return query_trail(params)
+
+async def trail_route(request:web.Request) -> web.Response:
+    """
+    **HTTP twin of the `query-trail` event, `GET /trail` with the query as
+    URL parameters and the server password as `X-Password` header.**
+    
+    *Parameters*:
+    - `request` (web.Request): The request.
+    
+    *Returns*:
+    - (web.Response): The page as JSON.
+    """
+    if request.headers.get('X-Password') != CONFIG.get('password'):
+        return web.json_response({ 'error': 'Incorrect password!' },
+                                 status=401)
+
+    result = query_trail(dict(request.query))
+    return web.json_response(result, status=400 if 'error' in result else 200)
+
+app.router.add_get('/trail', trail_route)
 
 async def fetching_worker():
     """
@@ -381,6 +712,8 @@ async def on_cleanup(app:web.Application):
     app['heartbeat_task'].cancel()
     app['fetching_task'].cancel()
 
+    recorder.close()
+
 def main():
     """
     **Main entrypoint.**
@@ -389,6 +722,11 @@ def main():
     app.on_startup.append(on_startup)
     app.on_cleanup.append(on_cleanup)
 
+    # Recordings can be replayed with `python -m benchmarks.replay`
+    if CONFIG.get('record_events'):
+        utc = dt.now(tz=tz.utc).strftime('%Y%m%d-%H%M%S')
+        recorder.open(ROOT / 'server' / 'recordings' / f'{utc}.jsonl')
+
     try:
         web.run_app(app, host='0.0.0.0', port=CONFIG.get('port'))
     except KeyboardInterrupt:
@@ -0,0 +1,129 @@
+from typing import Any, Callable
+from datetime import datetime as dt, timezone as tz
+from pathlib import Path
+import functools, inspect, json, time
+import loggerric as lr
+
+# Recording format, bumped whenever the line layout changes
+RECORDING_FORMAT = 1
+
+# Authentication values never written to a recording
+SECRET_AUTH_KEYS = ('password', 'je-cookie')
+
+def redact_connect(environment_values:dict, authentication:dict) -> list:
+    """
+    **Recorded arguments of a connect, without transport metadata and
+    secrets.**
+
+    *Parameters*:
+    - `environment_values` (dict): Transport metadata.
+    - `authentication` (dict): Authentication parameters.
+
+    *Returns*:
+    - (list): The arguments to record.
+    """
+    return [{}, {
+        key: value for key, value in (authentication or {}).items()
+        if key not in SECRET_AUTH_KEYS
+    }]
+
+class EventRecorder:
+    """
+    **Records every inbound event as a compact JSON line.**
+
+    The first line is a header with the format and the UTC start time, every
+    other line is `[offset_ms, event, client_id, args]` with the offset from
+    the start of the recording. Handlers are registered through `recorded`,
+    which also keeps them by event name so a replay can feed them.
+
+    *Methods*:
+    - `open(path) -> None`: Start recording to a file.
+    - `close() -> None`: Stop recording.
+    - `recorded(event, redact) -> Callable`: Decorator recording a handler.
+    """
+    def __init__(self):
+        """
+        **Initializer.**
+        """
+        self.__file = None
+        self.__start:float = None
+
+        self.handlers:dict[str, Callable] = {}
+
+    def open(self, path:Path):
+        """
+        **Start recording to a file.**
+
+        *Parameters*:
+        - `path` (Path): The recording, created with its parent folders.
+        """
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        # Line buffered, a crash loses at most the event being written
+        self.__file = open(path, 'w', encoding='utf-8', buffering=1)
+        self.__start = time.perf_counter()
+        self.__write({
+            'format': RECORDING_FORMAT,
+            'started_utc_ms': int(dt.now(tz=tz.utc).timestamp() * 1000)
+        })
+
+        lr.Log.info(f'Recording events to "{path}"!')
+
+    def close(self):
+        """
+        **Stop recording.**
+        """
+        if not self.__file: return
+
+        self.__file.close()
+        self.__file = None
+
+    def __write(self, line:Any):
+        """
+        **Write one JSON line.**
+
+        *Parameters*:
+        - `line` (Any): The JSON serializable line.
+        """
+        self.__file.write(json.dumps(line, separators=(',', ':')) + '\n')
+
+    def recorded(self, event:str,
+                 redact:Callable[..., list]=None) -> Callable:
+        """
+        **Decorator recording every call of an async event handler.**
+
+        *Parameters*:
+        - `event` (str): The event name.
+        - `redact` (Callable): Maps the arguments after the client ID to the
+        arguments to record, recorded as is if missing.
+
+        *Returns*:
+        - (Callable): The decorator.
+        """
+        def decorator(handler:Callable) -> Callable:
+            """
+            **Wrap the handler.**
+            """
+            signature = inspect.signature(handler)
+
+            @functools.wraps(handler)
+            async def wrapper(client_id:str, *args:Any) -> Any:
+                """
+                **Record the event, then handle it.**
+                """
+                # Raises before recording on calls the handler would reject
+                signature.bind(client_id, *args)
+
+                if self.__file:
+                    offset_ms = (time.perf_counter() - self.__start) * 1000
+                    self.__write([
+                        round(offset_ms, 3), event, client_id,
+                        redact(*args) if redact else list(args)
+                    ])
+
+                return await handler(client_id, *args)
+
+            self.handlers[event] = wrapper
+            return wrapper
+
+        return decorator
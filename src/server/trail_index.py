@@ -0,0 +1,312 @@
+from bisect import bisect_left, bisect_right
+from array import array
+import heapq
+
+class PointRun:
+    """
+    **Points in time order, as compact parallel arrays.**
+
+    Points of the same time are ordered by their sequence number, so every
+    point has a unique `(utc_ts, seq)` key and the run is sorted by it.
+
+    *Attributes*:
+    - `times` (array): UTC timestamp of every point.
+    - `seqs` (array): Sequence number of every point, in order of adding.
+    - `ys` (array): First coordinate of every point.
+    - `xs` (array): Second coordinate of every point.
+
+    *Methods*:
+    - `insert(utc_ts, seq, y, x) -> None`: Add a point in time order.
+    - `contains(utc_ts, y, x) -> bool`: Whether a point is in the run.
+    - `between(start, end) -> range`: Indices of points in a time range.
+    - `after(key) -> int`: Index of the first point past a key.
+    - `drop_before(utc_ts) -> None`: Forget points older than a time.
+    """
+    def __init__(self):
+        """
+        **Initializer.**
+        """
+        self.times = array('d')
+        self.seqs = array('q')
+        self.ys = array('d')
+        self.xs = array('d')
+
+    def insert(self, utc_ts:float, seq:int, y:float, x:float):
+        """
+        **Add a point in time order, after points of the same time.**
+
+        *Parameters*:
+        - `utc_ts` (float): When the point was captured.
+        - `seq` (int): Sequence number, higher than any in the run.
+        - `y` (float): First coordinate.
+        - `x` (float): Second coordinate.
+        """
+        # Live points arrive in order, only offline uploads land earlier
+        if not self.times or utc_ts >= self.times[-1]:
+            self.times.append(utc_ts)
+            self.seqs.append(seq)
+            self.ys.append(y)
+            self.xs.append(x)
+            return
+
+        i = bisect_right(self.times, utc_ts)
+        self.times.insert(i, utc_ts)
+        self.seqs.insert(i, seq)
+        self.ys.insert(i, y)
+        self.xs.insert(i, x)
+
+    def contains(self, utc_ts:float, y:float, x:float) -> bool:
+        """
+        **Whether a point of the same time and position is in the run.**
+
+        *Parameters*:
+        - `utc_ts` (float): When the point was captured.
+        - `y` (float): First coordinate.
+        - `x` (float): Second coordinate.
+
+        *Returns*:
+        - (bool): True for a duplicate.
+        """
+        return any(self.ys[i] == y and self.xs[i] == x
+                   for i in self.between(utc_ts, utc_ts))
+
+    def between(self, start:float, end:float) -> range:
+        """
+        **Indices of the points within a time range.**
+
+        *Parameters*:
+        - `start` (float): Oldest time, inclusive.
+        - `end` (float): Newest time, inclusive.
+
+        *Returns*:
+        - (range): The indices, oldest first.
+        """
+        return range(bisect_left(self.times, start),
+                     bisect_right(self.times, end))
+
+    def after(self, key:tuple[float, int]) -> int:
+        """
+        **Index of the first point past a key.**
+
+        *Parameters*:
+        - `key` (tuple[float, int]): `(utc_ts, seq)` of a point, which does
+        not have to be in the run anymore.
+
+        *Returns*:
+        - (int): The index, the run's length if every point is before it.
+        """
+        utc_ts, seq = key
+        i = bisect_left(self.times, utc_ts)
+        end = bisect_right(self.times, utc_ts)
+        while i < end and self.seqs[i] <= seq: i += 1
+
+        return i
+
+    def drop_before(self, utc_ts:float):
+        """
+        **Forget points older than a time.**
+
+        *Parameters*:
+        - `utc_ts` (float): The oldest time to keep.
+        """
+        end = bisect_left(self.times, utc_ts)
+        del self.times[:end], self.seqs[:end], self.ys[:end], self.xs[:end]
+
+class TrailIndex:
+    """
+    **Full location history of every player, queryable by time and area.**
+
+    Every player has one time sorted run of all their points, plus a run per
+    coarse grid cell they visited. Time ranges bisect the full run, areas
+    only visit the runs of overlapping cells and merge them back into time
+    order, so neither scans the whole history. Pages continue after the
+    `(utc_ts, seq)` key of the last point returned, so points uploaded
+    later never shift or repeat the following pages.
+
+    *Methods*:
+    - `add(player, utc_ts, coordinates) -> bool`: Index one point.
+    - `query(player, start, end, bbox, cursor, limit) -> tuple`: A page of
+    points.
+    - `size(player) -> int`: Amount of indexed points of a player.
+    """
+    def __init__(self, cell_size:float=64.0, max_points:int=100000):
+        """
+        **Initializer.**
+
+        *Parameters*:
+        - `cell_size` (float): Side of a grid cell in world units. Defaults
+        to 64.
+        - `max_points` (int): Most points kept per player, the oldest are
+        dropped first. Defaults to 100000.
+        """
+        self.__cell_size = cell_size
+        self.__max_points = max_points
+
+        self.__runs:dict[str, PointRun] = {}
+        self.__cells:dict[str, dict[tuple[int, int], PointRun]] = {}
+        self.__seq = 0
+
+    def __cell(self, y:float, x:float) -> tuple[int, int]:
+        """
+        **The grid cell of a position.**
+
+        *Parameters*:
+        - `y` (float): First coordinate.
+        - `x` (float): Second coordinate.
+
+        *Returns*:
+        - (tuple[int, int]): Row and column of the cell.
+        """
+        return int(y // self.__cell_size), int(x // self.__cell_size)
+
+    def size(self, player:str) -> int:
+        """
+        **Amount of indexed points of a player.**
+
+        *Parameters*:
+        - `player` (str): The player's alias.
+
+        *Returns*:
+        - (int): The amount of points.
+        """
+        run = self.__runs.get(player)
+        return len(run.times) if run else 0
+
+    def add(self, player:str, utc_ts:float,
+            coordinates:tuple[float, float]) -> bool:
+        """
+        **Index one point, ignoring exact duplicates.**
+
+        *Parameters*:
+        - `player` (str): The player's alias.
+        - `utc_ts` (float): When the point was captured.
+        - `coordinates` (tuple[float, float]): The position.
+
+        *Returns*:
+        - (bool): Whether the point was new.
+        """
+        y, x = float(coordinates[0]), float(coordinates[1])
+
+        # Offline uploads may repeat points that were already sent live,
+        # only the few points of the same second have to be compared
+        run = self.__runs.setdefault(player, PointRun())
+        if run.contains(utc_ts, y, x): return False
+
+        self.__seq += 1
+        run.insert(utc_ts, self.__seq, y, x)
+
+        cells = self.__cells.setdefault(player, {})
+        cells.setdefault(self.__cell(y, x), PointRun()).insert(
+            utc_ts, self.__seq, y, x
+        )
+
+        # Trim in chunks, so dropping old points stays amortized
+        if len(run.times) > self.__max_points * 1.1:
+            self.__trim(player, run.times[len(run.times) - self.__max_points])
+
+        return True
+
+    def __trim(self, player:str, utc_ts:float):
+        """
+        **Forget the points of a player older than a time.**
+
+        *Parameters*:
+        - `player` (str): The player's alias.
+        - `utc_ts` (float): The oldest time to keep.
+        """
+        self.__runs[player].drop_before(utc_ts)
+
+        cells = self.__cells[player]
+        for cell in list(cells):
+            cells[cell].drop_before(utc_ts)
+            if not cells[cell].times: del cells[cell]
+
+    def query(self, player:str, start:float=None, end:float=None,
+              bbox:dict[str, float]=None, cursor:tuple[float, int]=None,
+              limit:int=500) -> tuple[list[list], tuple[float, int]]:
+        """
+        **A page of a player's points, filtered by time and area.**
+
+        *Parameters*:
+        - `player` (str): The player's alias.
+        - `start` (float): Oldest time, inclusive. Unbounded if missing.
+        - `end` (float): Newest time, inclusive. Unbounded if missing.
+        - `bbox` (dict[str, float]): Area in world coordinates with `min_x`,
+        `max_x`, `min_y` and `max_y`, x being the second coordinate.
+        Unbounded if missing.
+        - `cursor` (tuple[float, int]): Key of the last point of a previous
+        page, starts from the oldest point if missing.
+        - `limit` (int): Most points to return.
+
+        *Returns*:
+        - (tuple[list[list], tuple[float, int]]): `[utc_ts, y, x]` points
+        oldest first, and the cursor of the next page or None on the last
+        page.
+        """
+        start = float('-inf') if start is None else start
+        end = float('inf') if end is None else end
+
+        run = self.__runs.get(player)
+        if not run: return [], None
+
+        def first(some_run:PointRun, indices:range) -> range:
+            """
+            **The indices of a time range that follow the cursor.**
+            """
+            if cursor is None: return indices
+
+            return range(max(indices.start, some_run.after(cursor)),
+                         indices.stop)
+
+        if bbox is None:
+            indices = first(run, run.between(start, end))
+            page = [
+                [run.times[i], run.ys[i], run.xs[i]]
+                for i in indices[:limit]
+            ]
+            if len(indices) <= limit: return page, None
+
+            last = indices[limit - 1]
+            return page, (run.times[last], run.seqs[last])
+
+        min_y, max_y = sorted((bbox['min_y'], bbox['max_y']))
+        min_x, max_x = sorted((bbox['min_x'], bbox['max_x']))
+        low_row, low_col = self.__cell(min_y, min_x)
+        high_row, high_col = self.__cell(max_y, max_x)
+
+        def matches(cell_run:PointRun):
+            """
+            **The points of one cell within the time range and area.**
+            """
+            for i in first(cell_run, cell_run.between(start, end)):
+                y, x = cell_run.ys[i], cell_run.xs[i]
+                if min_y <= y <= max_y and min_x <= x <= max_x:
+                    yield cell_run.times[i], cell_run.seqs[i], y, x
+
+        # Only cells overlapping the area are visited, whichever is smaller
+        # of the area's cells and the player's visited cells
+        cells = self.__cells[player]
+        area_cells = (high_row - low_row + 1) * (high_col - low_col + 1)
+        if area_cells < len(cells):
+            overlapping = [
+                cells[(row, col)]
+                for row in range(low_row, high_row + 1)
+                for col in range(low_col, high_col + 1)
+                if (row, col) in cells
+            ]
+        else:
+            overlapping = [
+                cell_run for (row, col), cell_run in cells.items()
+                if low_row <= row <= high_row and low_col <= col <= high_col
+            ]
+
+        # Keys are unique, so points merge back in time order by them
+        merged = heapq.merge(*(matches(r) for r in overlapping))
+
+        page = []
+        for utc_ts, seq, y, x in merged:
+            if len(page) == limit: return page, last
+            page.append([utc_ts, y, x])
+            last = (utc_ts, seq)
+
+        return page, None
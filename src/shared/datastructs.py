@@ -45,6 +45,8 @@ class Coord:
 @dataclass
 class Client:
     coordinates:deque[Coord]=field(default_factory=lambda: deque(maxlen=16))
+    trail_seq:int=0
+    trail_base:int=0
     last_coordinate_utc_ts:int=0
     pin_position:tuple[float, float]=field(default_factory=tuple)
     alias:str='Unknown Client'
@@ -99,6 +101,8 @@ def serialize_client(client:Client) -> dict:
     data = asdict(client)
 
     del data['coordinates']
+    del data['trail_seq']
+    del data['trail_base']
     del data['last_heartbeat_utc_ts']
 
     if data.get('je'):
@@ -1,7 +1,7 @@
 from datetime import datetime
 from collections import deque
 from bs4 import BeautifulSoup
-import requests, time
+import requests, aiohttp, asyncio, time
 import loggerric as lr
 
 def get_sleep_time(delay:int=3) -> int:
@@ -27,6 +27,8 @@ class Client:
     
     *Methods*:
     - `fetch(path) -> BeautifulSoup`: Parsed HTML response from the endpoint.
+    - `fetch_async(session, path) -> BeautifulSoup`: The same, without
+    blocking an event loop.
     """
     def __init__(self, base_url:str, cookie:str, user_agent:str):
         """
@@ -72,6 +74,43 @@ class Client:
 
         return BeautifulSoup(response.text, 'lxml')
 
+    async def fetch_async(self, session:aiohttp.ClientSession,
+                          path:str='') -> BeautifulSoup:
+        """
+        **Fetch from the endpoint without blocking the event loop.**
+        
+        *Parameters*:
+        - `session` (aiohttp.ClientSession): Session to send the request on.
+        - `path` (str): URL path after the base URL.
+        
+        *Returns*:
+        - (BeautifulSoup): Parsed HTML response from the endpoint.
+        """
+
+        url = self.base_url + path
+
+        try:
+            async with session.get(url, headers=self.headers) as response:
+                # URL did not return OK
+                if not response.ok:
+                    self.is_down = True
+                    lr.Log.error('"{}" Failed! [{}]: {}'.format(
+                        url, response.status, response.reason
+                    ))
+                    return
+
+                text = await response.text()
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            self.is_down = True
+            lr.Log.error('"{}" Failed! {}'.format(
+                url, str(e) or type(e).__name__
+            ))
+            return
+
+        self.is_down = False
+
+        return BeautifulSoup(text, 'lxml')
+
 class Observer:
     """
     **Observes webpage data, parses it and writes to an output file.**
@@ -86,17 +125,26 @@ class Observer:
     - `estimate_time_to_target(info, deltas) -> dict`: Calculate EST minutes
     until the target value is hit.
     - `extract_info(soup) -> dict`: Extract information from parsed HTML soup.
-    - `mainloop() -> None`: Enter the mainloop, uses while true.
+    - `fetch() -> dict`: Fetch and parse the player page.
+    - `fetch_async(session) -> dict`: The same, without blocking an event
+    loop.
     """
-    def __init__(self, je_cookie:str, user_agent:str):
+    def __init__(self, je_cookie:str, user_agent:str,
+                 base_url:str='https://echoes.norden.cloud/'):
         """
         **Initializer.**
+
+        *Parameters*:
+        - `je_cookie` (str): Cookie to authenticate with.
+        - `user_agent` (str): User agent to pass in the headers.
+        - `base_url` (str): Base URL of the Jurassic Echoes site. Defaults to
+        the live site, overridden by the offline fixture server.
         """
 
         self.cookie = je_cookie
         
         self.Client = Client(
-            base_url='https://echoes.norden.cloud/',
+            base_url=base_url,
             cookie=je_cookie,
             user_agent=user_agent
         )
@@ -217,8 +265,11 @@ class Observer:
 
             # Only grab valid results
             if label and percent and label.text in VALID:
-                # Extract the percentage and format it
-                pct = float(percent.text[0:-1]) / 100
+                # Extract the percentage and format it, skip malformed values
+                try:
+                    pct = float(percent.text[0:-1]) / 100
+                except ValueError:
+                    continue
                 extracted_info[label.text] = pct
 
         return extracted_info
@@ -254,7 +305,7 @@ class Observer:
 
         species = soup.find_all('div', class_='mt-1 text-2xl font-semibold')
 
-        if not species:
+        if len(species) < 2:
             return 'No Dinosaur'
         
         return species[1].text
@@ -265,6 +316,32 @@ class Observer:
         """
         soup = self.Client.fetch('player')
         self.is_down = self.Client.is_down
+
+        return self.__parse(soup)
+
+    async def fetch_async(self, session:aiohttp.ClientSession):
+        """
+        **Fetch all relevant Jurassic Echoes data without blocking the event
+        loop.**
+        
+        *Parameters*:
+        - `session` (aiohttp.ClientSession): Session to send the request on.
+        """
+        soup = await self.Client.fetch_async(session, 'player')
+        self.is_down = self.Client.is_down
+
+        return self.__parse(soup)
+
+    def __parse(self, soup:BeautifulSoup) -> dict:
+        """
+        **Parse a fetched player page and record it in the history.**
+        
+        *Parameters*:
+        - `soup` (BeautifulSoup): The parsed page, None if the fetch failed.
+        
+        *Returns*:
+        - (dict): The data, None if the fetch or cookie failed.
+        """
         if not soup: return
 
         info = self.extract_info(soup)
@@ -0,0 +1,88 @@
+import json
+
+from client.outbox import LocationOutbox
+from client.main import merge_player_lists
+
+def test_roundtrip_through_disk(tmp_path):
+    path = tmp_path / 'outbox.json'
+    outbox = LocationOutbox(path)
+    outbox.push(100, [1.5, -2.0])
+    outbox.push(101, [3.0, 4.0])
+
+    assert json.loads(path.read_text()) == [[100, 1.5, -2.0],
+                                            [101, 3.0, 4.0]]
+    assert LocationOutbox(path).pending() == outbox.pending()
+
+def test_max_size_drops_the_oldest(tmp_path):
+    path = tmp_path / 'outbox.json'
+    outbox = LocationOutbox(path, max_size=3)
+    for n in range(5):
+        outbox.push(100 + n, [float(n), 0.0])
+
+    assert [entry[0] for entry in outbox.pending()] == [102, 103, 104]
+    assert LocationOutbox(path, max_size=3).pending() == outbox.pending()
+
+    # A smaller limit on load keeps the newest
+    smaller = LocationOutbox(path, max_size=2)
+    assert [entry[0] for entry in smaller.pending()] == [103, 104]
+
+def test_partial_acknowledge(tmp_path):
+    path = tmp_path / 'outbox.json'
+    outbox = LocationOutbox(path)
+    for n in range(4):
+        outbox.push(100 + n, [float(n), 0.0])
+
+    outbox.acknowledge(2)
+    assert [entry[0] for entry in outbox.pending()] == [102, 103]
+    assert LocationOutbox(path).pending() == outbox.pending()
+
+    outbox.acknowledge(0)
+    assert len(outbox.pending()) == 2
+
+    outbox.acknowledge(10)
+    assert outbox.pending() == []
+    assert json.loads(path.read_text()) == []
+
+def test_pushes_during_an_upload_are_kept(tmp_path):
+    outbox = LocationOutbox(tmp_path / 'outbox.json')
+    outbox.push(100, [1.0, 1.0])
+
+    sent = outbox.pending()
+    outbox.push(101, [2.0, 2.0])
+    outbox.acknowledge(len(sent))
+
+    assert outbox.pending() == [[101, 2.0, 2.0]]
+
+def test_unreadable_file_is_ignored(tmp_path):
+    path = tmp_path / 'outbox.json'
+    path.write_text('{ not json')
+
+    outbox = LocationOutbox(path)
+    assert outbox.pending() == []
+
+    outbox.push(100, [1.0, 1.0])
+    assert json.loads(path.read_text()) == [[100, 1.0, 1.0]]
+
+def test_memory_only_without_a_path():
+    outbox = LocationOutbox()
+    outbox.push(100, [1.0, 1.0])
+
+    assert outbox.pending() == [[100, 1.0, 1.0]]
+
+def test_refresh_keeps_the_pending_list():
+    pending = ({ 'a': {} }, False)
+
+    assert merge_player_lists(pending, (None, False)) == pending
+
+def test_new_list_replaces_the_pending_one():
+    pending = ({ 'a': {} }, False)
+    new = ({ 'b': {} }, False)
+
+    assert merge_player_lists(pending, new) == new
+    assert merge_player_lists((None, False), new) == new
+
+def test_disconnect_state_change_replaces_the_pending_list():
+    pending = ({ 'a': {} }, False)
+    new = (None, True)
+
+    assert merge_player_lists(pending, new) == new
@@ -0,0 +1,111 @@
+from client.playback import TrailHistory, new_points
+
+def test_new_points_counts_repeated_positions():
+    previous = [(1.0, 1.0), (2.0, 2.0)]
+    coords = [(1.0, 1.0), (2.0, 2.0), (2.0, 2.0), (2.0, 2.0)]
+
+    assert new_points(previous, coords, 10, 12) == [(2.0, 2.0), (2.0, 2.0)]
+
+def test_new_points_without_new_arrivals():
+    coords = [(1.0, 1.0), (1.0, 1.0)]
+
+    assert new_points(coords, coords, 10, 10) == []
+
+def test_new_points_first_window_is_new():
+    coords = [(1.0, 1.0), (2.0, 2.0)]
+
+    assert new_points([], coords, None, 5) == coords
+
+def test_new_points_counter_reset_takes_the_whole_window():
+    previous = [(1.0, 1.0)]
+    coords = [(5.0, 5.0), (6.0, 6.0)]
+
+    assert new_points(previous, coords, 100, 3) == coords
+
+def test_new_points_rebuilt_window_only_counts_appended_points():
+    previous = [(1.0, 1.0), (2.0, 2.0)]
+    coords = [(0.5, 0.5), (1.0, 1.0), (2.0, 2.0), (3.0, 3.0)]
+
+    # Behind the rebuild only the point appended since it is new
+    assert new_points(previous, coords, 10, 13, base=12) == [(3.0, 3.0)]
+
+    # Up to date with the rebuild, the counter alone decides
+    assert new_points(previous, coords, 12, 13, base=12) == [(3.0, 3.0)]
+
+def test_new_points_counter_beyond_the_window():
+    coords = [(1.0, 1.0), (2.0, 2.0)]
+
+    assert new_points([], coords, 0, 50) == coords
+
+def test_new_points_by_content_without_counters():
+    previous = [(1.0, 1.0), (2.0, 2.0)]
+    coords = [(2.0, 2.0), (3.0, 3.0)]
+
+    assert new_points(previous, coords) == [(3.0, 3.0)]
+    assert new_points(previous, [(7.0, 7.0)]) == [(7.0, 7.0)]
+
+def test_history_records_repeated_identical_points():
+    history = TrailHistory(trail_length=8)
+    history.observe({ 'red': [(1.0, 1.0)] }, {}, 100.0, { 'red': (1, 0) })
+    history.observe({ 'red': [(1.0, 1.0)] * 2 }, {}, 101.0, { 'red': (2, 0) })
+    history.observe({ 'red': [(1.0, 1.0)] * 3 }, {}, 102.0, { 'red': (3, 0) })
+
+    trails, _ = history.seek(102.0)
+    assert trails['red'] == [(1.0, 1.0)] * 3
+
+    # A re-render without new arrivals adds nothing
+    history.observe({ 'red': [(1.0, 1.0)] * 3 }, {}, 103.0, { 'red': (3, 0) })
+    trails, _ = history.seek(103.0)
+    assert trails['red'] == [(1.0, 1.0)] * 3
+
+def test_history_seek_before_the_first_keyframe():
+    history = TrailHistory()
+    history.observe({ 'red': [(1.0, 1.0)] }, { 'red': (5, 5) }, 100.0)
+
+    assert history.seek(99.0) == ({}, {})
+    assert history.seek(100.0) == ({ 'red': [(1.0, 1.0)] },
+                                   { 'red': (5, 5) })
+
+def test_history_seek_replays_changes_after_the_keyframe():
+    history = TrailHistory(keyframe_sec=60.0)
+    history.observe({ 'red': [(1.0, 1.0)] }, {}, 100.0)
+    history.observe({ 'red': [(1.0, 1.0)], 'blue': [(2.0, 2.0)] },
+                    { 'blue': (3, 3) }, 110.0)
+    history.observe({ 'blue': [(2.0, 2.0)] }, { 'blue': (3, 3) }, 120.0)
+
+    assert set(history.seek(105.0)[0]) == { 'red' }
+    assert history.seek(115.0)[1] == { 'blue': (3, 3) }
+    assert set(history.seek(125.0)[0]) == { 'blue' }
+
+def test_history_prune_then_seek():
+    history = TrailHistory(trail_length=4, keyframe_sec=10.0,
+                           max_age_min=1.0)
+
+    for n in range(20):
+        coords = [(float(i), float(i)) for i in range(max(0, n - 3), n + 1)]
+        history.observe({ 'red': coords }, {}, 1000.0 + n * 10,
+                        { 'red': (n + 1, 0) })
+
+    oldest, newest = history.span()
+    assert newest == 1190.0
+    assert 1000.0 < oldest and 1190.0 - oldest <= 70.0
+
+    # Pruned times are gone, the oldest kept keyframe still has whole trails
+    assert history.seek(oldest - 1) == ({}, {})
+    trails, _ = history.seek(oldest)
+    step = int((oldest - 1000.0) // 10)
+    assert trails['red'] == [
+        (float(i), float(i)) for i in range(max(0, step - 3), step + 1)
+    ]
+
+    trails, _ = history.seek(newest)
+    assert trails['red'] == [(float(i), float(i)) for i in range(16, 20)]
+
+def test_history_leave_cuts_the_trail():
+    history = TrailHistory()
+    history.observe({ 'red': [(1.0, 1.0)] }, {}, 100.0, { 'red': (1, 0) })
+    history.observe({}, {}, 110.0)
+    history.observe({ 'red': [(9.0, 9.0)] }, {}, 120.0, { 'red': (50, 0) })
+
+    assert history.seek(115.0) == ({}, {})
+    assert history.seek(120.0)[0] == { 'red': [(9.0, 9.0)] }
@@ -0,0 +1,63 @@
+from client.rendering import decimate, visible_runs
+
+def test_decimate_empty_and_short_inputs():
+    assert decimate([], 2) == []
+    assert decimate([(5, 5)], 2) == [(5, 5)]
+    assert decimate([(5, 5), (5, 6)], 2) == [(5, 5), (5, 6)]
+
+def test_decimate_without_a_distance_keeps_everything():
+    points = [(0, 0), (0, 0), (0, 0)]
+
+    assert decimate(points, 0) == points
+
+def test_decimate_merges_close_points():
+    points = [(0, 0), (1, 0), (2, 0), (3, 0), (10, 0)]
+
+    assert decimate(points, 3) == [(0, 0), (3, 0), (10, 0)]
+
+def test_decimate_keeps_the_last_point():
+    # The latest position replaces a kept point it overlaps
+    points = [(0, 0), (5, 0), (6, 0)]
+    assert decimate(points, 3) == [(0, 0), (6, 0)]
+
+    # Even when everything overlaps the first point
+    points = [(0, 0), (1, 0), (1, 1)]
+    assert decimate(points, 3) == [(0, 0), (1, 1)]
+
+def test_decimate_keeps_repeated_positions_apart_from_the_ends():
+    points = [(0, 0)] * 5
+
+    assert decimate(points, 1) == [(0, 0), (0, 0)]
+
+def test_visible_runs_empty_and_single_point():
+    assert visible_runs([], 100, 100, 2) == []
+    assert visible_runs([(50, 50)], 100, 100, 2) == []
+
+def test_visible_runs_fully_inside():
+    points = [(10, 10), (20, 20), (30, 10)]
+
+    assert visible_runs(points, 100, 100, 2) == [points]
+
+def test_visible_runs_split_by_the_viewport_edge():
+    points = [(10, 10), (50, 10), (300, 10), (400, 10), (60, 60), (70, 70)]
+
+    assert visible_runs(points, 100, 100, 2) == [
+        [(10, 10), (50, 10), (300, 10)],
+        [(400, 10), (60, 60), (70, 70)]
+    ]
+
+def test_visible_runs_fully_outside():
+    points = [(-50, -50), (-20, -40), (-10, -30)]
+
+    assert visible_runs(points, 100, 100, 2) == []
+
+def test_visible_runs_margin_counts_as_visible():
+    points = [(-3, 50), (-3, 60)]
+
+    assert visible_runs(points, 100, 100, 2) == []
+    assert visible_runs(points, 100, 100, 4) == [points]
+
+def test_visible_runs_keeps_segments_crossing_the_frame():
+    points = [(-50, 50), (150, 50)]
+
+    assert visible_runs(points, 100, 100, 0) == [points]
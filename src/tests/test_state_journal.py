@@ -0,0 +1,76 @@
+from collections import deque
+import pytest
+
+from shared.datastructs import Client, Coord
+from server import main as server
+
+@pytest.fixture
+def journal(monkeypatch) -> deque:
+    """
+    **A fresh, small state journal starting at version 100.**
+    """
+    state_journal = deque(maxlen=4)
+    monkeypatch.setattr(server, 'state_journal', state_journal)
+    monkeypatch.setattr(server, 'state_version', 100)
+
+    return state_journal
+
+def moved(color:str, *coordinates:list[float]) -> Client:
+    """
+    **A client of a color with a trail.**
+    """
+    client = Client(color=color)
+    for utc_ts, coord in enumerate(coordinates):
+        client.coordinates.append(Coord(utc_timestamp=utc_ts,
+                                        coordinates=coord))
+
+    return client
+
+def test_current_version_has_no_changes(journal):
+    server.record_change('red', moved('red', [1, 1]))
+
+    assert server.changes_since(server.state_version) == {}
+
+def test_changes_keep_the_latest_state_per_color(journal):
+    server.record_change('red', moved('red', [1, 1]))
+    server.record_change('blue', moved('blue', [5, 5]))
+    server.record_change('red', moved('red', [1, 1], [2, 2]))
+    server.record_change('blue')
+
+    changes = server.changes_since(100)
+    assert changes['red']['coordinates'] == [[1, 1], [2, 2]]
+    assert changes['blue'] is None
+
+    assert server.changes_since(102) == {
+        'red': changes['red'], 'blue': None
+    }
+
+def test_overflowed_journal_falls_back_to_the_full_state(journal):
+    for n in range(10):
+        server.record_change('red', moved('red', [n, n]))
+
+    assert server.state_version == 110
+    assert len(journal) == 4
+
+    # Older than the journal reaches, the client needs the full map
+    assert server.changes_since(100) is None
+    assert server.changes_since(105) is None
+
+    # Right at the journal's start it still catches up
+    assert server.changes_since(106)['red']['coordinates'] == [[9, 9]]
+
+def test_version_ahead_of_the_server(journal):
+    server.record_change('red', moved('red', [1, 1]))
+
+    # From before a restart of a server with a later clock
+    assert server.changes_since(server.state_version + 1) is None
+
+@pytest.mark.parametrize('version', [None, '101', 100.5])
+def test_missing_or_malformed_version(journal, version):
+    server.record_change('red', moved('red', [1, 1]))
+
+    assert server.changes_since(version) is None
+
+def test_empty_journal(journal):
+    assert server.changes_since(99) is None
+    assert server.changes_since(100) == {}
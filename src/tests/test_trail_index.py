@@ -0,0 +1,145 @@
+import random
+import pytest
+
+from server.trail_index import TrailIndex
+from server import main as server
+
+def filled_index(points:int=500, seed:int=7) -> tuple[TrailIndex, list]:
+    """
+    **An index holding random points of one player, several per second.**
+    """
+    rng = random.Random(seed)
+    index = TrailIndex(cell_size=10.0)
+    added = []
+    for n in range(points):
+        utc_ts = 1000.0 + n // 3
+        y, x = rng.uniform(0, 100), rng.uniform(0, 100)
+        index.add('rex', utc_ts, (y, x))
+        added.append([utc_ts, y, x])
+
+    return index, added
+
+def pages(index:TrailIndex, limit:int, **query) -> list[list]:
+    """
+    **Every page of a query, following the cursors.**
+    """
+    result, cursor = [], None
+    while True:
+        page, cursor = index.query('rex', cursor=cursor, limit=limit, **query)
+        assert len(page) <= limit
+        result.append(page)
+        if cursor is None: return result
+
+def test_paging_has_no_gaps_or_repeats():
+    index, added = filled_index()
+
+    points = [p for page in pages(index, 37) for p in page]
+    assert points == added
+
+def test_bbox_paging_has_no_gaps_or_repeats():
+    index, added = filled_index()
+    bbox = { 'min_x': 20, 'max_x': 60, 'min_y': 10, 'max_y': 50 }
+
+    expected = [
+        p for p in added if 10 <= p[1] <= 50 and 20 <= p[2] <= 60
+    ]
+    points = [p for page in pages(index, 11, bbox=bbox) for p in page]
+    assert points == expected
+
+def test_paging_survives_older_inserts():
+    index, added = filled_index()
+
+    first, cursor = index.query('rex', limit=100)
+    # An offline upload lands before the cursor
+    for n in range(10):
+        index.add('rex', 1000.0 + n, (-1.0, float(n)))
+
+    rest = []
+    while cursor is not None:
+        page, cursor = index.query('rex', cursor=cursor, limit=100)
+        rest += page
+
+    assert first + rest == added
+
+def test_time_range_is_inclusive():
+    index, added = filled_index()
+
+    points = [p for page in pages(index, 50, start=1010, end=1020)
+              for p in page]
+    assert points == [p for p in added if 1010 <= p[0] <= 1020]
+
+def test_empty_bbox():
+    index, _ = filled_index()
+
+    outside = { 'min_x': 500, 'max_x': 600, 'min_y': 500, 'max_y': 600 }
+    assert index.query('rex', bbox=outside) == ([], None)
+
+    nothing = { 'min_x': 50.5, 'max_x': 50.5, 'min_y': -1, 'max_y': -1 }
+    assert index.query('rex', bbox=nothing) == ([], None)
+
+def test_unknown_player():
+    index, _ = filled_index()
+
+    assert index.query('nobody') == ([], None)
+
+def test_duplicates_are_ignored():
+    index = TrailIndex()
+
+    assert index.add('rex', 1000, (1.0, 2.0))
+    assert index.add('rex', 1000, (1.0, 3.0))
+    assert not index.add('rex', 1000, (1.0, 2.0))
+    assert index.size('rex') == 2
+
+def test_trim_keeps_the_newest_points():
+    index = TrailIndex(max_points=100)
+    for n in range(300):
+        index.add('rex', float(n), (0.0, 0.0))
+
+    assert 100 <= index.size('rex') <= 110
+    page, _ = index.query('rex', limit=1000)
+    assert page[-1][0] == 299.0
+
+@pytest.mark.parametrize('key', ['min_x', 'start', 'end', 'limit', 'cursor'])
+@pytest.mark.parametrize('value', ['nan', 'inf', '-inf', '1e999'])
+def test_query_rejects_non_finite_numbers(key, value):
+    params = { 'alias': 'rex', key: value }
+    if key == 'min_x':
+        params.update({ 'max_x': 1, 'min_y': 0, 'max_y': 1 })
+    if key == 'cursor':
+        params[key] = f'{value}:1'
+
+    assert 'error' in server.query_trail(params)
+
+@pytest.mark.parametrize('params', [
+    {}, { 'alias': '' }, { 'alias': 'rex', 'min_x': 1 },
+    { 'alias': 'rex', 'limit': 0 }, { 'alias': 'rex', 'limit': '1.5' },
+    { 'alias': 'rex', 'cursor': 'abc' }, { 'alias': 'rex', 'cursor': '5:-1' }
+])
+def test_query_rejects_invalid_parameters(params):
+    assert 'error' in server.query_trail(params)
+
+def test_query_caps_the_limit():
+    max_limit = server.CONFIG.get('trail_query_max_limit', 1000)
+
+    query = server.parse_trail_query({ 'alias': 'rex',
+                                       'limit': max_limit * 10 })
+    assert query['limit'] == max_limit
+
+    query = server.parse_trail_query({ 'alias': 'rex' })
+    assert query['limit'] == max_limit
+
+def test_query_cursor_roundtrip(monkeypatch):
+    index, added = filled_index()
+    monkeypatch.setattr(server, 'trail_index', index)
+
+    points, cursor = [], None
+    while True:
+        params = { 'alias': 'rex', 'limit': '64' }
+        if cursor: params['cursor'] = cursor
+
+        result = server.query_trail(params)
+        points += result['points']
+        cursor = result['next']
+        if cursor is None: break
+
+    assert points == added